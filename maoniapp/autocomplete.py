@@ -0,0 +1,268 @@
+import heapq
+import threading
+import time
+import unicodedata
+from bisect import bisect_left
+
+
+def normalize(text):
+    """Minuscules, sans accents, espaces réduits : "  Église St-Jean " -> "eglise st-jean"."""
+    decomposed = unicodedata.normalize('NFKD', text or '')
+    stripped = ''.join(char for char in decomposed if not unicodedata.combining(char))
+    return ' '.join(stripped.casefold().split())
+
+
+class Autocomplete:
+    """
+    Suggestions de noms d'entreprises actives, en mémoire par processus.
+
+    Chaque nom normalisé est indexé à partir de chacun de ses mots ("pharmacie du centre",
+    "du centre", "centre") dans un tableau trié de clés "texte\\0id" : les clés d'un même
+    préfixe forment une plage, trouvée par bisection (trie implicite). Pour chaque préfixe de
+    plus de HEAVY clés, les K entreprises les plus commentées sont précalculées ; les autres
+    plages sont parcourues directement. Quand les correspondances exactes ne suffisent pas,
+    un parcours du trie avec une ligne de Levenshtein par noeud trouve les préfixes à
+    distance 1 (2 à partir de FUZZY_TWO_EDITS caractères) ; les premières lettres sont prises
+    telles quelles, ce qui borne le parcours.
+
+    Les modifications de Business sont mises en file par les signaux et appliquées ensemble,
+    sans reconstruction, à la recherche suivante ;
+    les nombres d'avis (mis à jour par UPDATE, sans signal) sont relus toutes les
+    REFRESH_INTERVAL secondes.
+    """
+    TOP_K = 10
+    HEAVY = 256
+    FUZZY_MIN = 3
+    FUZZY_TWO_EDITS = 6
+    REFRESH_INTERVAL = 600
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._build_lock = threading.Lock()
+        self._generation = 0
+        self._state = None
+        self._pending = {}
+        self._loaded_at = 0
+
+    # Construction
+
+    @staticmethod
+    def entry(business_id, name, city, country, logo, review_count):
+        return {
+            'id': str(business_id), 'name': name, 'city': city, 'country': country,
+            'logo': logo or None, 'review_count': review_count,
+        }
+
+    @staticmethod
+    def _keys(entry):
+        words = normalize(entry['name']).split(' ')
+        suffix = entry['id'].replace('-', '')
+        return {f"{' '.join(words[start:])}\0{suffix}" for start in range(len(words)) if words[start]}
+
+    @staticmethod
+    def _suffix(key):
+        return key[key.index('\0') + 1:]
+
+    @staticmethod
+    def _bounds(keys, prefix, lo=0, hi=None):
+        lo = bisect_left(keys, prefix, lo, len(keys) if hi is None else hi)
+        return lo, bisect_left(keys, prefix + '\uffff', lo, len(keys) if hi is None else hi)
+
+    def _best(self, by_id, suffixes, limit=None):
+        return heapq.nlargest(limit or self.TOP_K, suffixes, key=lambda suffix: (by_id[suffix]['review_count'], suffix))
+
+    def _collect(self, keys, by_id, top, lo, hi, depth):
+        """Meilleures entreprises de la plage [lo, hi) des clés de préfixe commun de longueur depth ; remplit top."""
+        if hi - lo <= self.HEAVY:
+            return self._best(by_id, {self._suffix(key) for key in keys[lo:hi]})
+        candidates, index = set(), lo
+        while index < hi:
+            key = keys[index]
+            char = key[depth]
+            end = bisect_left(keys, key[:depth] + chr(ord(char) + 1), index, hi)
+            if char == '\0':
+                candidates.update(self._suffix(key) for key in keys[index:end])
+            else:
+                candidates.update(self._collect(keys, by_id, top, index, end, depth + 1))
+            index = end
+        best = self._best(by_id, candidates)
+        top[keys[lo][:depth]] = best
+        return best
+
+    def build(self, entries):
+        """État de l'index pour une liste d'entrées (voir entry())."""
+        by_id, keys, top = {}, [], {}
+        for entry in entries:
+            by_id[entry['id'].replace('-', '')] = entry
+            keys.extend(self._keys(entry))
+        keys.sort()
+        self._collect(keys, by_id, top, 0, len(keys), 0)
+        return {'by_id': by_id, 'keys': keys, 'top': top}
+
+    def _load_entries(self):
+        from .models.business import Business
+
+        rows = Business.objects.filter(active=True).exclude(name=None).values_list(
+            'id', 'name', 'city', 'country', 'logo', 'review_count'
+        )
+        return [self.entry(id_, name, city, country, logo, reviews) for id_, name, city, country, logo, reviews in rows]
+
+    def _load(self):
+        state = self._state
+        if state is not None and time.monotonic() - self._loaded_at < self.REFRESH_INTERVAL:
+            return self._apply(state) if self._pending else state
+        # Un seul thread reconstruit, hors verrou de l'état : les autres servent l'ancien état
+        # en attendant, ou attendent la première construction
+        if not self._build_lock.acquire(blocking=state is None):
+            return self._apply(state) if self._pending else state
+        try:
+            current = self._state
+            if current is not None and time.monotonic() - self._loaded_at < self.REFRESH_INTERVAL:
+                return self._apply(current) if self._pending else current  # Reconstruit pendant l'attente
+            with self._lock:
+                generation = self._generation
+            fresh = self.build(self._load_entries())
+            with self._lock:
+                if generation == self._generation:
+                    # Les changements en attente datent d'avant la lecture : elle les contient
+                    self._state, self._pending, self._loaded_at = fresh, {}, time.monotonic()
+            return fresh
+        finally:
+            self._build_lock.release()
+
+    def load(self, entries):
+        """Remplace l'index par ces entrées (commande de benchmark, tests)."""
+        state = self.build(entries)
+        with self._lock:
+            self._generation += 1
+            self._state, self._pending, self._loaded_at = state, {}, time.monotonic()
+
+    # Mises à jour incrémentales
+
+    def invalidate(self):
+        with self._lock:
+            self._generation += 1
+            self._state, self._pending = None, {}
+
+    def update(self, entry):
+        # Une entrée sans nom retire l'entreprise : voir remove().
+        # Simple mise en file : une importation de N entreprises ne copie pas N fois l'index,
+        # les changements en attente sont appliqués ensemble à la lecture suivante (_apply()).
+        with self._lock:
+            if self._state is None:
+                return
+            self._generation += 1
+            self._pending[entry['id'].replace('-', '')] = entry
+
+    def remove(self, business_id):
+        self.update({'id': str(business_id), 'name': None})
+
+    def _apply(self, state):
+        """État avec les changements en attente appliqués en une seule copie."""
+        with self._lock:
+            if not self._pending or self._state is None:
+                return state  # Appliqués par un autre thread, ou index invalidé
+            state, pending, self._pending = self._state, self._pending, {}
+            # Copie puis remplacement de l'état : les lectures en cours, sans verrou, gardent l'ancien.
+            by_id, top = dict(state['by_id']), dict(state['top'])
+            stale, fresh, touched, entering = set(), set(), set(), {}
+            for suffix, entry in pending.items():
+                old = by_id.pop(suffix, None)
+                for key in self._keys(old) if old is not None else ():
+                    stale.add(key)
+                    touched.update(key[:length] for length in range(key.index('\0') + 1))
+                if entry['name']:
+                    by_id[suffix] = entry
+                    for key in self._keys(entry):
+                        fresh.add(key)
+                        for length in range(key.index('\0') + 1):
+                            entering.setdefault(key[:length], set()).add(suffix)
+            # Une fusion linéaire plutôt qu'un insort par clé
+            removed, added = stale - fresh, sorted(fresh - stale)
+            keys = list(heapq.merge((key for key in state['keys'] if key not in removed), added))
+            # Du plus court au plus long : un recalcul complet d'un préfixe refait aussi ses descendants
+            for prefix in sorted(touched | entering.keys(), key=len):
+                lo, hi = self._bounds(keys, prefix)
+                current = top.get(prefix)
+                if hi - lo <= self.HEAVY:
+                    top.pop(prefix, None)
+                elif current is not None and pending.keys().isdisjoint(current):
+                    # Aucune entreprise modifiée n'y figurait : elles peuvent seulement y entrer
+                    top[prefix] = self._best(by_id, set(current) | entering.get(prefix, set()))
+                else:
+                    self._collect(keys, by_id, top, lo, hi, len(prefix))
+            self._state = {'by_id': by_id, 'keys': keys, 'top': top}
+            return self._state
+
+    # Recherche
+
+    def _range_best(self, state, lo, hi, depth, limit):
+        keys = state['keys']
+        if hi - lo > self.HEAVY:
+            return state['top'][keys[lo][:depth]][:limit]
+        return self._best(state['by_id'], {self._suffix(key) for key in keys[lo:hi]}, limit)
+
+    def _fuzzy(self, keys, query, max_distance):
+        """Plages de clés dont un préfixe est à distance <= max_distance de query : [(distance, lo, hi, depth)]."""
+        # Les max_distance premières lettres sont prises telles quelles (comme prefix_length
+        # des requêtes floues d'Elasticsearch) : c'est le haut du trie, le plus dense
+        size, worse, exact = len(query), max_distance + 1, max_distance
+        lo, hi = self._bounds(keys, query[:exact])
+        row = [min(abs(column - exact), worse) for column in range(size + 1)]
+        matches, stack = [], [(lo, hi, exact, row)]
+        while stack:
+            lo, hi, depth, row = stack.pop()
+            if row[size] <= max_distance:
+                matches.append((row[size], lo, hi, depth))
+                continue
+            # Seules les colonnes à moins de max_distance de la diagonale peuvent rester sous le seuil
+            first, last = max(1, depth + 1 - max_distance), min(size, depth + 1 + max_distance)
+            index = lo
+            while index < hi:
+                key = keys[index]
+                char = key[depth]
+                end = bisect_left(keys, key[:depth] + chr(ord(char) + 1), index, hi)
+                if char != '\0' and first <= last:
+                    next_row = [worse] * (size + 1)
+                    next_row[0] = depth + 1 if depth < max_distance else worse
+                    best = worse
+                    for column in range(first, last + 1):
+                        # min(substitution, suppression, insertion) sans appel de fonction : boucle chaude
+                        value = row[column - 1] + (query[column - 1] != char)
+                        if row[column] + 1 < value:
+                            value = row[column] + 1
+                        if next_row[column - 1] + 1 < value:
+                            value = next_row[column - 1] + 1
+                        if value > worse:
+                            value = worse
+                        next_row[column] = value
+                        if value < best:
+                            best = value
+                    if best <= max_distance:
+                        stack.append((index, end, depth + 1, next_row))
+                index = end
+        return matches
+
+    def suggest(self, text, limit=None):
+        """Entrées correspondant au texte saisi, au plus `limit`, les plus commentées d'abord."""
+        limit = min(limit or self.TOP_K, self.TOP_K)
+        query = normalize(text)
+        if not query:
+            return []
+        state = self._load()
+        by_id, keys = state['by_id'], state['keys']
+        lo, hi = self._bounds(keys, query)
+        found = self._range_best(state, lo, hi, len(query), limit) if hi > lo else []
+        if len(found) < limit and len(query) >= self.FUZZY_MIN:
+            max_distance = 2 if len(query) >= self.FUZZY_TWO_EDITS else 1
+            seen, candidates = set(found), []
+            for distance, lo, hi, depth in self._fuzzy(keys, query, max_distance):
+                for suffix in self._range_best(state, lo, hi, depth, limit):
+                    if suffix not in seen:
+                        seen.add(suffix)
+                        candidates.append((distance, -by_id[suffix]['review_count'], suffix))
+            found += [suffix for _, _, suffix in heapq.nsmallest(limit - len(found), candidates)]
+        return [by_id[suffix] for suffix in found]
+
+
+business_autocomplete = Autocomplete()
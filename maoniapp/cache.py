@@ -0,0 +1,237 @@
+import math
+import random
+import threading
+import time
+import weakref
+
+from cachetools import LRUCache
+from django.core.cache import caches
+from django.core.signals import request_started
+from django.dispatch import receiver
+
+
+class _Flight:
+    # Recalcul en cours d'une clé dans ce processus
+    __slots__ = ('lock', '__weakref__')
+
+    def __init__(self):
+        self.lock = threading.Lock()
+
+
+class TwoTierCache:
+    """
+    Cache des données calculées à partir de modèles, à deux niveaux : un LRU par processus
+    devant le cache partagé de Django (CACHES['default'] : Redis si REDIS_URL est défini,
+    fichiers locaux sinon).
+
+    Chaque entrée est rangée sous l'empreinte des versions des modèles dont elle dépend
+    (DataVersion.stamp, incrémentée après la validation de chaque écriture par les signaux
+    post_save / post_delete) : une écriture validée rend ses entrées introuvables dans tous les
+    processus, sans rien effacer ; les anciennes entrées sortent du LRU et expirent du cache
+    partagé. L'empreinte est relue à chaque appel (une requête indexée) : jamais de donnée
+    antérieure à la dernière écriture. Les valeurs sont partagées, ne pas les modifier.
+
+    Recalcul unique (single flight) : un seul thread par processus recalcule une clé absente,
+    et un seul processus à la fois grâce à un bail posé par add() dans le cache partagé ; les
+    autres attendent la valeur au plus WAIT secondes, puis la calculent eux-mêmes. Avec
+    stale=True, ils reçoivent tout de suite la valeur précédente de ce processus quand il en a une.
+    Le bail n'exclut vraiment les autres processus qu'avec un add() atomique (Redis) : celui de
+    FileBasedCache lit puis écrit le fichier, deux processus peuvent obtenir le bail ensemble et
+    recalculer tous les deux. Sans Redis, seul le recalcul unique par processus est garanti.
+
+    Rafraîchissement anticipé (XFetch) : avant son expiration, une entrée est recalculée avec
+    une probabilité qui croît avec la durée de son dernier calcul et à l'approche de l'échéance
+    (BETA règle l'avance) ; un seul appelant recalcule, les autres gardent la valeur courante.
+    """
+    PREFIX = 'maoni'
+    # Attente maximale d'un recalcul fait par un autre thread ou processus, en secondes
+    WAIT = 5
+    POLL_INTERVAL = 0.02
+    BETA = 1.0
+    # Désactivable pour mesurer (voir la commande loadtest_business_page)
+    single_flight = True
+
+    def __init__(self, alias='default', maxsize=256, timeout=3600):
+        self.alias = alias
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._local = LRUCache(maxsize=maxsize)
+        # Dernière valeur de chaque nom, servie avec stale=True pendant un recalcul
+        self._previous = LRUCache(maxsize=maxsize)
+        self._flights = weakref.WeakValueDictionary()
+
+    @property
+    def shared(self):
+        return caches[self.alias]
+
+    def key(self, name, models):
+        from .models.version import DataVersion
+        stamp = DataVersion.stamp(models)
+        return None if stamp is None else f'{self.PREFIX}:{name}:{stamp}'
+
+    def get_or_set(self, name, models, compute, timeout=None, stale=False):
+        """Valeur `name` pour l'état courant de `models`, calculée par compute() au premier appel."""
+        timeout = self.timeout if timeout is None else timeout
+        key = self.key(name, models)
+        if key is None:
+            # Modèle sans version (base non migrée) : rien ne dirait quand la valeur périme
+            return compute()
+        entry = self._get(key, name)
+        if not self.single_flight:
+            if entry is None:
+                entry = self._compute(key, name, compute, timeout)
+            return entry[0]
+        if entry is not None:
+            if not self._early(entry):
+                return entry[0]
+            refreshed = self._refresh(key, name, compute, timeout, entry, wait=0)
+            return (refreshed or entry)[0]
+        if stale:
+            with self._lock:
+                previous = self._previous.get(name)
+            if previous is not None:
+                refreshed = self._refresh(key, name, compute, timeout, None, wait=0)
+                return (refreshed or previous)[0]
+        entry = self._refresh(key, name, compute, timeout, None, wait=self.WAIT)
+        if entry is None:
+            # Recalcul trop long ailleurs : ne pas attendre davantage
+            entry = self._compute(key, name, compute, timeout)
+        return entry[0]
+
+    def clear_local(self):
+        with self._lock:
+            self._local.clear()
+            self._previous.clear()
+
+    # Entrées : (valeur, durée du calcul, échéance en secondes depuis l'epoch)
+
+    def _get(self, key, name):
+        with self._lock:
+            entry = self._local.get(key)
+        if entry is None:
+            entry = self.shared.get(key)
+            if entry is not None:
+                self._keep(key, name, entry)
+        return entry
+
+    def _keep(self, key, name, entry):
+        with self._lock:
+            self._local[key] = entry
+            self._previous[name] = entry
+
+    def _compute(self, key, name, compute, timeout):
+        started = time.perf_counter()
+        value = compute()
+        delta = time.perf_counter() - started
+        entry = (value, delta, time.time() + timeout)
+        self.shared.set(key, entry, timeout)
+        self._keep(key, name, entry)
+        return entry
+
+    def _early(self, entry):
+        _, delta, expires = entry
+        # -log(u) suit une loi exponentielle : rarement loin avant l'échéance, presque sûrement juste avant
+        return time.time() - delta * self.BETA * math.log(1.0 - random.random()) >= expires
+
+    def _flight(self, key):
+        with self._lock:
+            flight = self._flights.get(key)
+            if flight is None:
+                flight = self._flights[key] = _Flight()
+            return flight
+
+    def _refresh(self, key, name, compute, timeout, seen, wait):
+        """
+        Recalcule `key` si aucun autre thread ou processus ne le fait déjà ; sinon attend sa
+        valeur au plus `wait` secondes. None si rien de plus récent que `seen` n'est disponible.
+        """
+        flight = self._flight(key)
+        if not flight.lock.acquire(timeout=wait):
+            return None
+        try:
+            entry = self._get(key, name)
+            if entry is not None and (seen is None or entry[2] != seen[2]):
+                # Recalculé pendant l'attente
+                return entry
+            lease = f'{key}:lease'
+            if self.shared.add(lease, 1, self.WAIT * 2):
+                try:
+                    return self._compute(key, name, compute, timeout)
+                finally:
+                    self.shared.delete(lease)
+            deadline = time.monotonic() + wait
+            while time.monotonic() < deadline:
+                time.sleep(self.POLL_INTERVAL)
+                entry = self.shared.get(key)
+                if entry is not None and (seen is None or entry[2] != seen[2]):
+                    self._keep(key, name, entry)
+                    return entry
+            return None
+        finally:
+            flight.lock.release()
+
+
+shared_cache = TwoTierCache()
+
+
+# États déjà comparés à leur empreinte pendant la requête HTTP en cours de ce thread
+_request = threading.local()
+
+
+@receiver(request_started)
+def _new_request(**kwargs):
+    _request.checked = set()
+
+
+class ProcessState:
+    """
+    Valeur calculée à partir de modèles et gardée en mémoire par processus, avec l'empreinte
+    (DataVersion.stamp) de ces modèles au moment du calcul. Les signaux de ce processus
+    l'invalident tout de suite ; l'empreinte est relue au premier usage de chaque requête HTTP,
+    ce qui rattrape les écritures des autres processus et celles qui ne passent pas par les
+    signaux (.update() suivi de DataVersion.bump()), sans une requête par appel. Recalculée
+    depuis shared_cache quand un autre processus l'a déjà fait.
+    """
+    name = None
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._generation = 0
+        self._state = None  # (empreinte, valeur)
+
+    def models(self):
+        raise NotImplementedError
+
+    def _query(self):
+        raise NotImplementedError
+
+    def invalidate(self):
+        with self._lock:
+            self._generation += 1
+            self._state = None
+
+    def _load(self):
+        from .models.version import DataVersion
+
+        state = self._state
+        if state is not None and (self._checked() or DataVersion.stamp(self.models()) == state[0]):
+            self._check()
+            return state[1]
+        with self._lock:
+            generation = self._generation
+        stamp = DataVersion.stamp(self.models())
+        value = shared_cache.get_or_set(self.name, self.models(), self._query)
+        with self._lock:
+            # Ne pas garder une valeur calculée pendant une invalidation, ni sans empreinte
+            if generation == self._generation and stamp is not None:
+                self._state = (stamp, value)
+        self._check()
+        return value
+
+    def _checked(self):
+        return id(self) in getattr(_request, 'checked', ())
+
+    def _check(self):
+        if not hasattr(_request, 'checked'):
+            _request.checked = set()
+        _request.checked.add(id(self))
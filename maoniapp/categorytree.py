@@ -0,0 +1,59 @@
+from .cache import ProcessState
+
+
+class CategoryTree(ProcessState):
+    """
+    Arbre complet des catégories, chargé en une seule requête et gardé en mémoire par processus.
+
+    Chaque noeud a la forme produite par CategorySerializer (id, name, description, parent,
+    subcategories) et les sous-catégories sont les noeuds enfants eux-mêmes : sérialiser un
+    sous-arbre ne coûte aucune requête. Les noeuds sont partagés, ne pas les modifier.
+    L'arbre suit les écritures de Category comme décrit dans ProcessState (maoniapp/cache.py).
+    """
+    name = 'category-tree'
+
+    def models(self):
+        from .models.category import Category
+
+        return (Category,)
+
+    @staticmethod
+    def _query():
+        from .models.category import Category
+
+        rows = Category.objects.values('id', 'name', 'description', 'parent_id', 'path')
+        nodes, paths, ids_by_name = {}, {}, {}
+        for row in rows:
+            paths[row['id']] = row['path']
+            ids_by_name[row['name']] = row['id']
+            nodes[row['id']] = {
+                'id': str(row['id']),
+                'name': row['name'],
+                'description': row['description'],
+                'parent': row['parent_id'],
+                'subcategories': [],
+            }
+        # L'ordre de chargement est conservé pour la liste et pour les sous-catégories
+        for node in nodes.values():
+            parent = nodes.get(node['parent'])
+            if parent is not None:
+                parent['subcategories'].append(node)
+        return nodes, paths, ids_by_name
+
+    def nodes(self):
+        return list(self._load()[0].values())
+
+    def node(self, category_id):
+        return self._load()[0].get(category_id)
+
+    def path_by_name(self, name):
+        # Chemin matérialisé de la catégorie `name`, None si elle n'existe pas
+        nodes, paths, ids_by_name = self._load()
+        return paths.get(ids_by_name.get(name))
+
+    def subcategories(self, category_id):
+        node = self.node(category_id)
+        return node['subcategories'] if node is not None else []
+
+
+category_tree = CategoryTree()
@@ -0,0 +1,166 @@
+import hashlib
+import math
+import threading
+import time
+from datetime import timedelta
+
+from cachetools import LRUCache
+from django.db import transaction
+
+
+class BloomFilter:
+    """Filtre de Bloom : `x in filtre` est faux seulement si x n'a jamais été ajouté."""
+
+    def __init__(self, capacity, error_rate=0.001):
+        self.capacity = max(capacity, 1024)
+        self.size = math.ceil(-self.capacity * math.log(error_rate) / math.log(2) ** 2)
+        self.hashes = max(1, round(self.size / self.capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, item):
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        first, second = int.from_bytes(digest[:8], 'big'), int.from_bytes(digest[8:], 'big') | 1
+        return ((first + i * second) % self.size for i in range(self.hashes))
+
+    def add(self, item):
+        for position in self._positions(item):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, item):
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(item))
+
+
+class CodeStatusCache:
+    """
+    Statut des codes d'invitation gardé en mémoire, par processus, pour check-code-status.
+
+    Un filtre de Bloom de tous les codes répond "ce n'est pas un code" sans requête ; les
+    statuts déjà lus sont gardés dans un LRU (None pour un faux positif du filtre).
+    Les écritures de ce processus sont reportées au commit (post_save, generate_batch, redeem) ;
+    celles des autres processus sont relues par updated_at, au plus une fois par SYNC_INTERVAL
+    secondes, avec une marge pour les horloges et les transactions longues.
+
+    Les requêtes de construction et de synchronisation sont faites hors du verrou, par un seul
+    thread ; le résultat est installé sous le verrou. Pendant ce temps les autres appels
+    utilisent l'état courant, ou lisent le code en base avant la première construction.
+    Une lecture ne remplace pas un statut reporté par ce processus après son début.
+    """
+    SYNC_INTERVAL = 2
+    SYNC_OVERLAP = timedelta(seconds=30)
+    MAX_STATUSES = 100_000
+    MAX_WRITES = 10_000
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._filter = None
+        self._statuses = LRUCache(maxsize=self.MAX_STATUSES)
+        self._watermark = None
+        self._next_sync = 0
+        self._loading = False
+        # Écritures reportées par ce processus, numérotées : {code: (numéro, is_active)}
+        self._writes = 0
+        self._written = LRUCache(maxsize=self.MAX_WRITES)
+
+    def _code_model(self):
+        from .models.code import Code
+        return Code
+
+    def _load_filter(self):
+        # Tous les codes : (filtre, plus récent updated_at). Appelé hors du verrou
+        Code = self._code_model()
+        bloom = BloomFilter(capacity=2 * Code.objects.count())
+        watermark = None
+        for invitation_code, updated_at in Code.objects.values_list('invitation_code', 'updated_at').iterator():
+            bloom.add(invitation_code)
+            if watermark is None or updated_at > watermark:
+                watermark = updated_at
+        return bloom, watermark
+
+    def _load_changes(self, watermark):
+        # Codes créés ou dont le statut a changé depuis le dernier passage, dans tous les processus
+        Code = self._code_model()
+        changed = Code.objects.all()
+        if watermark is not None:
+            changed = changed.filter(updated_at__gte=watermark - self.SYNC_OVERLAP)
+        return list(changed.values_list('invitation_code', 'is_active', 'updated_at'))
+
+    def _refresh(self):
+        # Construction ou synchronisation si elle est due et qu'aucun autre thread ne la fait
+        with self._lock:
+            if self._loading or (self._filter is not None and time.monotonic() < self._next_sync):
+                return
+            self._loading = True
+            build, watermark, started = self._filter is None, self._watermark, self._writes
+        try:
+            if build:
+                bloom, watermark = self._load_filter()
+                changes = []
+            else:
+                changes = self._load_changes(watermark)
+        except BaseException:
+            with self._lock:
+                self._loading = False
+            raise
+        with self._lock:
+            if build:
+                self._filter, self._watermark = bloom, watermark
+                self._statuses.clear()
+                # Écritures validées pendant la construction
+                for invitation_code, (number, is_active) in self._written.items():
+                    if number > started and self._filter is not None:
+                        self._store(invitation_code, is_active)
+            for invitation_code, is_active, updated_at in changes:
+                if self._filter is None:
+                    break
+                if self._written.get(invitation_code, (0,))[0] <= started:
+                    self._store(invitation_code, is_active)
+                if self._watermark is None or updated_at > self._watermark:
+                    self._watermark = updated_at
+            self._next_sync = time.monotonic() + self.SYNC_INTERVAL
+            self._loading = False
+
+    def _store(self, invitation_code, is_active):
+        if invitation_code not in self._filter:
+            self._filter.add(invitation_code)
+            if self._filter.count > self._filter.capacity:
+                self._filter = None  # Filtre saturé : reconstruit plus grand au prochain appel
+                return
+        self._statuses[invitation_code] = is_active
+
+    def status(self, invitation_code):
+        """True/False pour un code actif/utilisé, None si le code n'existe pas."""
+        self._refresh()
+        with self._lock:
+            if self._filter is not None:
+                if invitation_code not in self._filter:
+                    return None
+                try:
+                    return self._statuses[invitation_code]
+                except KeyError:
+                    pass
+            started = self._writes
+        Code = self._code_model()
+        is_active = Code.objects.filter(invitation_code=invitation_code).values_list('is_active', flat=True).first()
+        with self._lock:
+            number, recorded = self._written.get(invitation_code, (0, None))
+            if number > started:
+                return recorded
+            if self._filter is not None and invitation_code in self._filter:
+                self._statuses[invitation_code] = is_active
+            return is_active
+
+    def record(self, statuses):
+        """Reporte {code: is_active} une fois la transaction en cours validée."""
+        def apply():
+            with self._lock:
+                self._writes += 1
+                for invitation_code, is_active in statuses.items():
+                    self._written[invitation_code] = (self._writes, is_active)
+                    if self._filter is not None:
+                        self._store(invitation_code, is_active)
+        transaction.on_commit(apply)
+
+
+code_status_cache = CodeStatusCache()
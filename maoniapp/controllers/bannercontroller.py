@@ -2,8 +2,10 @@ from rest_framework import viewsets
 from ..permissions.permissions import IsSuperAdminOrReadOnly
 from ..models.banner import Banner
 from .serializers import BannerSerialiazer
+from .conditional import ConditionalGetMixin
 
-class BannerViewSet(viewsets.ModelViewSet):
+class BannerViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     queryset = Banner.objects.all()
     serializer_class = BannerSerialiazer
     permission_classes = [IsSuperAdminOrReadOnly]
+    conditional_models = (Banner,)
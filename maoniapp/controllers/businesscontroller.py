@@ -8,29 +8,35 @@ from ..models.user import User, UserBusiness
 from ..permissions.permissions import IsAdminRole, IsRoleAllowed
 from ..models.business import Business
 from ..models.category import Category
-from .serializers import BusinessBrandDisplaySerializer, BusinessDisplaysSerializer, BusinessSerializer, ReviewSerializer, UserBusinessSerializer, UserDisplaySerializer
-from rest_framework.pagination import PageNumberPagination
+from .serializers import BusinessBrandDisplaySerializer, BusinessDisplaysSerializer, BusinessSerializer, ReviewSerializer, UserBusinessSerializer, UserDisplaySerializer, serializer_context
+from .pagination import CustomPagination, KeysetPagination
+from .rowmappers import RowMapper, RowMapperListMixin
+from .conditional import ConditionalGetMixin
+from .coalescing import CoalescedGetMixin
+from .renderers import NDJSONRenderer, STREAM_CHUNK_SIZE, STREAMING_RENDERERS, can_stream, stream_response
 from django_filters import rest_framework as dj_filters
 from rest_framework import filters as drf_filters
 from rest_framework.response import Response
 from rest_framework import status
-from django.db.models import Count
-from django.db.models import Q
+from django.db.models import Q, Sum
 from rest_framework.exceptions import ValidationError
 from rest_framework.exceptions import NotFound
 from django.db import transaction
+from ..categorytree import category_tree
+from ..search import business_index
+from ..autocomplete import business_autocomplete
+from django.core.files.storage import default_storage
 
 
-class CustomPagination(PageNumberPagination):
-    page_size = 10  # Limit number of results per page
-    page_size_query_param = 'page_size'
-    max_page_size = 100  # Maximum page size
-
 # List and Create Businesses
 class BusinessListCreateView(ListCreateAPIView):
     queryset = Business.objects.filter(active=True)
     serializer_class = BusinessSerializer
 
+    def get_queryset(self):
+        # Load what the requested fields read (?fields=, ?expand=)
+        return BusinessSerializer.preload(super().get_queryset(), self.get_serializer_context())
+
     # Permissions pour la méthode list (pas besoin d'être connecté)
     def get_permissions(self):
         if self.request.method == 'GET':
@@ -74,7 +80,7 @@ class BusinessListCreateView(ListCreateAPIView):
                 headers=headers,
             )
 
-class BusinessRetrieveUpdateView(APIView):
+class BusinessRetrieveUpdateView(CoalescedGetMixin, APIView):
     def get_permissions(self):
         if self.request.method == 'PUT':
             return [IsAuthenticated(), IsAdminRole()]
@@ -90,7 +96,7 @@ class BusinessRetrieveUpdateView(APIView):
     def get(self, request, *args, **kwargs):
         business_id = self.kwargs.get('pk')
         business = self.get_object(business_id)
-        serializer = BusinessDisplaysSerializer(business)
+        serializer = BusinessDisplaysSerializer(business, context=serializer_context(request))
         return Response(serializer.data, status=status.HTTP_200_OK)
 
     def put(self, request, *args, **kwargs):
@@ -124,27 +130,25 @@ class BusinessRetrieveUpdateView(APIView):
 
 # List Businesses Name
 class BusinessFilter(dj_filters.FilterSet):
-    name = dj_filters.CharFilter(field_name="name", lookup_expr='icontains', label="Business Name")
+    # Recherche plein texte (préfixes, sans accents), résultats triés par pertinence
+    name = dj_filters.CharFilter(method='search_name', label="Business Name")
     
     class Meta:
         model = Business
         fields = ['name']
 
+    def search_name(self, queryset, name, value):
+        return business_index.filter(queryset, value)
+
 class BusinessListNameView(ListAPIView):
     permission_classes = (AllowAny,)
     serializer_class = BusinessDisplaysSerializer
     filter_backends = (dj_filters.DjangoFilterBackend,)
     filterset_class = BusinessFilter
-    pagination_class = CustomPagination
+    pagination_class = KeysetPagination
     def get_queryset(self):
-        # Start with filtering active businesses
-        queryset = Business.objects.filter(active=True)
-        # Get the 'name' parameter from the request
-        name = self.request.GET.get('name', '').strip()
-        if name:
-            # Filter businesses by name if provided
-            queryset = queryset.filter(name__icontains=name)
-        return queryset
+        # Start with filtering active businesses; BusinessFilter searches the 'name' parameter
+        return BusinessDisplaysSerializer.preload(Business.objects.filter(active=True), self.get_serializer_context())
 
 class BusinessWithReviewsListView(ListAPIView):
     permission_classes = (AllowAny,)
@@ -154,7 +158,9 @@ class BusinessWithReviewsListView(ListAPIView):
     pagination_class = CustomPagination
 
     def get_queryset(self):
-        queryset = Business.objects.annotate(num_reviews=Count('busreview')).filter(num_reviews__gt=0, active=True)
+        queryset = BusinessSerializer.preload(
+            Business.objects.filter(review_count__gt=0, active=True), self.get_serializer_context()
+        )
         
         # Ensure the queryset is ordered by the business name (or another field you prefer)
         queryset = queryset.order_by('name')  # Replace 'name' with any other field if needed
@@ -164,6 +170,21 @@ class BusinessWithReviewsListView(ListAPIView):
 
         return queryset
     
+class BusinessAutocompleteView(APIView):
+    """Name suggestions for the search box, served from the in-memory index (see autocomplete.py)."""
+    permission_classes = (AllowAny,)
+
+    def get(self, request, *args, **kwargs):
+        try:
+            limit = int(request.GET.get('limit', business_autocomplete.TOP_K))
+        except ValueError:
+            return Response({"detail": "limit must be an integer"}, status=status.HTTP_400_BAD_REQUEST)
+        suggestions = []
+        for entry in business_autocomplete.suggest(request.GET.get('q', ''), limit=max(limit, 1)):
+            logo = entry['logo'] and request.build_absolute_uri(default_storage.url(entry['logo']))
+            suggestions.append({**entry, 'logo': logo})
+        return Response(suggestions, status=status.HTTP_200_OK)
+
 #Récupérer le paramètre 'name' depuis la requête GET pour filtrer par nom d'entreprise
 class FilterBusinessReviewsByNameView(APIView):
     permission_classes = (AllowAny,)
@@ -171,45 +192,36 @@ class FilterBusinessReviewsByNameView(APIView):
     def get(self, request, *args, **kwargs):
         businessname = request.GET.get('businessname', None)
         
-        # Build the query with the conditions provided
-        filters = {'active': True}
+        # Retrieve active businesses, searched by name when provided
+        context = serializer_context(request)
+        businesses = BusinessSerializer.preload(Business.objects.filter(active=True), context)
  
         if businessname:
-            filters['name__icontains'] = businessname  # Case-insensitive search
-        
-        # Retrieve businesses with the provided filters
-        businesses = Business.objects.filter(**filters)
-        # Pagination
-        paginator = CustomPagination()
+            businesses = business_index.filter(businesses, businessname)  # Ranked full-text search
+        # Keyset pagination: newest first, or by relevance for a search
+        paginator = KeysetPagination()
         page = paginator.paginate_queryset(businesses, request)
-        
-        if page is not None:
-            # Serialize the paginated data
-            serializer = BusinessSerializer(page, many=True)
-            return paginator.get_paginated_response(serializer.data)
-
-        # If no pagination, return all results
-        serializer = BusinessSerializer(businesses, many=True)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        serializer = BusinessSerializer(page, many=True, context=context)
+        return paginator.get_paginated_response(serializer.data)
 
-class BusinessDetailView(APIView):
+class BusinessDetailView(CoalescedGetMixin, APIView):
     permission_classes = [AllowAny,]
     def get(self, request, *args, **kwargs):
         businesscategory = request.GET.get('businesscategory', None)
         businesscountry = request.GET.get('country', None)
         businesscity = request.GET.get('city', None)
         businessname = request.GET.get('businessname', None)
-        
+
         # Get Category
-        try: 
+        try:
             category = Category.objects.get(name=businesscategory)
         except Category.DoesNotExist:
             return Response({"detail": "Category not found"}, status=status.HTTP_400_BAD_REQUEST)
         # Retrieve the business based on the filters
         business = Business.objects.filter(
-            country=businesscountry, 
-            city=businesscity, 
-            name=businessname, 
+            country=businesscountry,
+            city=businesscity,
+            name=businessname,
             category=category,
             active=True
         ).first()
@@ -218,11 +230,11 @@ class BusinessDetailView(APIView):
             return Response({"detail": "Business not found"}, status=status.HTTP_404_NOT_FOUND)
 
         # Serialize the business data
-        serializer = BusinessSerializer(business)  # if 'business' is a single object, use 'many=False'
+        serializer = BusinessSerializer(business, context=serializer_context(request))
         return Response(serializer.data)
 
 #Get all related business
-class RelatedBusinessesView(APIView):
+class RelatedBusinessesView(CoalescedGetMixin, APIView):
     permission_classes = (AllowAny,)
     def get(self, request, business_id):
         try:
@@ -232,10 +244,11 @@ class RelatedBusinessesView(APIView):
             return Response({"detail": "Business not found."}, status=status.HTTP_404_NOT_FOUND)
 
         # Get related businesses using the get_related_businesses method
-        related_businesses = business.get_related_businesses()
+        context = serializer_context(request)
+        related_businesses = BusinessSerializer.preload(business.get_related_businesses(), context)
 
         # Serialize the related businesses
-        serializer = BusinessSerializer(related_businesses, many=True)
+        serializer = BusinessSerializer(related_businesses, many=True, context=context)
 
         return Response(serializer.data, status=status.HTTP_200_OK)
     
@@ -250,13 +263,14 @@ class GetAllBusinessByCategory(APIView):
             return Response({"detail": "Category not found."}, status=status.HTTP_404_NOT_FOUND)
 
         # Retrieve businesses under the category
-        businesses = Business.objects.filter(
-            category=category, active=True, showeval=True).annotate(num_reviews=Count('busreview')).filter(num_reviews__gt=0)
+        context = serializer_context(request)
+        businesses = BusinessSerializer.preload(Business.objects.filter(
+            category=category, active=True, showeval=True, review_count__gt=0), context)
         if not businesses.exists():
             return Response({"detail": "No businesses found for this category."}, status=status.HTTP_404_NOT_FOUND)
 
         # Serialize the businesses
-        serializer = BusinessSerializer(businesses, many=True)
+        serializer = BusinessSerializer(businesses, many=True, context=context)
 
         return Response(serializer.data, status=status.HTTP_200_OK)
 
@@ -267,10 +281,11 @@ class UserBusinessesView(APIView):
     def get(self, request):
         # Get the logged-in user's businesses and filter for active ones
         user = request.user
-        businesses = user.businesses.filter(active=True)  # Only fetch active businesses
+        context = serializer_context(request)
+        businesses = BusinessDisplaysSerializer.preload(user.businesses.filter(active=True), context)  # Only fetch active businesses
         
         # Serialize the businesses
-        serializer = self.serializer_class(businesses, many=True)
+        serializer = self.serializer_class(businesses, many=True, context=context)
         return Response(serializer.data)
 
 class UsersInSameBusinessView(APIView):
@@ -282,8 +297,10 @@ class UsersInSameBusinessView(APIView):
         user_businesses = request.user.businesses.filter(active=True)  # Only active businesses
         # Get all users linked to the same businesses, excluding the current user
         users = User.objects.filter(businesses__in=user_businesses).exclude(id=request.user.id).distinct()
+        context = serializer_context(request)
+        users = UserDisplaySerializer.preload(users, context)
         # Serialize the user data
-        serializer = self.serializer_class(users, many=True)
+        serializer = self.serializer_class(users, many=True, context=context)
         return Response(serializer.data, status=status.HTTP_200_OK)
 
 class ChangeUserBusinessView(APIView):
@@ -348,8 +365,11 @@ class DeleteUserBusinessView(APIView):
             status=status.HTTP_200_OK 
         )
 
-class BusinessBrandListView(APIView):
+class BusinessBrandListView(ConditionalGetMixin, APIView):
     permission_classes = [AllowAny,]
+    conditional_models = (Business,)
+    renderer_classes = STREAMING_RENDERERS
+    use_row_mapper = True
     """
     View to get all businesses brand
     """
@@ -357,14 +377,23 @@ class BusinessBrandListView(APIView):
         # Retrieve all business records
         businesses = Business.objects.filter(active=True).all()
 
-        # Serialize the data
-        serializer = BusinessBrandDisplaySerializer(businesses, many=True)
+        if self.use_row_mapper:
+            # Fast read path: same output as the serializer, built from .values_list() rows
+            items = RowMapper(BusinessBrandDisplaySerializer()).stream(businesses, STREAM_CHUNK_SIZE)
+        else:
+            items = (
+                BusinessBrandDisplaySerializer(business).data
+                for business in businesses.iterator(chunk_size=STREAM_CHUNK_SIZE)
+            )
 
-        # Return the serialized data in the response
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        # JSON and NDJSON are streamed from the queryset iterator: memory stays flat whatever the size
+        if can_stream(request):
+            return stream_response(request, items)
+        return Response(list(items), status=status.HTTP_200_OK)
 
 class UserBusinessReviews(APIView):
     permission_classes = [IsAuthenticated]
+    renderer_classes = STREAMING_RENDERERS
 
     def get(self, request, *args, **kwargs):
         # Get all businesses for the current user
@@ -373,12 +402,20 @@ class UserBusinessReviews(APIView):
         business_ids = user_businesses.values_list('business', flat=True)
 
         # Get all reviews for these businesses
-        reviews = Review.objects.filter(business__in=business_ids, active=True)
+        context = serializer_context(request)
+        reviews = ReviewSerializer.preload(Review.objects.filter(business__in=business_ids, active=True), context)
 
-        # Serialize the reviews
-        serializer = ReviewSerializer(reviews, many=True)
+        if isinstance(request.accepted_renderer, NDJSONRenderer):
+            # NDJSON export: every review, streamed in chunks instead of one page
+            mapper = RowMapper(ReviewSerializer(context=context))
+            return stream_response(request, mapper.stream(reviews.order_by('-created_at', '-id'), STREAM_CHUNK_SIZE))
 
-        return Response(serializer.data)
+        # Keyset pagination, with the total taken from the businesses' review counters
+        total = Business.objects.filter(id__in=business_ids).aggregate(total=Sum('review_count'))['total'] or 0
+        paginator = KeysetPagination()
+        page = paginator.paginate_queryset(reviews, request, total=total)
+        serializer = ReviewSerializer(page, many=True, context=context)
+        return paginator.get_paginated_response(serializer.data)
 
 
 class BusinessFilter(dj_filters.FilterSet):
@@ -395,22 +432,31 @@ class BusinessFilter(dj_filters.FilterSet):
         category = self.request.GET.get('category')
         country = self.request.GET.get('country')
         city = self.request.GET.get('city')
+        subtree = self.request.GET.get('subtree', '').lower() in ('true', '1')
 
         queryset = queryset.filter(active=True, showeval=True)  # Initial filters
 
-        if category:
+        if category and subtree:
+            # The category and all its subcategories, through the materialized path
+            path = category_tree.path_by_name(category)
+            queryset = queryset.filter(Category.subtree_q(path, 'category__')) if path else queryset.none()
+        elif category:
             queryset = queryset.filter(category__name=category)
         if country:
             queryset = queryset.filter(country__icontains=country)
         if city:
             queryset = queryset.filter(city__icontains=city)
 
-        queryset = queryset.annotate(num_reviews=Count('busreview')).filter(num_reviews__gt=0)
+        queryset = queryset.filter(review_count__gt=0)
         return queryset
 
-class BusinessListView(ListAPIView):
+class BusinessListView(RowMapperListMixin, ListAPIView):
     queryset = Business.objects.all()  # Or pre-filter if always needed
     serializer_class = BusinessSerializer
     filter_backends = [dj_filters.DjangoFilterBackend]  # ONLY DjangoFilterBackend
     filterset_class = BusinessFilter
 
+    def get_queryset(self):
+        # Load what the requested fields read (?fields=, ?expand=)
+        return BusinessSerializer.preload(super().get_queryset(), self.get_serializer_context())
+
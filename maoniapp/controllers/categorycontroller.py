@@ -1,23 +1,29 @@
+from bisect import bisect_left
 from rest_framework.generics import ListCreateAPIView, RetrieveUpdateDestroyAPIView, ListAPIView
 from rest_framework.permissions import AllowAny
+from ..models.business import Business
 from ..models.category import Category
 from .serializers import CategoryBusinessCountSerializer, CategoryNameSerializer, CategorySerializer
-from rest_framework.pagination import PageNumberPagination
+from .pagination import CustomPagination
+from .rowmappers import RowMapperListMixin
+from .conditional import ConditionalGetMixin
 from django_filters import rest_framework as filters
 from django.db.models import Count, Q
+from rest_framework.response import Response
+from ..categorytree import category_tree
+from ..search import category_index
 
 
-class CustomPagination(PageNumberPagination):
-    page_size = 10  # Limit number of results per page
-    page_size_query_param = 'page_size'
-    max_page_size = 100  # Maximum page size
-
 class CategoryFilter(filters.FilterSet):
-    name = filters.CharFilter(field_name="name", lookup_expr='icontains', label="Business Name")
+    # Recherche plein texte (préfixes, sans accents), résultats triés par pertinence
+    name = filters.CharFilter(method='search_name', label="Business Name")
     
     class Meta:
         model = Category
         fields = ['name']
+
+    def search_name(self, queryset, name, value):
+        return category_index.filter(queryset, value)
         
 class FilterCategoryWithNameView(ListAPIView):
     permission_classes = (AllowAny,)
@@ -35,10 +41,19 @@ class FilterCategoryWithNameView(ListAPIView):
         return queryset
     
 # List and Create Categories
-class CategoryListCreateView(ListCreateAPIView):
+class CategoryListCreateView(ConditionalGetMixin, ListCreateAPIView):
     permission_classes = (AllowAny,)
+    conditional_models = (Category,)
     queryset = Category.objects.all()
     serializer_class = CategorySerializer
+
+    def list(self, request, *args, **kwargs):
+        # Served from the in-memory category tree: no query per category
+        categories = category_tree.nodes()
+        page = self.paginate_queryset(categories)
+        if page is not None:
+            return self.get_paginated_response(page)
+        return Response(categories)
     
 # Retrieve, Update, and Delete a Category
 class CategoryRetrieveUpdateDeleteView(RetrieveUpdateDestroyAPIView):
@@ -46,11 +61,50 @@ class CategoryRetrieveUpdateDeleteView(RetrieveUpdateDestroyAPIView):
     queryset = Category.objects.all()
     serializer_class = CategorySerializer
 
-class CategoryBusinessCountView(ListAPIView):
+
+def with_business_counts(queryset):
+    # Number of active businesses of each category, most populated first
+    return queryset.annotate(
+        business_count=Count('businesscat', filter=Q(businesscat__active=True)) # Count only active businesses
+    ).order_by('-business_count')
+
+
+class CategoryBusinessCountView(ConditionalGetMixin, RowMapperListMixin, ListAPIView):
+    """
+    ?category=<name> restricts the list to that category and its subcategories,
+    ?rollup=true adds the businesses of all subcategories to each count.
+    """
     permission_classes = (AllowAny,)
     serializer_class = CategoryBusinessCountSerializer
+    conditional_models = (Category, Business)
+
     def get_queryset(self):
-        queryset = Category.objects.filter(active=True).annotate(
-            business_count=Count('businesscat', filter=Q(businesscat__active=True)) # Count only active businesses
-        ).order_by('-business_count')
-        return queryset
\ No newline at end of file
+        queryset = Category.objects.filter(active=True)
+        category = self.request.GET.get('category')
+        if category:
+            path = category_tree.path_by_name(category)
+            queryset = queryset.filter(Category.subtree_q(path)) if path else queryset.none()
+        return with_business_counts(queryset)
+
+    def list(self, request, *args, **kwargs):
+        if self.request.GET.get('rollup', '').lower() not in ('true', '1'):
+            return super().list(request, *args, **kwargs)
+
+        categories = list(self.get_queryset())
+        # Direct counts of every category, sorted by path: a subtree is a contiguous slice
+        counts = sorted(
+            Category.objects.annotate(
+                business_count=Count('businesscat', filter=Q(businesscat__active=True))
+            ).values_list('path', 'business_count')
+        )
+        paths = [path for path, _ in counts]
+        for category in categories:
+            start = bisect_left(paths, category.path)
+            end = bisect_left(paths, category.path[:-1] + '0')
+            category.business_count = sum(count for _, count in counts[start:end])
+        categories.sort(key=lambda category: category.business_count, reverse=True)
+
+        page = self.paginate_queryset(categories)
+        if page is not None:
+            return self.get_paginated_response(self.get_serializer(page, many=True).data)
+        return Response(self.get_serializer(categories, many=True).data)
\ No newline at end of file
@@ -0,0 +1,65 @@
+import threading
+
+from django.http import HttpResponse
+
+# Requêtes en cours, par clé de requête : partagé par toutes les vues du processus
+_lock = threading.Lock()
+_calls = {}
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None  # (status, content, headers) quand la réponse peut être partagée
+
+
+class CoalescedGetMixin:
+    """
+    Identical GET requests in flight in this process share one execution.
+
+    The first request runs the view; identical ones arriving before it finishes wait for it
+    (at most `coalesce_wait` seconds) and get a copy of its rendered response instead of
+    running the same queries again. Requests are identical when they target the same view,
+    path, query string and host with the same `coalesce_headers` (negotiation, credentials,
+    conditional headers). Streamed and failed responses are not shared: the waiting requests
+    then run the view themselves.
+    """
+    coalesce_requests = True
+    coalesce_wait = 10
+    coalesce_headers = (
+        'HTTP_ACCEPT', 'HTTP_ACCEPT_LANGUAGE', 'HTTP_AUTHORIZATION', 'HTTP_COOKIE',
+        'HTTP_IF_NONE_MATCH', 'HTTP_IF_MODIFIED_SINCE',
+    )
+
+    def coalesce_key(self, request):
+        headers = tuple(request.META.get(header) for header in self.coalesce_headers)
+        return type(self), request.method, request.get_host(), request.get_full_path(), headers
+
+    def dispatch(self, request, *args, **kwargs):
+        if not self.coalesce_requests or request.method not in ('GET', 'HEAD'):
+            return super().dispatch(request, *args, **kwargs)
+        key = self.coalesce_key(request)
+        with _lock:
+            call = _calls.get(key)
+            leader = call is None
+            if leader:
+                call = _calls[key] = _Call()
+        if not leader:
+            if call.done.wait(self.coalesce_wait) and call.result is not None:
+                status, content, headers = call.result
+                response = HttpResponse(content, status=status)
+                for header, value in headers:
+                    response.headers[header] = value
+                return response
+            return super().dispatch(request, *args, **kwargs)
+        try:
+            response = super().dispatch(request, *args, **kwargs)
+            if not response.streaming and response.status_code < 500:
+                if hasattr(response, 'render'):
+                    response.render()
+                call.result = (response.status_code, response.content, list(response.items()))
+            return response
+        finally:
+            with _lock:
+                del _calls[key]
+            call.done.set()
@@ -1,17 +1,63 @@
+import csv
+from django.conf import settings
+from django.http import StreamingHttpResponse
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
 from ..models.business import Code
-from rest_framework.permissions import AllowAny
+from ..models.user import UserBusiness
+from ..permissions.permissions import IsRoleAllowed
+from rest_framework.permissions import AllowAny, IsAuthenticated
+from rest_framework.throttling import ScopedRateThrottle
+from ..codestatus import code_status_cache
 
 class CheckCodeStatusView(APIView):
     permission_classes = [AllowAny,]
+    # Limite par IP : l'énumération des codes ne doit pas pouvoir charger la base
+    throttle_classes = [ScopedRateThrottle]
+    throttle_scope = 'check-code'
+
     def get(self, request, invitation_code, format=None):
-        try:
-            # Check if the code exists
-            code = Code.objects.get(invitation_code=invitation_code)
-            
-            # Return whether the code is active or not
-            return Response({'is_active': code.is_active}, status=status.HTTP_200_OK)
-        except Code.DoesNotExist:
+        # Statut servi depuis le cache du processus (voir codestatus.py)
+        is_active = code_status_cache.status(invitation_code)
+        if is_active is None:
             return Response({'detail': 'Code not found.'}, status=status.HTTP_404_NOT_FOUND)
+        return Response({'is_active': is_active}, status=status.HTTP_200_OK)
+
+class Echo:
+    """Pseudo-buffer for csv.writer: write() hands the formatted row back instead of storing it."""
+    def write(self, value):
+        return value
+
+class RequestCodesView(APIView):
+    """
+    Generate `count` additional invitation codes for one of the user's businesses
+    and stream them back as CSV.
+    """
+    permission_classes = [IsAuthenticated, IsRoleAllowed]
+
+    def post(self, request, business_id):
+        # The user must be an active member of an active business
+        if not UserBusiness.objects.filter(
+            user=request.user, business_id=business_id, is_active=True, business__active=True
+        ).exists():
+            return Response({"detail": "Business not found."}, status=status.HTTP_404_NOT_FOUND)
+
+        try:
+            count = int(request.data.get('count', settings.INVITATION_CODES_PER_BUSINESS))
+        except (TypeError, ValueError):
+            return Response({"detail": "count must be an integer."}, status=status.HTTP_400_BAD_REQUEST)
+        if not 1 <= count <= settings.INVITATION_CODE_MAX_REQUEST:
+            return Response(
+                {"detail": f"count must be between 1 and {settings.INVITATION_CODE_MAX_REQUEST}."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        codes = Code.generate_batch([(business_id, count)])
+
+        writer = csv.writer(Echo())
+        rows = [('invitation_code', 'created_at')]
+        rows += ((code.invitation_code, code.created_at.isoformat()) for code in codes)
+        response = StreamingHttpResponse((writer.writerow(row) for row in rows), content_type='text/csv')
+        response['Content-Disposition'] = f'attachment; filename="codes-{business_id}.csv"'
+        return response
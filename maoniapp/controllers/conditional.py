@@ -0,0 +1,68 @@
+import hashlib
+
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import http_date, quote_etag
+from rest_framework.exceptions import APIException
+
+from ..models.version import DataVersion
+
+
+class NotModified(APIException):
+    """Raised before the view runs when the client's copy is current: carries the 304 (or 412) response."""
+    status_code = 304
+
+    def __init__(self, response):
+        super().__init__()
+        self.response = response
+
+
+class ConditionalGetMixin:
+    """
+    Conditional GET for catalog endpoints that change a few times a week.
+
+    The validators come from the DataVersion rows of `conditional_models`, read in one
+    query before the view runs: the ETag hashes their versions and the negotiated media
+    type, Last-Modified is their latest write. A matching If-None-Match / If-Modified-Since
+    is answered with 304 and no body. Responses carry Cache-Control so browsers and CDNs
+    reuse them for `cache_max_age` seconds, then revalidate in the background.
+    """
+    conditional_models = ()
+    cache_max_age = 60
+    cache_stale_while_revalidate = 600
+
+    def get_validators(self, request):
+        # (ETag, Last-Modified); (None, None) when the resource has no validator
+        versions, last_modified = DataVersion.read(self.conditional_models)
+        state = ','.join(f'{name}:{version}' for name, version in sorted(versions.items()))
+        digest = hashlib.blake2b(f'{state}|{request.accepted_media_type}'.encode(), digest_size=12).hexdigest()
+        return quote_etag(digest), last_modified
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        self.validators = None
+        if request.method not in ('GET', 'HEAD'):
+            return
+        self.validators = etag, last_modified = self.get_validators(request)
+        timestamp = int(last_modified.timestamp()) if last_modified else None
+        response = get_conditional_response(request._request, etag=etag, last_modified=timestamp)
+        if response is not None:
+            raise NotModified(response)
+
+    def handle_exception(self, exc):
+        if isinstance(exc, NotModified):
+            return exc.response
+        return super().handle_exception(exc)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        etag, last_modified = getattr(self, 'validators', None) or (None, None)
+        if etag and response.status_code in (200, 304):
+            response.headers['ETag'] = etag
+            if last_modified:
+                response.headers['Last-Modified'] = http_date(last_modified.timestamp())
+            patch_cache_control(
+                response, public=True, max_age=self.cache_max_age,
+                stale_while_revalidate=self.cache_stale_while_revalidate,
+            )
+            patch_vary_headers(response, ['Accept'])
+        return response
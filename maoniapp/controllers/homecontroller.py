@@ -0,0 +1,83 @@
+from rest_framework.permissions import AllowAny
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from ..cache import shared_cache
+from ..models.banner import Banner
+from ..models.business import Business
+from ..models.category import Category
+from ..models.comment import Comment
+from ..models.language import Language, Translation
+from ..models.review import Review
+from ..models.slide import Slide
+from .categorycontroller import with_business_counts
+from .coalescing import CoalescedGetMixin
+from .conditional import ConditionalGetMixin
+from .reviewcontroller import ReviewListCreateView
+from .rowmappers import RowMapper
+from .serializers import (
+    BannerSerialiazer, BusinessBrandDisplaySerializer, CategoryBusinessCountSerializer, ReviewSerializer,
+    SlideSerialiazer,
+)
+
+
+def slides(context):
+    return list(SlideSerialiazer(Slide.objects.all(), many=True, context=context).data)
+
+
+def banners(context):
+    return list(BannerSerialiazer(Banner.objects.all(), many=True, context=context).data)
+
+
+def categories(context):
+    mapper = RowMapper(CategoryBusinessCountSerializer(context=context))
+    return mapper.map(mapper.values(with_business_counts(Category.objects.filter(active=True))))
+
+
+def reviews(context):
+    # The latest reviews, as listed by reviews/
+    queryset = ReviewSerializer.preload(ReviewListCreateView.queryset.all(), context)
+    mapper = RowMapper(ReviewSerializer(context=context))
+    return mapper.map(mapper.values(queryset))
+
+
+def brands(context):
+    mapper = RowMapper(BusinessBrandDisplaySerializer())
+    return mapper.map(mapper.values(Business.objects.filter(active=True)))
+
+
+# (key, build, models the fragment reads, seconds it is kept); its key changes with any write to its models
+FRAGMENTS = [
+    ('slides', slides, (Slide,), 24 * 3600),
+    ('banners', banners, (Banner,), 24 * 3600),
+    ('categories', categories, (Category, Business), 3600),
+    ('reviews', reviews, (Review, Comment, Business, Category, Language, Translation), 600),
+    ('brands', brands, (Business,), 3600),
+]
+
+
+class HomeView(ConditionalGetMixin, CoalescedGetMixin, APIView):
+    """
+    Everything the landing page shows, in one response:
+    - slides: slides/
+    - banners: banners/
+    - categories: category-business-count/
+    - reviews: reviews/ (the latest 4)
+    - brands: businessesbrand/
+
+    Each fragment is cached on its own (maoniapp/cache.py), under the versions of the models
+    it reads and with its own lifetime, so a new review only rebuilds the reviews. ?lang= is
+    applied as on the separate endpoints.
+    """
+    permission_classes = (AllowAny,)
+    conditional_models = tuple(dict.fromkeys(model for *_, models, _ in FRAGMENTS for model in models))
+
+    def get(self, request, *args, **kwargs):
+        lang = request.GET.get('lang')
+        # File URLs are absolute, as on the separate endpoints: one copy per host
+        context = {'request': request, 'lang': lang, 'fields': None, 'expand': None}
+        variant = f'{request.build_absolute_uri("/")}|{lang or ""}'
+        return Response({
+            key: shared_cache.get_or_set(f'home-{key}:{variant}', models, lambda build=build: build(context), timeout)
+            for key, build, models, timeout in FRAGMENTS
+        })
@@ -0,0 +1,59 @@
+from decimal import Decimal
+from django.db.models import Avg, Count
+from ..models.review import Review
+
+
+class ReviewStatsLoader:
+    """
+    Charge les statistiques d'avis (total, moyenne) des entreprises d'une réponse.
+
+    Les entreprises chargées avec leurs compteurs (Business.review_count, ...) sont servies
+    sans requête. Pour celles dont les compteurs ne sont pas chargés (.only(), .defer()),
+    une seule requête groupée calcule les statistiques de toutes les entreprises en attente.
+    Une instance vit le temps d'une sérialisation : voir `for_context`.
+    """
+    CONTEXT_KEY = 'review_stats'
+
+    def __init__(self):
+        self._pending = set()
+        self._stats = {}
+
+    @classmethod
+    def for_context(cls, context):
+        # Le contexte est partagé par le sérialiseur racine et tous ses sérialiseurs imbriqués
+        loader = context.get(cls.CONTEXT_KEY)
+        if loader is None:
+            loader = context[cls.CONTEXT_KEY] = cls()
+        return loader
+
+    def prime(self, business_ids):
+        self._pending.update(pk for pk in business_ids if pk is not None and pk not in self._stats)
+
+    def get(self, business):
+        if not {'review_count', 'evaluation_avg'} & business.get_deferred_fields():
+            return business.get_reviews_info()
+        if business.pk not in self._stats:
+            self._pending.add(business.pk)
+            self._load()
+        return self._stats[business.pk]
+
+    def _load(self):
+        business_ids, self._pending = self._pending, set()
+        for business_id in business_ids:
+            self._stats[business_id] = self._info(0, None)
+        rows = (
+            Review.objects.filter(business_id__in=business_ids, active=True)
+            .values('business_id')
+            .annotate(total_reviews=Count('id'), average_evaluation=Avg('evaluation'))
+        )
+        for row in rows:
+            self._stats[row['business_id']] = self._info(row['total_reviews'], row['average_evaluation'])
+
+    @staticmethod
+    def _info(total_reviews, average_evaluation):
+        # Même format que Business.get_reviews_info
+        return {
+            "total_reviews": total_reviews,
+            "total_evaluation": round(Decimal(average_evaluation or 0), 2),
+            "has_reviews": total_reviews > 0,
+        }
@@ -0,0 +1,147 @@
+import base64
+import json
+import uuid
+from datetime import datetime
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework import serializers
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class CustomPagination(PageNumberPagination):
+    page_size = 10  # Limit number of results per page
+    page_size_query_param = 'page_size'
+    max_page_size = 100  # Maximum page size
+
+
+class KeysetPagination(BasePagination):
+    """
+    Pagination par clé : la page suivante est lue après la dernière ligne de la page courante
+    (WHERE (created_at, id) < (...) ORDER BY created_at DESC, id DESC LIMIT n), sans OFFSET ni
+    COUNT(*) : la page N coûte autant que la première. Le curseur (?cursor=) est opaque.
+
+    Les résultats d'une recherche classée (annotation search_rank, voir search.py) sont
+    paginés dans l'ordre de pertinence. `count` est le total approché fourni par la vue
+    à partir des compteurs stockés, ou None. Un curseur illisible ou altéré donne une 400.
+    """
+    page_size = 10
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    cursor_query_param = 'cursor'
+    ordering = ('-created_at', '-id')
+    invalid_cursor_message = 'Invalid cursor'
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return min(max(size, 1), self.max_page_size)
+
+    def get_ordering(self, queryset):
+        if 'search_rank' in queryset.query.annotations:
+            return ('search_rank', 'id')
+        return self.ordering
+
+    # Curseurs
+
+    @staticmethod
+    def _dump(value):
+        if isinstance(value, datetime):
+            return value.isoformat()
+        if isinstance(value, uuid.UUID):
+            return value.hex
+        return value
+
+    def encode_cursor(self, position, reverse):
+        data = json.dumps({'p': [self._dump(value) for value in position], 'r': int(reverse)}, separators=(',', ':'))
+        cursor = base64.urlsafe_b64encode(data.encode()).decode().rstrip('=')
+        return replace_query_param(self.base_url, self.cursor_query_param, cursor)
+
+    def decode_cursor(self, request):
+        """(position, reverse) du curseur de la requête, (None, False) pour la première page."""
+        cursor = request.query_params.get(self.cursor_query_param)
+        if not cursor:
+            return None, False
+        try:
+            data = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+            position, reverse = data['p'], bool(data['r'])
+        except (TypeError, ValueError, KeyError):
+            self.invalid_cursor()
+        if not isinstance(position, list) or len(position) != len(self.fields):
+            self.invalid_cursor()
+        return position, reverse
+
+    def invalid_cursor(self):
+        raise serializers.ValidationError({self.cursor_query_param: [self.invalid_cursor_message]})
+
+    # Pagination
+
+    def _after(self, position, reverse):
+        # (a, b) après (x, y) dans l'ordre demandé : a > x OU (a = x ET b > y), sens par champ
+        condition, equal = Q(), {}
+        for (name, descending), value in zip(self.fields, position):
+            lookup = 'lt' if descending != reverse else 'gt'
+            condition |= Q(**equal, **{f'{name}__{lookup}': value})
+            equal[name] = value
+        return condition
+
+    def paginate_queryset(self, queryset, request, view=None, total=None):
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.count = total
+        self.fields = [(name.lstrip('-'), name.startswith('-')) for name in self.get_ordering(queryset)]
+        position, reverse = self.decode_cursor(request)
+        size = self.get_page_size(request)
+
+        order = [('-' if descending != reverse else '') + name for name, descending in self.fields]
+        loaded, deferred = queryset.query.deferred_loading
+        if not deferred:
+            # Colonnes restreintes par .only() (?fields=) : charger aussi les clés du curseur
+            keys = [name for name, _ in self.fields if name not in queryset.query.annotations]
+            queryset = queryset.only(*loaded, *keys)
+        try:
+            if position is not None:
+                queryset = queryset.filter(self._after(position, reverse))
+            # Une ligne de plus que la page : y a-t-il une page au-delà ?
+            rows = list(queryset.order_by(*order)[:size + 1])
+        except (TypeError, ValueError, ValidationError):
+            self.invalid_cursor()
+        more = len(rows) > size
+        rows = rows[:size]
+        if reverse:
+            rows.reverse()
+
+        # En arrière, la page suivante existe toujours (le curseur venait d'elle)
+        has_next, has_previous = (True, more) if reverse else (more, position is not None)
+        # Page vide (lignes supprimées depuis) : repartir du curseur lui-même
+        first, last = (self._position(rows[0]), self._position(rows[-1])) if rows else (position, position)
+        self.next = self.encode_cursor(last, False) if has_next and last is not None else None
+        self.previous = self.encode_cursor(first, True) if has_previous and first is not None else None
+        return rows
+
+    def _position(self, row):
+        return [getattr(row, name) for name, _ in self.fields]
+
+    def get_paginated_response(self, data):
+        return Response({
+            'count': self.count,
+            'next': self.next,
+            'previous': self.previous,
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'count': {'type': 'integer', 'nullable': True},
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
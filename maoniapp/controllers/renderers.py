@@ -0,0 +1,84 @@
+import json
+
+from django.http import StreamingHttpResponse
+from rest_framework import renderers
+from rest_framework.utils import encoders
+
+try:
+    import orjson
+except ImportError:  # Encodeur standard de DRF
+    orjson = None
+
+# Lignes lues par paquet dans les réponses en flux (.iterator(chunk_size=...))
+STREAM_CHUNK_SIZE = 500
+# Taille des morceaux envoyés au serveur
+STREAM_BUFFER_SIZE = 64 * 1024
+
+_encoder = encoders.JSONEncoder()
+
+
+def dumps(value):
+    """
+    Même JSON que JSONRenderer de DRF (compact, UTF-8), encodé par orjson quand il est installé.
+    Les dates et les types inconnus d'orjson (Decimal, ...) passent par l'encodeur de DRF.
+    """
+    if orjson is not None:
+        data = orjson.dumps(value, default=_encoder.default, option=orjson.OPT_PASSTHROUGH_DATETIME)
+    else:
+        data = json.dumps(value, cls=encoders.JSONEncoder, ensure_ascii=False, allow_nan=False, separators=(',', ':')).encode()
+    # Séparateurs de ligne JavaScript, échappés comme le fait DRF
+    return data.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+
+
+def _buffered(parts):
+    # Regroupe les petits morceaux : un envoi par STREAM_BUFFER_SIZE octets environ
+    buffer = bytearray()
+    for part in parts:
+        buffer += part
+        if len(buffer) >= STREAM_BUFFER_SIZE:
+            yield bytes(buffer)
+            buffer.clear()
+    if buffer:
+        yield bytes(buffer)
+
+
+class StreamingJSONRenderer(renderers.JSONRenderer):
+    """JSON de DRF ; stream() écrit un tableau élément par élément, sans le construire en mémoire."""
+
+    def stream(self, items):
+        def parts():
+            yield b'['
+            separator = b''
+            for item in items:
+                yield separator + dumps(item)
+                separator = b','
+            yield b']'
+        return _buffered(parts())
+
+
+class NDJSONRenderer(renderers.BaseRenderer):
+    """Un objet JSON par ligne (application/x-ndjson, ?format=ndjson)."""
+    media_type = 'application/x-ndjson'
+    format = 'ndjson'
+    charset = None
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return b''.join(self.stream(data if isinstance(data, list) else [data]))
+
+    def stream(self, items):
+        return _buffered(dumps(item) + b'\n' for item in items)
+
+
+STREAMING_RENDERERS = [StreamingJSONRenderer, NDJSONRenderer, renderers.BrowsableAPIRenderer]
+
+
+def can_stream(request):
+    return hasattr(request.accepted_renderer, 'stream')
+
+
+def stream_response(request, items):
+    """Réponse en flux des éléments `items` (itérable paresseux) dans le format négocié."""
+    renderer = request.accepted_renderer
+    return StreamingHttpResponse(renderer.stream(items), content_type=renderer.media_type)
@@ -3,66 +3,84 @@ from rest_framework.views import APIView
 
 from ..permissions.permissions import IsAdminRole
 from ..models.review import Review
+from ..models.mapcell import MapCell
 from ..models.business import Business, Code
-from .serializers import CommentSerializer, ReviewSerializer
+from .serializers import CommentSerializer, ReviewSerializer, serializer_context
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework import status
 from rest_framework.response import Response
 from rest_framework.exceptions import APIException
-from rest_framework.pagination import PageNumberPagination
+from .pagination import CustomPagination, KeysetPagination
+from .rowmappers import RowMapperListMixin
+from .coalescing import CoalescedGetMixin
 from ..models.category import Category
 from rest_framework.exceptions import NotFound
+from django.db import transaction
+from ..search import business_index, review_index
+from ..models.user import UserBusiness
+from django_filters import rest_framework as dj_filters
+from django.db.models import Q, Sum
+from .. import geo
 
 
-class CustomPagination(PageNumberPagination):
-    page_size = 10  # Limit number of results per page
-    page_size_query_param = 'page_size'
-    max_page_size = 100  # Maximum page size
-
 # List and Create Reviews
-class ReviewListCreateView(ListCreateAPIView):
+class ReviewListCreateView(RowMapperListMixin, ListCreateAPIView):
     permission_classes = (AllowAny,)
     queryset = Review.objects.filter(active=True,  business__showreview=True).order_by('-created_at')[:4]
     serializer_class = ReviewSerializer
 
+    def get_queryset(self):
+        # Load what the requested fields read (?fields=, ?expand=)
+        return ReviewSerializer.preload(super().get_queryset(), self.get_serializer_context())
+
     def create(self, request, *args, **kwargs):
         # Récupérer le code d'invitation depuis la requête
         invitation_code = request.data.get("invitation_code")
 
-        if invitation_code:
-            try:
-                # Vérifier si le code d'invitation existe et est actif
-                code = Code.objects.filter(invitation_code=invitation_code, is_active=True).first()
+        if not invitation_code:
+            return Response(
+                {"detail": "Invitation code is required."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        try:
+            serializer = self.get_serializer(data=request.data)
+            serializer.is_valid(raise_exception=True)
 
-                if not code:
+            # Consommer le code et créer l'avis dans la même transaction
+            with transaction.atomic():
+                business_id = Code.redeem(invitation_code)
+                if business_id is None:
                     return Response(
                         {"detail": "Invalid or inactive invitation code."},
                         status=status.HTTP_400_BAD_REQUEST,
                     )
-                code.is_active = False
-                code.save()
-                # Proceed with creating the review
-                return super().create(request, *args, **kwargs)
-            
-            except APIException as api_err:
-                # Handle API specific errors
-                return Response(
-                    {"detail": str(api_err)},
-                    status=status.HTTP_400_BAD_REQUEST,
-                )
-            except Exception as err:
-                # Catch all other exceptions
-                return Response(
-                    {"detail": f"An error occurred: {str(err)}"},
-                    status=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                )
-        else:
+                # L'avis est rattaché à l'entreprise du code, pas à celle envoyée par le client
+                business = serializer.validated_data.pop('business', None)
+                if business is not None and business.pk != business_id:
+                    transaction.set_rollback(True)
+                    return Response(
+                        {"detail": "The invitation code does not belong to this business."},
+                        status=status.HTTP_400_BAD_REQUEST,
+                    )
+                serializer.save(business_id=business_id)
+
+            headers = self.get_success_headers(serializer.data)
+            return Response(serializer.data, status=status.HTTP_201_CREATED, headers=headers)
+
+        except APIException as api_err:
+            # Handle API specific errors
             return Response(
-                {"detail": "Invitation code is required."},
+                {"detail": str(api_err)},
                 status=status.HTTP_400_BAD_REQUEST,
             )
+        except Exception as err:
+            # Catch all other exceptions
+            return Response(
+                {"detail": f"An error occurred: {str(err)}"},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            )
 
-class ReviewListByBusinessView(APIView):
+class ReviewListByBusinessView(CoalescedGetMixin, APIView):
     permission_classes = (AllowAny,)
 
     def get(self, request, *args, **kwargs):
@@ -70,36 +88,206 @@ class ReviewListByBusinessView(APIView):
         businesscountry = request.GET.get('country', None)
         businesscity = request.GET.get('city', None)
         businessname = request.GET.get('businessname', None)
+        subtree = request.GET.get('subtree', '').lower() in ('true', '1')
         filters = {'active': True}
+        businesses = Business.objects.all()
 
         if businesscategory:
             try:
                 category = Category.objects.get(name=businesscategory)
-                filters['category'] = category
             except Category.DoesNotExist:
                 return Response({"detail": "Category not found"}, status=status.HTTP_404_NOT_FOUND)
+            if subtree:
+                # Include the businesses of every subcategory
+                businesses = businesses.filter(Category.subtree_q(category.path, 'category__'))
+            else:
+                filters['category'] = category
 
         if businesscountry:
             filters['country'] = businesscountry
         if businesscity:
             filters['city'] = businesscity
+        businesses = businesses.filter(**filters)
         if businessname:
-            filters['name__icontains'] = businessname
+            businesses = business_index.filter(businesses, businessname, ranked=False)
         
-        business_id = Business.objects.filter(**filters).values_list('id', flat=True)
-        business_reviews = Review.objects.filter(business_id__in=business_id, active=True)
+        business_id = businesses.values_list('id', flat=True)
+        context = serializer_context(request)
+        business_reviews = ReviewSerializer.preload(Review.objects.filter(business_id__in=business_id, active=True), context)
         
-        # Pagination
+        # Keyset pagination (newest first); the total comes from the stored review counters, not COUNT(*)
+        total = businesses.aggregate(total=Sum('review_count'))['total'] or 0
+        paginator = KeysetPagination()
+        page = paginator.paginate_queryset(business_reviews, request, total=total)
+        serializer = ReviewSerializer(page, many=True, context=context)
+        return paginator.get_paginated_response(serializer.data)
+    
+class ReviewSearchFilter(dj_filters.FilterSet):
+    business = dj_filters.UUIDFilter(field_name='business_id')
+    evaluation_min = dj_filters.NumberFilter(field_name='evaluation', lookup_expr='gte')
+    evaluation_max = dj_filters.NumberFilter(field_name='evaluation', lookup_expr='lte')
+    sentiment = dj_filters.CharFilter(field_name='sentiment', lookup_expr='iexact')
+    created_after = dj_filters.DateFilter(field_name='created_at', lookup_expr='date__gte')
+    created_before = dj_filters.DateFilter(field_name='created_at', lookup_expr='date__lte')
+
+    class Meta:
+        model = Review
+        fields = ['business', 'sentiment']
+
+class ReviewSearchView(APIView):
+    """
+    Full-text search (?q=) in the active reviews of the caller's businesses, or of one of them
+    (?business=), filtered by evaluation, sentiment and creation date. Results are ranked by
+    relevance and carry the highlighted title and a highlighted snippet of the text.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, *args, **kwargs):
+        text = request.GET.get('q', '').strip()
+        if not text:
+            return Response({"detail": "The q parameter is required."}, status=status.HTTP_400_BAD_REQUEST)
+
+        business_ids = UserBusiness.objects.filter(user=request.user, is_active=True).values_list('business', flat=True)
+        reviews = Review.objects.filter(business__in=business_ids, active=True)
+        filterset = ReviewSearchFilter(request.GET, queryset=reviews)
+        if not filterset.is_valid():
+            return Response(filterset.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        # Ranked matches, paginated before loading the reviews themselves
         paginator = CustomPagination()
-        page = paginator.paginate_queryset(business_reviews, request)
-        
-        if page is not None:
-            serializer = ReviewSerializer(page, many=True)
-            return paginator.get_paginated_response(serializer.data)
-       
-        serializer = ReviewSerializer(business_reviews, many=True)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        page = paginator.paginate_queryset(review_index.search(filterset.qs, text), request)
+        context = serializer_context(request)
+        reviews_by_id = ReviewSerializer.preload(Review.objects.all(), context).in_bulk([review_id for review_id, *_ in page])
+        serializer = ReviewSerializer([reviews_by_id[review_id] for review_id, *_ in page], many=True, context=context)
+        results = [
+            {**data, 'search': {'score': score, 'title': title, 'snippet': snippet}}
+            for data, (_, score, title, snippet) in zip(serializer.data, page)
+        ]
+        return paginator.get_paginated_response(results)
+    
+def parse_coordinate(value, name, limit):
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"{name} must be a number.")
+    if not -limit <= number <= limit:
+        raise ValueError(f"{name} must be between -{limit} and {limit}.")
+    return number
+
+def parse_bbox(value, max_degrees=None):
+    """'min_lon,min_lat,max_lon,max_lat' -> (min_lat, min_lon, max_lat, max_lon); ValueError if invalid."""
+    values = (value or '').split(',')
+    if len(values) != 4:
+        raise ValueError("bbox must be min_lon,min_lat,max_lon,max_lat.")
+    min_lon, max_lon = (parse_coordinate(values[i], 'bbox longitude', 180) for i in (0, 2))
+    min_lat, max_lat = (parse_coordinate(values[i], 'bbox latitude', 90) for i in (1, 3))
+    if min_lat > max_lat or min_lon > max_lon:
+        raise ValueError("bbox minimums must not exceed its maximums.")
+    if max_degrees is not None and (max_lat - min_lat > max_degrees or max_lon - min_lon > max_degrees):
+        raise ValueError(f"bbox must not span more than {max_degrees} degrees.")
+    return min_lat, min_lon, max_lat, max_lon
+
+class ReviewNearbyView(APIView):
+    """
+    Active reviews within radius_km (default 5) of ?lat=&lon=, or inside
+    ?bbox=min_lon,min_lat,max_lon,max_lat, nearest first (to the point or to the box centre).
+    Only the geohash cells covering the area are read, through the geohash index.
+    """
+    permission_classes = (AllowAny,)
+    DEFAULT_RADIUS_KM = 5
+    MAX_RADIUS_KM = 100
+    MAX_BBOX_DEGREES = 2
+
+    def parse_area(self, params):
+        """((min_lat, min_lon, max_lat, max_lon), centre, radius_km or None for a box)."""
+        if params.get('bbox'):
+            min_lat, min_lon, max_lat, max_lon = parse_bbox(params['bbox'], self.MAX_BBOX_DEGREES)
+            return (min_lat, min_lon, max_lat, max_lon), ((min_lat + max_lat) / 2, (min_lon + max_lon) / 2), None
+        latitude = parse_coordinate(params.get('lat'), 'lat', 90)
+        longitude = parse_coordinate(params.get('lon'), 'lon', 180)
+        radius = params.get('radius_km', self.DEFAULT_RADIUS_KM)
+        try:
+            radius = float(radius)
+        except (TypeError, ValueError):
+            raise ValueError("radius_km must be a number.")
+        if not 0 < radius <= self.MAX_RADIUS_KM:
+            raise ValueError(f"radius_km must be greater than 0 and at most {self.MAX_RADIUS_KM}.")
+        return geo.radius_bbox(latitude, longitude, radius), (latitude, longitude), radius
+
+    def get(self, request, *args, **kwargs):
+        try:
+            (min_lat, min_lon, max_lat, max_lon), (latitude, longitude), radius = self.parse_area(request.GET)
+        except ValueError as error:
+            return Response({"detail": str(error)}, status=status.HTTP_400_BAD_REQUEST)
+
+        # Candidates from the covering cells, then the exact test and distance in Python
+        cells = Q()
+        for start, end in geo.cell_ranges(min_lat, min_lon, max_lat, max_lon):
+            cells |= Q(geohash__gte=start, geohash__lt=end)
+        # No ORDER BY: hits are sorted by distance below, and an ordered index walk would replace the cell ranges
+        candidates = (
+            Review.objects.filter(cells, active=True, business__active=True)
+            .order_by().values_list('id', 'latitude', 'longitude')
+        )
+        hits = []
+        for review_id, review_lat, review_lon in candidates:
+            if radius is None and not (min_lat <= review_lat <= max_lat and min_lon <= review_lon <= max_lon):
+                continue
+            distance = geo.distance_km(latitude, longitude, review_lat, review_lon)
+            if radius is None or distance <= radius:
+                hits.append((distance, review_id))
+        hits.sort()
+
+        paginator = CustomPagination()
+        page = paginator.paginate_queryset(hits, request)
+        context = serializer_context(request)
+        reviews_by_id = ReviewSerializer.preload(Review.objects.all(), context).in_bulk([review_id for _, review_id in page])
+        serializer = ReviewSerializer([reviews_by_id[review_id] for _, review_id in page], many=True, context=context)
+        results = [
+            {**data, 'distance_km': round(distance, 3)} for data, (distance, _) in zip(serializer.data, page)
+        ]
+        return paginator.get_paginated_response(results)
+    
+class ReviewMapClustersView(APIView):
+    """
+    Clusters of the active located reviews inside ?bbox=min_lon,min_lat,max_lon,max_lat at map
+    ?zoom= (0-22): count, centroid and average evaluation per geohash cell, read from the
+    precomputed MapCell rollups of the zoom's precision. The box may cover at most MAX_CELLS
+    cells of that precision (a few screens of clusters): larger boxes get 400.
+    """
+    permission_classes = (AllowAny,)
+    MAX_ZOOM = 22
+    MAX_CELLS = 4096
+
+    def get(self, request, *args, **kwargs):
+        try:
+            min_lat, min_lon, max_lat, max_lon = parse_bbox(request.GET.get('bbox'))
+        except ValueError as error:
+            return Response({"detail": str(error)}, status=status.HTTP_400_BAD_REQUEST)
+        zoom = request.GET.get('zoom', '')
+        if not zoom.isdigit() or int(zoom) > self.MAX_ZOOM:
+            return Response({"detail": f"zoom must be between 0 and {self.MAX_ZOOM}."}, status=status.HTTP_400_BAD_REQUEST)
+
+        zoom = int(zoom)
+        precision = geo.precision_for_zoom(zoom)
+        if geo.cell_count(min_lat, min_lon, max_lat, max_lon, precision) > self.MAX_CELLS:
+            return Response(
+                {"detail": f"bbox covers more than {self.MAX_CELLS} clusters at this zoom."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        cells = Q()
+        for start, end in geo.cell_ranges(min_lat, min_lon, max_lat, max_lon, max_precision=precision):
+            cells |= Q(cell__gte=start, cell__lt=end)
+        clusters = MapCell.objects.filter(cells, precision=precision, count__gt=0)
+        return Response({
+            'zoom': zoom,
+            'precision': precision,
+            'clusters': [cell.cluster() for cell in clusters],
+        }, status=status.HTTP_200_OK)
     
+class CommentPagination(KeysetPagination):
+    ordering = ('created_at', 'id')
+
 class ReviewCommentsView(APIView):
     permission_classes = [AllowAny,]
     def get(self, request, review_id):
@@ -109,10 +297,11 @@ class ReviewCommentsView(APIView):
         except Review.DoesNotExist:
             return Response({"detail": "Review not found"}, status=status.HTTP_404_NOT_FOUND)
 
-        # Get related comments
-        comments = review.comments.all()[0:]
-        serializer = CommentSerializer(comments, many=True)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        # Related comments, oldest first, by keyset pages
+        paginator = CommentPagination()
+        page = paginator.paginate_queryset(review.comments.all(), request)
+        serializer = CommentSerializer(page, many=True)
+        return paginator.get_paginated_response(serializer.data)
 
 class ReviewUpdateView(APIView):
     permission_classes = [IsAuthenticated, IsAdminRole]
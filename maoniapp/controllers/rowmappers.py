@@ -0,0 +1,212 @@
+from decimal import Decimal
+from functools import lru_cache
+from itertools import islice
+
+from django.core.exceptions import ImproperlyConfigured
+from rest_framework import serializers
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+
+from .serializers import BusinessSerializer, requested_language
+from ..translations import country_name
+
+# Champs rendus tels que lus en base (str, bool, clé primaire liée) : None compris
+_AS_IS = (
+    serializers.CharField, serializers.ChoiceField, serializers.BooleanField, serializers.PrimaryKeyRelatedField,
+)
+# Champs dont to_representation est une simple conversion
+_BUILTINS = ((serializers.UUIDField, str), (serializers.FloatField, float), (serializers.IntegerField, int))
+
+# Genres d'entrée du plan : colonne telle quelle, colonne convertie (si non nulle),
+# fonction de plusieurs colonnes, objet imbriqué (None si la clé étrangère est nulle)
+VALUE, CONVERT, CALL, NESTED = 'value', 'convert', 'call', 'nested'
+
+
+def _country_name(context):
+    language = requested_language(context)
+    return lambda country: country_name(country, language)
+
+
+def _total_evaluation(context):
+    # Même arrondi que Business.get_reviews_info
+    return lambda average: round(Decimal(average), 2)
+
+
+def _has_reviews(context):
+    return lambda count: count > 0
+
+
+def _review_count(context):
+    return lambda count: count
+
+
+# Champs de méthode, recalculés à partir des colonnes qu'ils lisent : (colonnes, fabrique(contexte))
+METHOD_FIELDS = {
+    BusinessSerializer: {
+        'countrynamecode': (('country',), _country_name),
+        'total_reviews': (('review_count',), _review_count),
+        'total_evaluation': (('evaluation_avg',), _total_evaluation),
+        'has_reviews': (('review_count',), _has_reviews),
+    },
+}
+
+
+def _file_url(field, storage):
+    # FileField.to_representation de DRF, à partir du nom stocké en base
+    request = field.context.get('request')
+    use_url = getattr(field, 'use_url', api_settings.UPLOADED_FILES_USE_URL)
+
+    def convert(name):
+        if not name:
+            return None
+        if not use_url:
+            return name
+        url = storage.url(name)
+        return request.build_absolute_uri(url) if request is not None else url
+    return convert
+
+
+@lru_cache(maxsize=256)
+def _compile(layout):
+    """
+    Fonction bind(f0, f1, ...) -> map_row(row) pour un plan ((clé, genre, indices), ...) :
+    map_row construit le dict d'une ligne en une seule expression, sans boucle sur les champs.
+    Le code ne dépend que du plan ; les conversions, propres à chaque requête, sont liées ensuite.
+    """
+    items = []
+    for position, (key, kind, indexes) in enumerate(layout):
+        first = f'row[{indexes[0]}]'
+        if kind == VALUE:
+            expression = first
+        elif kind == CONVERT:
+            expression = f'None if {first} is None else f{position}({first})'
+        elif kind == NESTED:
+            expression = f'None if {first} is None else f{position}(row)'
+        else:
+            expression = f'f{position}({", ".join(f"row[{index}]" for index in indexes)})'
+        items.append(f'{key!r}: {expression}')
+    arguments = ', '.join(f'f{position}' for position in range(len(layout)))
+    source = (
+        f'def bind({arguments}):\n'
+        f'    def map_row(row):\n'
+        f'        return {{{", ".join(items)}}}\n'
+        f'    return map_row\n'
+    )
+    namespace = {}
+    exec(compile(source, '<rowmapper>', 'exec'), namespace)
+    return namespace['bind']
+
+
+class RowMapper:
+    """
+    Lecture rapide des listes publiques : les lignes lues par .values_list(*mapper.columns)
+    deviennent les mêmes dicts que serializer.data (mêmes clés, même ordre, même JSON rendu),
+    sans instancier de modèles ni appeler chaque champ DRF par ligne.
+
+    Le plan est tiré des champs du sérialiseur (?fields= et ?expand= compris) : colonnes
+    rendues telles quelles ou converties, objets imbriqués lus par jointure, relations
+    multiples (comments) chargées en une requête par page, champs de méthode recalculés
+    d'après METHOD_FIELDS. Un champ que le plan ne sait pas rendre lève ImproperlyConfigured.
+    """
+
+    def __init__(self, serializer, offset=0):
+        self.model = serializer.Meta.model
+        self.offset = offset
+        self.columns = []
+        self.layout = []
+        self.functions = []
+        self.relations = []
+        methods = METHOD_FIELDS.get(type(serializer), {})
+        for name, field in serializer.fields.items():
+            if field.write_only:
+                continue
+            if name in methods:
+                columns, factory = methods[name]
+                self._entry(name, CALL, [self._column(column) for column in columns], factory(serializer.context))
+            elif isinstance(field, serializers.ListSerializer):
+                # Relation multiple : liée par map() une fois la page lue
+                relation = self.model._meta.get_field(field.source)
+                self.relations.append((len(self.layout), relation.field.name, RowMapper(field.child)))
+                self._entry(name, CALL, [self._column(self.model._meta.pk.name)], None)
+            elif isinstance(field, serializers.BaseSerializer):
+                check = self._column(field.source)
+                child = RowMapper(field, offset=self.offset + len(self.columns))
+                if child.relations:
+                    raise ImproperlyConfigured(f"{name}: nested many relations are not supported by RowMapper")
+                self.columns += [f'{field.source}__{column}' for column in child.columns]
+                self._entry(name, NESTED, [check], child.bind())
+            elif isinstance(field, serializers.FileField):
+                storage = self.model._meta.get_field(field.source).storage
+                self._entry(name, CONVERT, [self._source(field)], _file_url(field, storage))
+            elif isinstance(field, _AS_IS):
+                self._entry(name, VALUE, [self._source(field)], None)
+            elif isinstance(field, serializers.SerializerMethodField) or field.source == '*':
+                raise ImproperlyConfigured(f"{name}: computed field without a RowMapper definition")
+            else:
+                convert = next((builtin for kind, builtin in _BUILTINS if isinstance(field, kind)), None)
+                self._entry(name, CONVERT, [self._source(field)], convert or field.to_representation)
+
+    def _column(self, name):
+        if name not in self.columns:
+            self.columns.append(name)
+        return self.offset + self.columns.index(name)
+
+    def _source(self, field):
+        return self._column(field.source.replace('.', '__'))
+
+    def _entry(self, key, kind, indexes, function):
+        self.layout.append((key, kind, tuple(indexes)))
+        self.functions.append(function)
+
+    def bind(self, functions=None):
+        return _compile(tuple(self.layout))(*(functions or self.functions))
+
+    def values(self, queryset):
+        # Les préchargements (preload) ne s'appliquent pas aux tuples
+        return queryset.prefetch_related(None).values_list(*self.columns)
+
+    def stream(self, queryset, chunk_size=500):
+        """Dicts des lignes de `queryset`, lues par paquets de chunk_size : seul un paquet est en mémoire."""
+        rows = self.values(queryset).iterator(chunk_size=chunk_size)
+        while True:
+            chunk = list(islice(rows, chunk_size))
+            if not chunk:
+                return
+            yield from self.map(chunk)
+
+    def map(self, rows):
+        """Dicts des lignes `rows` (tuples dans l'ordre de self.columns)."""
+        rows = list(rows)
+        functions = list(self.functions)
+        for position, key, child in self.relations:
+            # Une requête par relation pour toute la page, dans l'ordre du préchargement
+            _, _, (index,) = self.layout[position]
+            groups = {}
+            if rows:
+                map_child = child.bind()
+                columns = child.columns if key in child.columns else [*child.columns, key]
+                grouping = columns.index(key)
+                related = child.model._default_manager.filter(**{f'{key}__in': {row[index] for row in rows}})
+                for values in related.values_list(*columns):
+                    groups.setdefault(values[grouping], []).append(map_child(values))
+            functions[position] = lambda pk, groups=groups: groups.get(pk, [])
+        map_row = self.bind(functions)
+        return [map_row(row) for row in rows]
+
+
+class RowMapperListMixin:
+    """
+    Opt-in fast read path for list views: the filtered (and paginated) queryset is read
+    with .values_list() and turned into the serializer's output by a RowMapper.
+    """
+    use_row_mapper = True
+
+    def list(self, request, *args, **kwargs):
+        if not self.use_row_mapper:
+            return super().list(request, *args, **kwargs)
+        mapper = RowMapper(self.get_serializer())
+        rows = mapper.values(self.filter_queryset(self.get_queryset()))
+        page = self.paginate_queryset(rows)
+        if page is not None:
+            return self.get_paginated_response(mapper.map(page))
+        return Response(mapper.map(rows))
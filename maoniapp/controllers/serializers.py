@@ -1,4 +1,6 @@
 from rest_framework import serializers
+from django.db import models
+from django.db.models import Prefetch
 from django.contrib.auth import authenticate
 
 from ..models.language import Language, Translation
@@ -10,7 +12,158 @@ from ..models.business import Business, Code
 from ..models.category import Category
 from ..models.review import Review
 from ..models.comment import Comment
-import pycountry
+from .loaders import ReviewStatsLoader
+from ..categorytree import category_tree
+from ..translations import country_name
+
+
+# Paramètres de la requête lus par les sérialiseurs (langue, champs demandés)
+QUERY_PARAMS = ('lang', 'fields', 'expand')
+
+def serializer_context(request):
+    # Contexte des sérialiseurs appelés par les APIView, qui ne passent pas la requête
+    return {name: request.GET.get(name) for name in QUERY_PARAMS}
+
+def query_param(context, name):
+    if name in context:
+        return context[name]
+    request = context.get('request')
+    return request.GET.get(name) if request is not None else None
+
+def requested_language(context):
+    return query_param(context, 'lang')
+
+def _paths(value):
+    # "id,business.name" -> [('id',), ('business', 'name')] ; None si le paramètre est absent
+    if value is None:
+        return None
+    return [tuple(part.split('.')) for part in (item.strip() for item in value.split(',')) if part]
+
+
+class SparseFieldsMixin:
+    """
+    Champs demandés par le client :
+    - ?fields=id,title,business.name : seulement ces champs, "x.y" restreint l'objet imbriqué x ;
+    - ?expand=business : les objets imbriqués à inclure. Sans ?fields, tous les champs simples
+      sont gardés et les objets imbriqués non demandés sont omis.
+    Sans ces paramètres, la réponse est inchangée. Les champs retirés ne sont jamais calculés et
+    preload() ne charge que leurs colonnes (.only()) et leurs relations.
+
+    field_sources : champs du modèle (ou Prefetch) lus par les champs de méthode.
+    """
+    field_sources = {}
+
+    def _path(self):
+        names, node = [], self
+        while node.parent is not None:
+            if node.field_name:
+                names.append(node.field_name)
+            node = node.parent
+        return tuple(reversed(names))
+
+    def get_fields(self):
+        fields = super().get_fields()
+        requested, expanded = _paths(query_param(self.context, 'fields')), _paths(query_param(self.context, 'expand'))
+        # Les écritures (data=) gardent tous leurs champs
+        if (requested is None and expanded is None) or hasattr(self.root, 'initial_data'):
+            return fields
+        path = self._path()
+        depth = len(path)
+        requested_here = [item[depth:] for item in requested or () if item[:depth] == path]
+        expanded_here = {item[depth] for item in expanded or () if item[:depth] == path and len(item) > depth}
+        # Noms inconnus à ce niveau : erreur 400 plutôt qu'un champ silencieusement absent
+        for param, names in (('fields', {item[0] for item in requested_here if item}), ('expand', expanded_here)):
+            unknown = sorted(name for name in names if name not in fields or fields[name].write_only)
+            if unknown:
+                raise serializers.ValidationError(
+                    {param: [f"Unknown field: {'.'.join(path + (name,))}" for name in unknown]}
+                )
+        if () in requested_here:
+            return fields  # Objet imbriqué demandé en entier
+        if requested_here:
+            keep = {item[0] for item in requested_here} | expanded_here
+        else:
+            keep = {name for name, field in fields.items() if not isinstance(field, serializers.BaseSerializer)}
+            keep |= expanded_here
+        return {name: field for name, field in fields.items() if name in keep or field.write_only}
+
+    def load_plan(self, prefix=''):
+        """
+        (colonnes, relations à joindre, préchargements) lus par les champs gardés, chemins
+        préfixés par `prefix` ; colonnes None quand un champ peut lire n'importe quelle colonne.
+        """
+        opts = self.Meta.model._meta
+        concrete = {field.name for field in opts.concrete_fields} | {field.attname for field in opts.concrete_fields}
+        columns, related, prefetches = {prefix + opts.pk.name}, [], []
+        for name, field in self.fields.items():
+            if field.write_only:
+                continue
+            if isinstance(field, serializers.ListSerializer):
+                # Relation multiple : préchargée, avec les relations de ses propres champs
+                prefetches.append(prefix + field.source)
+                if isinstance(field.child, SparseFieldsMixin):
+                    _, child_related, child_prefetches = field.child.load_plan(prefix + field.source + '__')
+                    prefetches += child_related + child_prefetches
+                continue
+            if isinstance(field, SparseFieldsMixin):
+                related.append(prefix + field.source)
+                child_columns, child_related, child_prefetches = field.load_plan(prefix + field.source + '__')
+                related += child_related
+                prefetches += child_prefetches
+                if columns is not None:
+                    columns.add(prefix + field.source)
+                    columns = None if child_columns is None else columns | child_columns
+                continue
+            sources = self.field_sources.get(name)
+            if sources is None:
+                sources = () if field.source == '*' else (field.source.replace('.', '__'),)
+                if field.source == '*' or field.source.split('.')[0] not in concrete:
+                    columns = None  # Champ calculé sans sources déclarées
+            for source in sources:
+                if isinstance(source, Prefetch):
+                    prefetches.append(Prefetch(prefix + source.prefetch_through, queryset=source.queryset))
+                    continue
+                if '__' in source:
+                    relation = source.rsplit('__', 1)[0]
+                    related.append(prefix + relation)
+                    if columns is not None:
+                        columns.add(prefix + relation)
+                if columns is not None:
+                    columns.add(prefix + source)
+        return columns, related, prefetches
+
+    @classmethod
+    def preload(cls, queryset, context=None):
+        """`queryset` chargeant ce que lisent les champs demandés (voir load_plan)."""
+        context = context or {}
+        serializer = cls(context=context)
+        columns, related, prefetches = serializer.load_plan()
+        if related:
+            queryset = queryset.select_related(*related)
+        if prefetches:
+            # Une seule fois chaque relation (plusieurs champs peuvent lire la même)
+            unique = {getattr(prefetch, 'prefetch_to', prefetch): prefetch for prefetch in prefetches}
+            queryset = queryset.prefetch_related(*unique.values())
+        sparse = query_param(context, 'fields') is not None or query_param(context, 'expand') is not None
+        if sparse and columns is not None:
+            queryset = queryset.only(*columns)
+        return queryset
+
+
+class BusinessListSerializer(serializers.ListSerializer):
+    # Précharge les statistiques d'avis de toute la page avant de sérialiser chaque entreprise
+    def to_representation(self, data):
+        businesses = list(data.all() if isinstance(data, models.manager.BaseManager) else data)
+        ReviewStatsLoader.for_context(self.context).prime(business.pk for business in businesses)
+        return super().to_representation(businesses)
+
+class ReviewListSerializer(serializers.ListSerializer):
+    # Précharge les statistiques des entreprises imbriquées de toute la page
+    def to_representation(self, data):
+        reviews = list(data.all() if isinstance(data, models.manager.BaseManager) else data)
+        if 'business' in self.child.fields:
+            ReviewStatsLoader.for_context(self.context).prime(review.business_id for review in reviews)
+        return super().to_representation(reviews)
 
 # Category Serializer
 class CategorySerializer(serializers.ModelSerializer):
@@ -21,10 +174,27 @@ class CategorySerializer(serializers.ModelSerializer):
         fields = ['id', 'name', 'description', 'parent', 'subcategories']
         read_only_fields = ['id']
     def get_subcategories(self, obj):
-        # Recursively display all subcategories
-        if obj.subcategories.exists():
-            return CategorySerializer(obj.subcategories.all(), many=True).data
-        return []
+        # All subcategories, recursively, from the in-memory category tree
+        return category_tree.subcategories(obj.id)
+
+    def validate_parent(self, parent):
+        # Moving a category under its own subtree would create a cycle
+        if parent and self.instance and self.instance.path and parent.path.startswith(self.instance.path):
+            raise serializers.ValidationError("A category cannot be moved under itself or one of its subcategories.")
+        return parent
+
+class CategoryTreeField(serializers.Field):
+    """
+    Catégorie imbriquée (même forme que CategorySerializer) lue dans l'arbre en mémoire
+    à partir de category_id : aucune requête par objet sérialisé.
+    """
+    def __init__(self, **kwargs):
+        kwargs['source'] = 'category_id'
+        kwargs['read_only'] = True
+        super().__init__(**kwargs)
+
+    def to_representation(self, value):
+        return category_tree.node(value)
 
 class CategoryNameSerializer(serializers.ModelSerializer):
     class Meta:
@@ -33,9 +203,9 @@ class CategoryNameSerializer(serializers.ModelSerializer):
         read_only_fields = ['id']
 
 #Display name and id Business
-class BusinessDisplaysSerializer(serializers.ModelSerializer):
+class BusinessDisplaysSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     countrynamecode = serializers.SerializerMethodField()
-    category = CategorySerializer(read_only=True)  # Nested Category Display
+    category = CategoryTreeField()  # Nested Category Display
     active_codes = serializers.SerializerMethodField()
     inactive_codes = serializers.SerializerMethodField()
     logo = serializers.ImageField(required=False)
@@ -44,6 +214,7 @@ class BusinessDisplaysSerializer(serializers.ModelSerializer):
     class Meta:
         model = Business
         fields = ['id', 'name', 'city', 'country', 'total_evaluation', 'countrynamecode', 'logo', 'phone', 'description','showeval', 'showreview', 'btype', 'email', 'category', 'active', 'active_codes', 'inactive_codes']
+        list_serializer_class = BusinessListSerializer
         ordering = ('-created_at',)
         read_only_fields = ['id']
         extra_kwargs = {
@@ -52,25 +223,28 @@ class BusinessDisplaysSerializer(serializers.ModelSerializer):
             'name': {'required': False, 'allow_null': True},
         }
         
+    # Codes de chaque entreprise en une requête pour toute la liste
+    codes_prefetch = Prefetch('businesscodes', queryset=Code.objects.only('business_id', 'invitation_code', 'is_active'))
+    field_sources = {
+        'total_evaluation': ('review_count', 'evaluation_avg'),
+        'countrynamecode': ('country',),
+        'active_codes': (codes_prefetch,),
+        'inactive_codes': (codes_prefetch,),
+    }
+
     def get_active_codes(self, obj):
-        # Récupérer les codes actifs
-        active_codes = Code.objects.filter(business=obj, is_active=True).values('invitation_code')
-        return [code['invitation_code'] for code in active_codes]
+        # Récupérer les codes actifs, préchargés par preload() dans les listes
+        return [code.invitation_code for code in obj.businesscodes.all() if code.is_active]
 
     def get_inactive_codes(self, obj):
         # Récupérer les codes non actifs
-        inactive_codes = Code.objects.filter(business=obj, is_active=False).values('invitation_code')
-        return [code['invitation_code'] for code in inactive_codes]
+        return [code.invitation_code for code in obj.businesscodes.all() if not code.is_active]
     
     def get_countrynamecode(self, obj):
-        # Utilisation de pycountry pour obtenir le nom du pays à partir du code
-        try:
-            country = pycountry.countries.get(alpha_2=obj.country)
-            return country.name if country else None
-        except KeyError:
-            return None
+        # Table des pays précalculée ; nom traduit si le client passe ?lang=
+        return country_name(obj.country, requested_language(self.context))
     def get_total_evaluation(self, obj):
-        return obj.get_reviews_info()['total_evaluation']
+        return ReviewStatsLoader.for_context(self.context).get(obj)['total_evaluation']
 
     def update(self, instance, validated_data):
         # Si un fichier est présent, vous devrez peut-être le gérer ici
@@ -95,7 +269,7 @@ class BusinessBrandDisplaySerializer(serializers.ModelSerializer):
         model= Business
         fields = ['id', 'name', 'logo', 'website']
 
-class UserDisplaySerializer(serializers.ModelSerializer):
+class UserDisplaySerializer(SparseFieldsMixin, serializers.ModelSerializer):
     businesses = BusinessDisplaysSerializer(many=True)
     class Meta:
         model = User
@@ -116,12 +290,12 @@ class UserBusinessSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError("L'utilisateur est déjà associé à cette entreprise.")
         return data         
 
-class BusinessSerializer(serializers.ModelSerializer):
+class BusinessSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     total_reviews = serializers.SerializerMethodField()
     total_evaluation = serializers.SerializerMethodField()
     has_reviews = serializers.SerializerMethodField()
     countrynamecode = serializers.SerializerMethodField()
-    category = CategorySerializer(read_only=True)  # Nested Category Display
+    category = CategoryTreeField()  # Nested Category Display
     category_name = serializers.CharField(source='category.name', read_only=True)
     category_id = serializers.PrimaryKeyRelatedField(
         queryset=Category.objects.all(), source='category', write_only=True)
@@ -135,26 +309,31 @@ class BusinessSerializer(serializers.ModelSerializer):
             'total_evaluation', 'has_reviews'
         ]
         read_only_fields = ['id', 'created_at', 'updated_at']
+        list_serializer_class = BusinessListSerializer
         extra_kwargs = {
             'category': {'required': False, 'allow_null': True},
             'countrynamecode': {'required': False, 'allow_null': True},
         }
 
+    field_sources = {
+        'total_reviews': ('review_count', 'evaluation_avg'),
+        'total_evaluation': ('review_count', 'evaluation_avg'),
+        'has_reviews': ('review_count', 'evaluation_avg'),
+        'countrynamecode': ('country',),
+    }
+
     def get_total_reviews(self, obj):
-        return obj.get_reviews_info()['total_reviews']
+        return ReviewStatsLoader.for_context(self.context).get(obj)['total_reviews']
 
     def get_total_evaluation(self, obj):
-        return obj.get_reviews_info()['total_evaluation']
+        return ReviewStatsLoader.for_context(self.context).get(obj)['total_evaluation']
 
     def get_has_reviews(self, obj):
-        return obj.get_reviews_info()['has_reviews']
+        return ReviewStatsLoader.for_context(self.context).get(obj)['has_reviews']
 
     def get_countrynamecode(self, obj):
-        try:
-            country = pycountry.countries.get(alpha_2=obj.country)
-            return country.name if country else None
-        except KeyError:
-            return None
+        # Table des pays précalculée ; nom traduit si le client passe ?lang=
+        return country_name(obj.country, requested_language(self.context))
 
     def create(self, validated_data):
         # Create a new Business instance with the validated data
@@ -174,11 +353,11 @@ class CommentSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'created_at', 'updated_at']
          
 # Review Serializer
-class ReviewSerializer(serializers.ModelSerializer):
+class ReviewSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     business = BusinessSerializer(read_only=True)  # Nested Business Display
     business_id = serializers.PrimaryKeyRelatedField(
-        queryset=Business.objects.all(), source='business', write_only=True
-    )
+        queryset=Business.objects.all(), source='business', write_only=True, required=False
+    )  # Optional on create: the invitation code decides the business
     comments = CommentSerializer(many=True, read_only=True)
     class Meta:
         model = Review
@@ -187,6 +366,7 @@ class ReviewSerializer(serializers.ModelSerializer):
             'sentiment', 'authorname', 'contact', 'active', 'authorcountry', 'latitude', 'longitude', 'updated_at', 'created_at'
         ]
         read_only_fields = ['id', 'created_at', 'updated_at']
+        list_serializer_class = ReviewListSerializer
     
     def update(self, instance, validated_data):
         instance.active = validated_data.get('active', instance.active)
@@ -2,9 +2,11 @@ from rest_framework import viewsets
 from ..models.slide import Slide
 from .serializers import SlideSerialiazer
 from ..permissions.permissions import IsSuperAdminOrReadOnly
+from .conditional import ConditionalGetMixin
 
-class SlideViewSet(viewsets.ModelViewSet):
+class SlideViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     queryset = Slide.objects.all()
     serializer_class = SlideSerialiazer
     permission_classes = [IsSuperAdminOrReadOnly]
+    conditional_models = (Slide,)
 
@@ -1,33 +1,45 @@
+from django.http import HttpResponse
+from django.utils.http import quote_etag
+from rest_framework.renderers import JSONRenderer
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
-from ..models.language import Language
-from .serializers import TranslationResponseSerializer
-from django.utils import timezone
 from rest_framework import permissions
+from .conditional import ConditionalGetMixin
+from ..translations import translation_cache
 
 
-class TranslationView(APIView):
+class TranslationView(ConditionalGetMixin, APIView):
+    """
+    Translation bundle of a language (?lang=), compiled into one JSON blob when the translations
+    change and served from memory. Its content hash is both the ETag and the "version" field:
+    a client holding the current bundle gets 304, and ?since=<version> returns only the keys
+    changed or removed since that version (the full bundle when it is no longer known).
+    """
     permission_classes = [permissions.AllowAny,]
+    renderer_classes = [JSONRenderer]
+
+    def get_validators(self, request):
+        bundle = translation_cache.bundle(request.GET.get('lang'))
+        if bundle is None:
+            return None, None
+        return quote_etag(bundle.version), bundle.last_updated
+
     def get(self, request):
         language_code = request.GET.get('lang')
 
         if not language_code:
             return Response({"error": "Language code ('lang') is required."}, status=status.HTTP_400_BAD_REQUEST)
 
-        try:
-            language = Language.objects.get(code=language_code)
-        except Language.DoesNotExist:
+        bundle = translation_cache.bundle(language_code)
+        if bundle is None:
             return Response({"error": "Language not found."}, status=status.HTTP_404_NOT_FOUND)
 
-        translations = language.translations.all()
-
-        # For the combined response (Example 5):
-        last_updated = timezone.now() # Or get the last updated time of the translations
-        serializer = TranslationResponseSerializer({
-            'language': language_code,
-            'last_updated': last_updated,
-            'translations': translations
-        })
+        since = request.GET.get('since')
+        if since:
+            delta = translation_cache.delta(bundle, since)
+            if delta is not None:
+                return Response(delta, status=status.HTTP_200_OK)
 
-        return Response(serializer.data, status=status.HTTP_200_OK)
\ No newline at end of file
+        # Precompiled blob, sent as is
+        return HttpResponse(bundle.content, content_type='application/json')
@@ -0,0 +1,257 @@
+# Généré par `python manage.py generate_country_table` à partir de pycountry 24.6.1.
+# Ne pas modifier à la main.
+#
+# Code alpha-2 -> (nom anglais, clé de la table Translation pour le nom localisé).
+# Remplace les appels à pycountry dans les requêtes : pas de base JSON à charger.
+
+COUNTRIES = {
+    'AD': ('Andorra', 'Andorra'),
+    'AE': ('United Arab Emirates', 'United_Arab_Emirates'),
+    'AF': ('Afghanistan', 'Afghanistan'),
+    'AG': ('Antigua and Barbuda', 'Antigua_and_Barbuda'),
+    'AI': ('Anguilla', 'Anguilla'),
+    'AL': ('Albania', 'Albania'),
+    'AM': ('Armenia', 'Armenia'),
+    'AO': ('Angola', 'Angola'),
+    'AQ': ('Antarctica', 'Antarctica'),
+    'AR': ('Argentina', 'Argentina'),
+    'AS': ('American Samoa', 'American_Samoa'),
+    'AT': ('Austria', 'Austria'),
+    'AU': ('Australia', 'Australia'),
+    'AW': ('Aruba', 'Aruba'),
+    'AX': ('Åland Islands', 'Åland_Islands'),
+    'AZ': ('Azerbaijan', 'Azerbaijan'),
+    'BA': ('Bosnia and Herzegovina', 'Bosnia_and_Herzegovina'),
+    'BB': ('Barbados', 'Barbados'),
+    'BD': ('Bangladesh', 'Bangladesh'),
+    'BE': ('Belgium', 'Belgium'),
+    'BF': ('Burkina Faso', 'Burkina_Faso'),
+    'BG': ('Bulgaria', 'Bulgaria'),
+    'BH': ('Bahrain', 'Bahrain'),
+    'BI': ('Burundi', 'Burundi'),
+    'BJ': ('Benin', 'Benin'),
+    'BL': ('Saint Barthélemy', 'Saint_Barthélemy'),
+    'BM': ('Bermuda', 'Bermuda'),
+    'BN': ('Brunei Darussalam', 'Brunei_Darussalam'),
+    'BO': ('Bolivia, Plurinational State of', 'Bolivia'),
+    'BQ': ('Bonaire, Sint Eustatius and Saba', 'Bonaire,_Sint_Eustatius_and_Saba'),
+    'BR': ('Brazil', 'Brazil'),
+    'BS': ('Bahamas', 'Bahamas'),
+    'BT': ('Bhutan', 'Bhutan'),
+    'BV': ('Bouvet Island', 'Bouvet_Island'),
+    'BW': ('Botswana', 'Botswana'),
+    'BY': ('Belarus', 'Belarus'),
+    'BZ': ('Belize', 'Belize'),
+    'CA': ('Canada', 'Canada'),
+    'CC': ('Cocos (Keeling) Islands', 'Cocos_(Keeling)_Islands'),
+    'CD': ('Congo, The Democratic Republic of the', 'Congo,_The_Democratic_Republic_of_the'),
+    'CF': ('Central African Republic', 'Central_African_Republic'),
+    'CG': ('Congo', 'Congo'),
+    'CH': ('Switzerland', 'Switzerland'),
+    'CI': ("Côte d'Ivoire", 'Ivory_Coast'),
+    'CK': ('Cook Islands', 'Cook_Islands'),
+    'CL': ('Chile', 'Chile'),
+    'CM': ('Cameroon', 'Cameroon'),
+    'CN': ('China', 'China'),
+    'CO': ('Colombia', 'Colombia'),
+    'CR': ('Costa Rica', 'Costa_Rica'),
+    'CU': ('Cuba', 'Cuba'),
+    'CV': ('Cabo Verde', 'Cabo_Verde'),
+    'CW': ('Curaçao', 'Curaçao'),
+    'CX': ('Christmas Island', 'Christmas_Island'),
+    'CY': ('Cyprus', 'Cyprus'),
+    'CZ': ('Czechia', 'Czechia'),
+    'DE': ('Germany', 'Germany'),
+    'DJ': ('Djibouti', 'Djibouti'),
+    'DK': ('Denmark', 'Denmark'),
+    'DM': ('Dominica', 'Dominica'),
+    'DO': ('Dominican Republic', 'Dominican_Republic'),
+    'DZ': ('Algeria', 'Algeria'),
+    'EC': ('Ecuador', 'Ecuador'),
+    'EE': ('Estonia', 'Estonia'),
+    'EG': ('Egypt', 'Egypt'),
+    'EH': ('Western Sahara', 'Western_Sahara'),
+    'ER': ('Eritrea', 'Eritrea'),
+    'ES': ('Spain', 'Spain'),
+    'ET': ('Ethiopia', 'Ethiopia'),
+    'FI': ('Finland', 'Finland'),
+    'FJ': ('Fiji', 'Fiji'),
+    'FK': ('Falkland Islands (Malvinas)', 'Falkland_Islands_(Malvinas)'),
+    'FM': ('Micronesia, Federated States of', 'Micronesia,_Federated_States_of'),
+    'FO': ('Faroe Islands', 'Faroe_Islands'),
+    'FR': ('France', 'France'),
+    'GA': ('Gabon', 'Gabon'),
+    'GB': ('United Kingdom', 'United_Kingdom'),
+    'GD': ('Grenada', 'Grenada'),
+    'GE': ('Georgia', 'Georgia'),
+    'GF': ('French Guiana', 'French_Guiana'),
+    'GG': ('Guernsey', 'Guernsey'),
+    'GH': ('Ghana', 'Ghana'),
+    'GI': ('Gibraltar', 'Gibraltar'),
+    'GL': ('Greenland', 'Greenland'),
+    'GM': ('Gambia', 'Gambia'),
+    'GN': ('Guinea', 'Guinea'),
+    'GP': ('Guadeloupe', 'Guadeloupe'),
+    'GQ': ('Equatorial Guinea', 'Equatorial_Guinea'),
+    'GR': ('Greece', 'Greece'),
+    'GS': ('South Georgia and the South Sandwich Islands', 'South_Georgia_and_the_South_Sandwich_Islands'),
+    'GT': ('Guatemala', 'Guatemala'),
+    'GU': ('Guam', 'Guam'),
+    'GW': ('Guinea-Bissau', 'Guinea_Bissau'),
+    'GY': ('Guyana', 'Guyana'),
+    'HK': ('Hong Kong', 'Hong_Kong'),
+    'HM': ('Heard Island and McDonald Islands', 'Heard_Island_and_McDonald_Islands'),
+    'HN': ('Honduras', 'Honduras'),
+    'HR': ('Croatia', 'Croatia'),
+    'HT': ('Haiti', 'Haiti'),
+    'HU': ('Hungary', 'Hungary'),
+    'ID': ('Indonesia', 'Indonesia'),
+    'IE': ('Ireland', 'Ireland'),
+    'IL': ('Israel', 'Israel'),
+    'IM': ('Isle of Man', 'Isle_of_Man'),
+    'IN': ('India', 'India'),
+    'IO': ('British Indian Ocean Territory', 'British_Indian_Ocean_Territory'),
+    'IQ': ('Iraq', 'Iraq'),
+    'IR': ('Iran, Islamic Republic of', 'Iran'),
+    'IS': ('Iceland', 'Iceland'),
+    'IT': ('Italy', 'Italy'),
+    'JE': ('Jersey', 'Jersey'),
+    'JM': ('Jamaica', 'Jamaica'),
+    'JO': ('Jordan', 'Jordan'),
+    'JP': ('Japan', 'Japan'),
+    'KE': ('Kenya', 'Kenya'),
+    'KG': ('Kyrgyzstan', 'Kyrgyzstan'),
+    'KH': ('Cambodia', 'Cambodia'),
+    'KI': ('Kiribati', 'Kiribati'),
+    'KM': ('Comoros', 'Comoros'),
+    'KN': ('Saint Kitts and Nevis', 'Saint_Kitts_and_Nevis'),
+    'KP': ("Korea, Democratic People's Republic of", 'North_Korea'),
+    'KR': ('Korea, Republic of', 'South_Korea'),
+    'KW': ('Kuwait', 'Kuwait'),
+    'KY': ('Cayman Islands', 'Cayman_Islands'),
+    'KZ': ('Kazakhstan', 'Kazakhstan'),
+    'LA': ("Lao People's Democratic Republic", 'Laos'),
+    'LB': ('Lebanon', 'Lebanon'),
+    'LC': ('Saint Lucia', 'Saint_Lucia'),
+    'LI': ('Liechtenstein', 'Liechtenstein'),
+    'LK': ('Sri Lanka', 'Sri_Lanka'),
+    'LR': ('Liberia', 'Liberia'),
+    'LS': ('Lesotho', 'Lesotho'),
+    'LT': ('Lithuania', 'Lithuania'),
+    'LU': ('Luxembourg', 'Luxembourg'),
+    'LV': ('Latvia', 'Latvia'),
+    'LY': ('Libya', 'Libya'),
+    'MA': ('Morocco', 'Morocco'),
+    'MC': ('Monaco', 'Monaco'),
+    'MD': ('Moldova, Republic of', 'Moldova'),
+    'ME': ('Montenegro', 'Montenegro'),
+    'MF': ('Saint Martin (French part)', 'Saint_Martin_(French_part)'),
+    'MG': ('Madagascar', 'Madagascar'),
+    'MH': ('Marshall Islands', 'Marshall_Islands'),
+    'MK': ('North Macedonia', 'North_Macedonia'),
+    'ML': ('Mali', 'Mali'),
+    'MM': ('Myanmar', 'Myanmar'),
+    'MN': ('Mongolia', 'Mongolia'),
+    'MO': ('Macao', 'Macao'),
+    'MP': ('Northern Mariana Islands', 'Northern_Mariana_Islands'),
+    'MQ': ('Martinique', 'Martinique'),
+    'MR': ('Mauritania', 'Mauritania'),
+    'MS': ('Montserrat', 'Montserrat'),
+    'MT': ('Malta', 'Malta'),
+    'MU': ('Mauritius', 'Mauritius'),
+    'MV': ('Maldives', 'Maldives'),
+    'MW': ('Malawi', 'Malawi'),
+    'MX': ('Mexico', 'Mexico'),
+    'MY': ('Malaysia', 'Malaysia'),
+    'MZ': ('Mozambique', 'Mozambique'),
+    'NA': ('Namibia', 'Namibia'),
+    'NC': ('New Caledonia', 'New_Caledonia'),
+    'NE': ('Niger', 'Niger'),
+    'NF': ('Norfolk Island', 'Norfolk_Island'),
+    'NG': ('Nigeria', 'Nigeria'),
+    'NI': ('Nicaragua', 'Nicaragua'),
+    'NL': ('Netherlands', 'Netherlands'),
+    'NO': ('Norway', 'Norway'),
+    'NP': ('Nepal', 'Nepal'),
+    'NR': ('Nauru', 'Nauru'),
+    'NU': ('Niue', 'Niue'),
+    'NZ': ('New Zealand', 'New_Zealand'),
+    'OM': ('Oman', 'Oman'),
+    'PA': ('Panama', 'Panama'),
+    'PE': ('Peru', 'Peru'),
+    'PF': ('French Polynesia', 'French_Polynesia'),
+    'PG': ('Papua New Guinea', 'Papua_New_Guinea'),
+    'PH': ('Philippines', 'Philippines'),
+    'PK': ('Pakistan', 'Pakistan'),
+    'PL': ('Poland', 'Poland'),
+    'PM': ('Saint Pierre and Miquelon', 'Saint_Pierre_and_Miquelon'),
+    'PN': ('Pitcairn', 'Pitcairn'),
+    'PR': ('Puerto Rico', 'Puerto_Rico'),
+    'PS': ('Palestine, State of', 'Palestine,_State_of'),
+    'PT': ('Portugal', 'Portugal'),
+    'PW': ('Palau', 'Palau'),
+    'PY': ('Paraguay', 'Paraguay'),
+    'QA': ('Qatar', 'Qatar'),
+    'RE': ('Réunion', 'Réunion'),
+    'RO': ('Romania', 'Romania'),
+    'RS': ('Serbia', 'Serbia'),
+    'RU': ('Russian Federation', 'Russian_Federation'),
+    'RW': ('Rwanda', 'Rwanda'),
+    'SA': ('Saudi Arabia', 'Saudi_Arabia'),
+    'SB': ('Solomon Islands', 'Solomon_Islands'),
+    'SC': ('Seychelles', 'Seychelles'),
+    'SD': ('Sudan', 'Sudan'),
+    'SE': ('Sweden', 'Sweden'),
+    'SG': ('Singapore', 'Singapore'),
+    'SH': ('Saint Helena, Ascension and Tristan da Cunha', 'Saint_Helena,_Ascension_and_Tristan_da_Cunha'),
+    'SI': ('Slovenia', 'Slovenia'),
+    'SJ': ('Svalbard and Jan Mayen', 'Svalbard_and_Jan_Mayen'),
+    'SK': ('Slovakia', 'Slovakia'),
+    'SL': ('Sierra Leone', 'Sierra_Leone'),
+    'SM': ('San Marino', 'San_Marino'),
+    'SN': ('Senegal', 'Senegal'),
+    'SO': ('Somalia', 'Somalia'),
+    'SR': ('Suriname', 'Suriname'),
+    'SS': ('South Sudan', 'South_Sudan'),
+    'ST': ('Sao Tome and Principe', 'São_Tomé_and_Príncipe'),
+    'SV': ('El Salvador', 'El_Salvador'),
+    'SX': ('Sint Maarten (Dutch part)', 'Sint_Maarten_(Dutch_part)'),
+    'SY': ('Syrian Arab Republic', 'Syria'),
+    'SZ': ('Eswatini', 'Eswatini'),
+    'TC': ('Turks and Caicos Islands', 'Turks_and_Caicos_Islands'),
+    'TD': ('Chad', 'Chad'),
+    'TF': ('French Southern Territories', 'French_Southern_Territories'),
+    'TG': ('Togo', 'Togo'),
+    'TH': ('Thailand', 'Thailand'),
+    'TJ': ('Tajikistan', 'Tajikistan'),
+    'TK': ('Tokelau', 'Tokelau'),
+    'TL': ('Timor-Leste', 'Timor-Leste'),
+    'TM': ('Turkmenistan', 'Turkmenistan'),
+    'TN': ('Tunisia', 'Tunisia'),
+    'TO': ('Tonga', 'Tonga'),
+    'TR': ('Türkiye', 'Türkiye'),
+    'TT': ('Trinidad and Tobago', 'Trinidad_and_Tobago'),
+    'TV': ('Tuvalu', 'Tuvalu'),
+    'TW': ('Taiwan, Province of China', 'Taiwan'),
+    'TZ': ('Tanzania, United Republic of', 'Tanzania'),
+    'UA': ('Ukraine', 'Ukraine'),
+    'UG': ('Uganda', 'Uganda'),
+    'UM': ('United States Minor Outlying Islands', 'United_States_Minor_Outlying_Islands'),
+    'US': ('United States', 'United_States'),
+    'UY': ('Uruguay', 'Uruguay'),
+    'UZ': ('Uzbekistan', 'Uzbekistan'),
+    'VA': ('Holy See (Vatican City State)', 'Holy_See_(Vatican_City_State)'),
+    'VC': ('Saint Vincent and the Grenadines', 'Saint_Vincent_and_the_Grenadines'),
+    'VE': ('Venezuela, Bolivarian Republic of', 'Venezuela'),
+    'VG': ('Virgin Islands, British', 'Virgin_Islands,_British'),
+    'VI': ('Virgin Islands, U.S.', 'Virgin_Islands,_U.S.'),
+    'VN': ('Viet Nam', 'Vietnam'),
+    'VU': ('Vanuatu', 'Vanuatu'),
+    'WF': ('Wallis and Futuna', 'Wallis_and_Futuna'),
+    'WS': ('Samoa', 'Samoa'),
+    'YE': ('Yemen', 'Yemen'),
+    'YT': ('Mayotte', 'Mayotte'),
+    'ZA': ('South Africa', 'South_Africa'),
+    'ZM': ('Zambia', 'Zambia'),
+    'ZW': ('Zimbabwe', 'Zimbabwe'),
+}
@@ -0,0 +1,130 @@
+import math
+
+# Alphabet base32 des geohash : dans l'ordre ASCII, l'ordre des chaînes suit donc la courbe de Morton
+BASE32 = '0123456789bcdefghjkmnpqrstuvwxyz'
+# Précision stockée (~5 m) ; les requêtes travaillent sur des préfixes plus courts
+PRECISION = 9
+# Précision la plus fine des agrégats de carte (MapCell), ~38 m x 19 m
+MAP_PRECISION = 8
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE = math.pi * EARTH_RADIUS_KM / 180
+
+
+def encode(latitude, longitude, precision=PRECISION):
+    lat_range, lon_range = [-90.0, 90.0], [-180.0, 180.0]
+    chars, bits, value, even = [], 0, 0, True
+    while len(chars) < precision:
+        # Bits alternés : longitude puis latitude
+        interval, coordinate = (lon_range, longitude) if even else (lat_range, latitude)
+        middle = (interval[0] + interval[1]) / 2
+        value <<= 1
+        if coordinate >= middle:
+            value |= 1
+            interval[0] = middle
+        else:
+            interval[1] = middle
+        even = not even
+        bits += 1
+        if bits == 5:
+            chars.append(BASE32[value])
+            bits, value = 0, 0
+    return ''.join(chars)
+
+
+def cell_size(precision):
+    """(hauteur, largeur) en degrés d'une cellule de cette précision."""
+    lon_bits = (5 * precision + 1) // 2
+    lat_bits = 5 * precision // 2
+    return 180.0 / 2 ** lat_bits, 360.0 / 2 ** lon_bits
+
+
+def precision_for_zoom(zoom, cluster_pixels=64):
+    """
+    Précision geohash des groupes de points au niveau de zoom d'une carte web (tuiles de 256 px) :
+    la plus fine dont les cellules font au moins cluster_pixels de large.
+    """
+    target = 360.0 / 2 ** zoom * cluster_pixels / 256
+    for precision in range(MAP_PRECISION, 0, -1):
+        if cell_size(precision)[1] >= target:
+            return precision
+    return 1
+
+
+def distance_km(lat1, lon1, lat2, lon2):
+    # Formule de haversine
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    dphi, dlambda = phi2 - phi1, math.radians(lon2 - lon1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlambda / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(min(1.0, a)))
+
+
+def radius_bbox(latitude, longitude, radius_km):
+    """Boîte (min_lat, min_lon, max_lat, max_lon) contenant le cercle ; la longitude peut sortir de [-180, 180]."""
+    dlat = radius_km / KM_PER_DEGREE
+    cos_lat = math.cos(math.radians(latitude))
+    dlon = 360.0 if cos_lat < 1e-6 else min(360.0, radius_km / (KM_PER_DEGREE * cos_lat))
+    return max(-90.0, latitude - dlat), longitude - dlon, min(90.0, latitude + dlat), longitude + dlon
+
+
+def _split_antimeridian(min_lon, max_lon):
+    if max_lon - min_lon >= 360:
+        return [(-180.0, 180.0)]
+    if min_lon < -180:
+        return [(min_lon + 360, 180.0), (-180.0, max_lon)]
+    if max_lon > 180:
+        return [(min_lon, 180.0), (-180.0, max_lon - 360)]
+    return [(min_lon, max_lon)]
+
+
+def _successor(cell):
+    # Cellule suivante de même longueur dans l'ordre des chaînes (None après "zzz...")
+    digits = [BASE32.index(char) for char in cell]
+    for index in range(len(digits) - 1, -1, -1):
+        if digits[index] < 31:
+            digits[index] += 1
+            return ''.join(BASE32[digit] for digit in digits)
+        digits[index] = 0
+    return None
+
+
+def _count(low, high, size, lowest):
+    return int(math.floor((high - lowest) / size)) - int(math.floor((low - lowest) / size)) + 1
+
+
+def cell_count(min_lat, min_lon, max_lat, max_lon, precision):
+    """Nombre de cellules de cette précision que la boîte recoupe."""
+    height, width = cell_size(precision)
+    return sum(
+        _count(min_lat, max_lat, height, -90.0) * _count(low, high, width, -180.0)
+        for low, high in _split_antimeridian(min_lon, max_lon)
+    )
+
+
+def cell_ranges(min_lat, min_lon, max_lat, max_lon, max_cells=32, max_precision=PRECISION):
+    """
+    Plages [début, fin) de geohash couvrant la boîte : la précision la plus fine (au plus
+    max_precision) qui la couvre en au plus max_cells cellules, cellules contiguës fusionnées.
+    Chaque plage est une recherche d'intervalle sur l'index de la colonne geohash.
+    """
+    boxes = _split_antimeridian(min_lon, max_lon)
+    for precision in range(max_precision, 0, -1):
+        height, width = cell_size(precision)
+        if cell_count(min_lat, min_lon, max_lat, max_lon, precision) <= max_cells:
+            break
+    cells = set()
+    for low, high in boxes:
+        rows = range(int(math.floor((min_lat + 90) / height)), int(math.floor((max_lat + 90) / height)) + 1)
+        columns = range(int(math.floor((low + 180) / width)), int(math.floor((high + 180) / width)) + 1)
+        for row in rows:
+            latitude = min(89.999999, -90 + (row + 0.5) * height)
+            for column in columns:
+                longitude = min(179.999999, -180 + (column + 0.5) * width)
+                cells.add(encode(latitude, longitude, precision))
+    ranges = []
+    for cell in sorted(cells):
+        if ranges and ranges[-1][1] == cell:
+            ranges[-1][1] = _successor(cell)
+        else:
+            ranges.append([cell, _successor(cell)])
+    # "~" suit toutes les lettres base32 : borne supérieure de la dernière cellule
+    return [(start, end or '~') for start, end in ranges]
@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+from ...models.mapcell import MapCell
+from ...models.review import Review
+
+
+class Command(BaseCommand):
+    help = "Compute the geohash of reviews that have coordinates (only missing ones unless --all)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help="Number of reviews per UPDATE batch")
+        parser.add_argument('--all', action='store_true', help="Recompute every geohash, not only the missing ones")
+
+    def handle(self, *args, **options):
+        reviews = Review.objects.exclude(latitude=None).exclude(longitude=None)
+        if not options['all']:
+            reviews = reviews.filter(geohash=None)
+        batch, updated = [], 0
+        for review in reviews.only('id', 'latitude', 'longitude', 'geohash').iterator(chunk_size=options['batch_size']):
+            review.geohash = review.compute_geohash()
+            batch.append(review)
+            if len(batch) >= options['batch_size']:
+                updated += Review.objects.bulk_update(batch, ['geohash'])
+                batch = []
+        if batch:
+            updated += Review.objects.bulk_update(batch, ['geohash'])
+        self.stdout.write(self.style.SUCCESS(f"Updated the geohash of {updated} reviews"))
+        if updated:
+            # bulk_update ne passe pas par Review.save : recalculer les agrégats de carte
+            cells = MapCell.rebuild()
+            self.stdout.write(self.style.SUCCESS(f"Rebuilt {cells} map cells"))
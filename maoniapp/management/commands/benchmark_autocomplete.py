@@ -0,0 +1,68 @@
+import random
+import string
+import time
+import uuid
+
+from django.core.management.base import BaseCommand
+from ...autocomplete import Autocomplete
+
+WORDS = [
+    'pharmacie', 'clinique', 'hôpital', 'boulangerie', 'école', 'lycée', 'hôtel', 'restaurant', 'banque',
+    'garage', 'marché', 'église', 'centre', 'santé', 'saint', 'société', 'générale', 'national', 'express',
+    'douala', 'yaoundé', 'bafoussam', 'garoua', 'kribi', 'limbé', 'étoile', 'espoir', 'providence',
+    'du', 'de', 'la', 'les', 'des', 'grand', 'petit', 'nouvelle', 'royal', 'orange', 'mtn', 'camtel',
+]
+
+
+def typo(word, rng):
+    # Une faute de frappe : substitution, suppression, insertion ou inversion (hors première lettre)
+    if len(word) < 3:
+        return word
+    index = rng.randrange(1, len(word) - 1)
+    kind = rng.randrange(4)
+    if kind == 0:
+        return word[:index] + rng.choice(string.ascii_lowercase) + word[index + 1:]
+    if kind == 1:
+        return word[:index] + word[index + 1:]
+    if kind == 2:
+        return word[:index] + rng.choice(string.ascii_lowercase) + word[index:]
+    return word[:index] + word[index + 1] + word[index] + word[index + 2:]
+
+
+class Command(BaseCommand):
+    help = "Measure autocomplete latency on a synthetic in-memory index (no database access)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--businesses', type=int, default=100_000)
+        parser.add_argument('--queries', type=int, default=5000)
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        autocomplete = Autocomplete()
+        entries = []
+        for _ in range(options['businesses']):
+            name = ' '.join(rng.choice(WORDS) for _ in range(rng.randint(1, 4))).title()
+            name = f"{name} {rng.randint(1, 999)}" if rng.random() < 0.3 else name
+            entries.append(autocomplete.entry(uuid.uuid4(), name, 'Douala', 'CM', None, rng.randint(0, 500)))
+
+        started = time.perf_counter()
+        autocomplete.load(entries)
+        self.stdout.write(f"Built index of {len(entries)} businesses in {time.perf_counter() - started:.2f}s")
+
+        names = [entry['name'] for entry in rng.sample(entries, min(len(entries), options['queries']))]
+        for label, make_query in (
+            ('prefix', lambda name: name[:rng.randint(1, len(name))]),
+            ('typo', lambda name: typo(name.split(' ')[0].lower(), rng)[:rng.randint(3, 12)]),
+        ):
+            timings = []
+            for name in names:
+                query = make_query(name)
+                started = time.perf_counter()
+                autocomplete.suggest(query)
+                timings.append((time.perf_counter() - started) * 1000)
+            timings.sort()
+            percentile = lambda p: timings[min(len(timings) - 1, int(len(timings) * p))]
+            self.stdout.write(
+                f"{label:>6}: p50 {percentile(0.5):.3f} ms | p99 {percentile(0.99):.3f} ms | max {timings[-1]:.3f} ms"
+            )
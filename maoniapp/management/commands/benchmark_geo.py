@@ -0,0 +1,74 @@
+import random
+import sqlite3
+import time
+
+from django.core.management.base import BaseCommand
+from ... import geo
+
+# Points regroupés autour de quelques villes camerounaises, plus un fond uniforme sur le pays
+CITIES = [(4.05, 9.70), (3.87, 11.52), (5.48, 10.42), (9.30, 13.40), (2.94, 9.91), (4.02, 9.20)]
+COUNTRY_BOX = (2.0, 8.5, 13.0, 16.0)
+
+
+class Command(BaseCommand):
+    help = "Compare geohash cell lookups with a table scan on synthetic points (in-memory SQLite, no Django models)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--points', type=int, default=1_000_000)
+        parser.add_argument('--queries', type=int, default=200)
+        parser.add_argument('--radius-km', type=float, default=5)
+        parser.add_argument('--seed', type=int, default=0)
+
+    def point(self, rng):
+        if rng.random() < 0.8:
+            latitude, longitude = rng.choice(CITIES)
+            return latitude + rng.gauss(0, 0.4), longitude + rng.gauss(0, 0.4)
+        min_lat, min_lon, max_lat, max_lon = COUNTRY_BOX
+        return rng.uniform(min_lat, max_lat), rng.uniform(min_lon, max_lon)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        db = sqlite3.connect(':memory:')
+        db.execute("CREATE TABLE review (id INTEGER PRIMARY KEY, latitude REAL, longitude REAL, geohash TEXT)")
+        started = time.perf_counter()
+        rows = ((latitude, longitude, geo.encode(latitude, longitude))
+                for latitude, longitude in (self.point(rng) for _ in range(options['points'])))
+        db.executemany("INSERT INTO review (latitude, longitude, geohash) VALUES (?, ?, ?)", rows)
+        db.execute("CREATE INDEX review_geohash ON review (geohash)")
+        self.stdout.write(f"Loaded {options['points']} points in {time.perf_counter() - started:.1f}s")
+
+        radius = options['radius_km']
+        centres = [self.point(rng) for _ in range(options['queries'])]
+        for label, run in (('geohash cells', self.by_cells), ('table scan', self.by_scan)):
+            timings, found = [], 0
+            # Le parcours complet est lent : quelques requêtes suffisent
+            for latitude, longitude in centres if label == 'geohash cells' else centres[:10]:
+                started = time.perf_counter()
+                found += len(run(db, latitude, longitude, radius))
+                timings.append((time.perf_counter() - started) * 1000)
+            timings.sort()
+            self.stdout.write(
+                f"{label:>13}: {len(timings)} queries | mean {sum(timings) / len(timings):.2f} ms | "
+                f"p99 {timings[min(len(timings) - 1, int(len(timings) * 0.99))]:.2f} ms | "
+                f"{found / len(timings):.0f} results per query"
+            )
+
+    @staticmethod
+    def nearest(rows, latitude, longitude, radius):
+        hits = ((geo.distance_km(latitude, longitude, lat, lon), id_) for id_, lat, lon in rows)
+        return sorted(hit for hit in hits if hit[0] <= radius)
+
+    def by_cells(self, db, latitude, longitude, radius):
+        ranges = geo.cell_ranges(*geo.radius_bbox(latitude, longitude, radius))
+        where = ' OR '.join(['(geohash >= ? AND geohash < ?)'] * len(ranges))
+        params = [bound for cell_range in ranges for bound in cell_range]
+        rows = db.execute(f"SELECT id, latitude, longitude FROM review WHERE {where}", params)
+        return self.nearest(rows, latitude, longitude, radius)
+
+    def by_scan(self, db, latitude, longitude, radius):
+        min_lat, min_lon, max_lat, max_lon = geo.radius_bbox(latitude, longitude, radius)
+        rows = db.execute(
+            "SELECT id, latitude, longitude FROM review WHERE latitude BETWEEN ? AND ? AND longitude BETWEEN ? AND ?",
+            [min_lat, max_lat, min_lon, max_lon],
+        )
+        return self.nearest(rows, latitude, longitude, radius)
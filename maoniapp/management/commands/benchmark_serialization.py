@@ -0,0 +1,88 @@
+import json
+import random
+import time
+from unittest import mock
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from rest_framework.test import APIRequestFactory
+
+from ...controllers.businesscontroller import BusinessBrandListView, BusinessListView
+from ...controllers.categorycontroller import CategoryBusinessCountView
+from ...controllers.reviewcontroller import ReviewListCreateView
+from ...models.business import Business
+from ...models.category import Category
+from ...models.comment import Comment
+from ...models.review import Review
+
+ENDPOINTS = [
+    ('/businessesbrand/', BusinessBrandListView),
+    ('/category-business-count/', CategoryBusinessCountView),
+    ('/filter-businesses/?category=Bench 0&subtree=true', BusinessListView),
+    ('/reviews/', ReviewListCreateView),
+]
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare serializer and row mapper throughput (rows/s) on the public list endpoints, "
+        "on synthetic rows created in a transaction that is rolled back"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--businesses', type=int, default=2000)
+        parser.add_argument('--categories', type=int, default=20)
+        parser.add_argument('--repeat', type=int, default=20)
+        parser.add_argument('--seed', type=int, default=0)
+
+    def populate(self, rng, options):
+        # Enregistrements en masse : pas de signaux (codes, index), compteurs posés directement
+        root = Category.objects.create(name='Bench 0')
+        categories = [root] + [
+            Category.objects.create(name=f'Bench {index}', parent=root if index % 2 else None)
+            for index in range(1, options['categories'])
+        ]
+        businesses = Business.objects.bulk_create(
+            Business(
+                name=f'Business {index}', category=rng.choice(categories), country=rng.choice(['CM', 'GA', 'TD']),
+                city='Douala', website=f'https://business{index}.cm', description='Lorem ipsum ' * 5,
+                logo=f'businesslogo/{index}.png' if index % 3 else None, review_count=rng.randint(1, 50),
+                evaluation_avg=rng.uniform(1, 5),
+            )
+            for index in range(options['businesses'])
+        )
+        reviews = Review.objects.bulk_create(
+            Review(business=rng.choice(businesses), title='Bien', text='Bon accueil', evaluation=rng.randint(1, 5))
+            for _ in range(20)
+        )
+        Comment.objects.bulk_create(Comment(review=review, text='Merci') for review in reviews for _ in range(2))
+
+    def measure(self, view, url, fast, repeat):
+        handler = view.as_view()
+        factory = APIRequestFactory()
+        with mock.patch.object(view, 'use_row_mapper', fast):
+            # Premier appel : caches en mémoire (arbre des catégories, traductions) et nombre de lignes
+            data = json.loads(self.content(handler(factory.get(url, HTTP_HOST='localhost'))))
+            rows = len(data['results'] if isinstance(data, dict) else data)
+            started = time.perf_counter()
+            for _ in range(repeat):
+                self.content(handler(factory.get(url, HTTP_HOST='localhost')))
+            return rows * repeat / (time.perf_counter() - started)
+
+    @staticmethod
+    def content(response):
+        if response.streaming:
+            return b''.join(response.streaming_content)
+        return response.render().content
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        with transaction.atomic():
+            self.populate(rng, options)
+            for url, view in ENDPOINTS:
+                before = self.measure(view, url, False, options['repeat'])
+                after = self.measure(view, url, True, options['repeat'])
+                self.stdout.write(
+                    f"{url:>48}: serializer {before:>9,.0f} rows/s | row mapper {after:>9,.0f} rows/s | x{after / before:.1f}"
+                )
+            transaction.set_rollback(True)
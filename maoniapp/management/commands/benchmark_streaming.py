@@ -0,0 +1,93 @@
+import time
+import tracemalloc
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from ...controllers.businesscontroller import BusinessBrandListView, UserBusinessReviews
+from ...controllers.serializers import BusinessBrandDisplaySerializer, ReviewSerializer
+from ...models.business import Business
+from ...models.category import Category
+from ...models.comment import Comment
+from ...models.review import Review
+from ...models.user import User, UserBusiness
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare peak Python memory of fully rendered and streamed responses (businessesbrand/, "
+        "user/reviews/ NDJSON) for growing result sizes, on synthetic rows rolled back afterwards"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', default='1000,4000,16000', help="Comma-separated row counts")
+
+    def populate(self, count, category, user):
+        # Enregistrements en masse : pas de signaux (codes, index, compteurs)
+        businesses = Business.objects.bulk_create(
+            Business(name=f'Business {index}', category=category, logo=f'businesslogo/{index}.png',
+                     website=f'https://business{index}.cm')
+            for index in range(count)
+        )
+        UserBusiness.objects.bulk_create(UserBusiness(user=user, business=business) for business in businesses)
+        reviews = Review.objects.bulk_create(
+            Review(business=business, title='Bien', text='Bon accueil ' * 20, evaluation=4) for business in businesses
+        )
+        Comment.objects.bulk_create(Comment(review=review, user=user, text='Merci') for review in reviews)
+
+    @staticmethod
+    def peak(run):
+        # (pic de mémoire Python en Mo, octets produits, secondes)
+        tracemalloc.start()
+        started = time.perf_counter()
+        try:
+            size = run()
+            return tracemalloc.get_traced_memory()[1] / 2 ** 20, size, time.perf_counter() - started
+        finally:
+            tracemalloc.stop()
+
+    @staticmethod
+    def consume(response):
+        # Lit le flux comme le ferait le serveur, sans garder les morceaux
+        return sum(len(chunk) for chunk in response.streaming_content)
+
+    def handle(self, *args, **options):
+        factory = APIRequestFactory()
+        brand, user_reviews = BusinessBrandListView.as_view(), UserBusinessReviews.as_view()
+
+        def get(view, url, **headers):
+            request = factory.get(url, HTTP_HOST='localhost', **headers)
+            force_authenticate(request, user)
+            return view(request)
+
+        runs = [
+            ('businessesbrand/ rendered', lambda: len(JSONRenderer().render(
+                BusinessBrandDisplaySerializer(Business.objects.filter(active=True), many=True).data))),
+            ('businessesbrand/ JSON stream', lambda: self.consume(get(brand, '/businessesbrand/'))),
+            ('businessesbrand/ NDJSON stream', lambda: self.consume(get(brand, '/businessesbrand/?format=ndjson'))),
+            ('user/reviews/ rendered', lambda: len(JSONRenderer().render(ReviewSerializer(
+                ReviewSerializer.preload(Review.objects.filter(active=True), {}), many=True,
+                context={}).data))),
+            ('user/reviews/ NDJSON stream', lambda: self.consume(
+                get(user_reviews, '/user/reviews/', HTTP_ACCEPT='application/x-ndjson'))),
+        ]
+
+        with transaction.atomic():
+            category = Category.objects.create(name='Benchmark')
+            user = User.objects.create_user(email='benchmark@maoni.cm', password='benchmark', role='manager')
+            self.populate(1, category, user)
+            for _, run in runs:
+                run()  # Caches en mémoire (arbre des catégories, traductions)
+            created = 1
+            for size in [int(value) for value in options['sizes'].split(',')]:
+                self.populate(size - created, category, user)
+                created = size
+                for label, run in runs:
+                    megabytes, length, seconds = self.peak(run)
+                    self.stdout.write(
+                        f"{size:>7} rows | {label:>31}: peak {megabytes:8.1f} MB | "
+                        f"{length / 2 ** 20:7.1f} MB of JSON | {seconds:6.2f}s"
+                    )
+            transaction.set_rollback(True)
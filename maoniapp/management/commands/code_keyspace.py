@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+from ...models.code import Code, CodeSequence
+
+
+class Command(BaseCommand):
+    help = "Report how much of the invitation code space is used, and optionally extend it"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--extend', action='store_true', help="Switch to codes one character longer now")
+
+    def handle(self, *args, **options):
+        sequence, _ = CodeSequence.objects.get_or_create(pk=1)
+        if options['extend']:
+            sequence.extend()
+        self.stdout.write(f"Code length:     {sequence.length}")
+        self.stdout.write(f"Codes allocated: {sequence.next_value}")
+        self.stdout.write(f"Capacity:        {sequence.capacity}")
+        self.stdout.write(f"Usage:           {sequence.usage:.6%}")
+        self.stdout.write(f"Codes in table:  {Code.objects.count()}")
+        style = self.style.WARNING if sequence.usage >= CodeSequence.USAGE_WARNING else self.style.SUCCESS
+        self.stdout.write(style("Keyspace needs extending soon" if style == self.style.WARNING else "Keyspace OK"))
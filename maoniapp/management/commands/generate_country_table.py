@@ -0,0 +1,35 @@
+from pathlib import Path
+
+import pycountry
+from django.core.management.base import BaseCommand
+
+# Clés de Translation qui ne suivent pas le nom pycountry (espaces remplacés par "_")
+TRANSLATION_KEYS = {
+    'CI': 'Ivory_Coast',
+    'GW': 'Guinea_Bissau',
+    'ST': 'São_Tomé_and_Príncipe',
+}
+
+HEADER = '''# Généré par `python manage.py generate_country_table` à partir de pycountry {version}.
+# Ne pas modifier à la main.
+#
+# Code alpha-2 -> (nom anglais, clé de la table Translation pour le nom localisé).
+# Remplace les appels à pycountry dans les requêtes : pas de base JSON à charger.
+
+COUNTRIES = {{
+'''
+
+
+class Command(BaseCommand):
+    help = "Regenerate maoniapp/countries.py, the alpha-2 to country name table, from pycountry"
+
+    def handle(self, *args, **options):
+        lines = []
+        for country in sorted(pycountry.countries, key=lambda country: country.alpha_2):
+            name = getattr(country, 'common_name', None) or country.name
+            key = TRANSLATION_KEYS.get(country.alpha_2, name.replace(' ', '_'))
+            lines.append(f"    {country.alpha_2!r}: ({country.name!r}, {key!r}),\n")
+        version = getattr(pycountry, '__version__', '') or 'installed'
+        path = Path(__file__).resolve().parents[2] / 'countries.py'
+        path.write_text(HEADER.format(version=version) + ''.join(lines) + '}\n', encoding='utf-8')
+        self.stdout.write(self.style.SUCCESS(f"Wrote {len(lines)} countries to {path}"))
@@ -0,0 +1,107 @@
+import threading
+import time
+from collections import Counter
+from unittest import mock
+
+from django.core.cache import caches
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import override_settings
+from django.urls import resolve
+from django.utils.http import urlencode
+from rest_framework.test import APIRequestFactory
+
+from ...cache import TwoTierCache, shared_cache
+from ...categorytree import category_tree
+from ...controllers.coalescing import CoalescedGetMixin
+from ...models.business import Business
+
+MODES = [
+    ('before', {'single_flight': False, 'coalesce_requests': False}),
+    ('after', {'single_flight': True, 'coalesce_requests': True}),
+]
+
+
+class Command(BaseCommand):
+    help = (
+        "Send bursts of concurrent identical requests to the business page endpoints right after "
+        "their cache is emptied, and count the database queries they cause without and with "
+        "single-flight recomputation and request coalescing. Reads only: the caches used are in memory"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=500, help="Concurrent requests per burst")
+        parser.add_argument('--business', help="Business id (default: the active business with the most reviews)")
+
+    def urls(self, business):
+        page = urlencode({
+            'businesscategory': business.category.name, 'country': business.country or '',
+            'city': business.city or '', 'businessname': business.name or '',
+        })
+        return [
+            f'/businessdetails/?{page}',
+            f'/business/{business.pk}/related/',
+            f'/business/{business.pk}/',
+            f'/business-reviews-list/?{page}',
+        ]
+
+    def burst(self, url, count):
+        # (requêtes SQL, statuts, secondes) de `count` requêtes identiques lancées ensemble
+        factory = APIRequestFactory()
+        match = resolve(url.split('?')[0])
+        barrier = threading.Barrier(count)
+        lock = threading.Lock()
+        queries, statuses = [0], Counter()
+
+        def count_query(execute, sql, params, many, context):
+            with lock:
+                queries[0] += 1
+            return execute(sql, params, many, context)
+
+        def run():
+            request = factory.get(url, HTTP_HOST='localhost')
+            try:
+                barrier.wait()
+                with connection.execute_wrapper(count_query):
+                    response = match.func(request, *match.args, **match.kwargs)
+                    if hasattr(response, 'render'):
+                        response.render()
+                with lock:
+                    statuses[response.status_code] += 1
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=run) for _ in range(count)]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return queries[0], statuses, time.perf_counter() - started
+
+    def handle(self, *args, **options):
+        businesses = Business.objects.filter(active=True).select_related('category')
+        if options['business']:
+            businesses = businesses.filter(pk=options['business'])
+        business = businesses.order_by('-review_count').first()
+        if business is None:
+            raise CommandError("No active business to load test")
+
+        count = options['requests']
+        locmem = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'loadtest'}}
+        with override_settings(CACHES=locmem):
+            for url in self.urls(business):
+                # Requête de chauffe : versions des modèles, arbre des catégories, traductions
+                self.burst(url, 1)
+                for label, flags in MODES:
+                    # Cache vide, comme après une expiration ou l'écriture d'un avis
+                    caches['default'].clear()
+                    shared_cache.clear_local()
+                    category_tree.invalidate()
+                    with mock.patch.object(TwoTierCache, 'single_flight', flags['single_flight']), \
+                            mock.patch.object(CoalescedGetMixin, 'coalesce_requests', flags['coalesce_requests']):
+                        queries, statuses, seconds = self.burst(url, count)
+                    self.stdout.write(
+                        f"{url[:60]:>60} | {label:>6}: {queries:>6} queries ({queries / count:5.1f}/request) | "
+                        f"{seconds:6.2f}s | {dict(statuses)}"
+                    )
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+from ...models.mapcell import MapCell
+
+
+class Command(BaseCommand):
+    help = "Recompute the per-precision map rollups (MapCell) from the active located reviews"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help="Number of cells per INSERT batch")
+
+    def handle(self, *args, **options):
+        cells = MapCell.rebuild(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {cells} map cells"))
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand, CommandError
+from ...search import business_index, category_index, review_index
+
+
+class Command(BaseCommand):
+    help = "Rebuild the full-text search indexes (business and category names, review title and text)"
+
+    def handle(self, *args, **options):
+        if not business_index.available():
+            raise CommandError("The search indexes require SQLite FTS5.")
+        for label, index in (('businesses', business_index), ('categories', category_index), ('reviews', review_index)):
+            count = index.rebuild()
+            self.stdout.write(self.style.SUCCESS(f"Indexed {count} {label}"))
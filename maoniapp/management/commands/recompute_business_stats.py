@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+from ...models.business import Business
+
+
+class Command(BaseCommand):
+    help = "Recompute the stored review counters (count, evaluation sum and average) of every business"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500, help="Number of businesses per UPDATE batch")
+
+    def handle(self, *args, **options):
+        updated = Business.recompute_review_stats(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f"Recomputed review stats for {updated} businesses"))
@@ -0,0 +1,26 @@
+import time
+from django.core.management.base import BaseCommand
+from ...models.code import Code
+
+
+class Command(BaseCommand):
+    help = "Top up the invitation code pool of every active business that fell below the low-water mark"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--low-water', type=int, default=None,
+                            help="Replenish pools with fewer active codes (default: INVITATION_CODE_LOW_WATER)")
+        parser.add_argument('--target', type=int, default=None,
+                            help="Active codes per pool after replenishment (default: INVITATION_CODES_PER_BUSINESS)")
+        parser.add_argument('--chunk-size', type=int, default=1000, help="Businesses per allocation and INSERT batch")
+        parser.add_argument('--interval', type=int, default=0,
+                            help="Keep running and replenish every INTERVAL seconds (0: run once, e.g. from cron)")
+
+    def handle(self, *args, **options):
+        while True:
+            businesses, codes = Code.replenish_pools(
+                low_water=options['low_water'], target=options['target'], chunk_size=options['chunk_size'],
+            )
+            self.stdout.write(self.style.SUCCESS(f"Replenished {businesses} businesses with {codes} codes"))
+            if not options['interval']:
+                break
+            time.sleep(options['interval'])
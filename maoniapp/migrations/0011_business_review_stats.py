@@ -0,0 +1,53 @@
+# Generated by Django 5.1.4 on 2026-10-17 20:32
+
+from django.db import migrations, models
+from django.db.models import Count, Sum
+
+
+def backfill_review_stats(apps, schema_editor):
+    Business = apps.get_model('maoniapp', 'Business')
+    Review = apps.get_model('maoniapp', 'Review')
+    stats = (
+        Review.objects.filter(active=True, business__isnull=False)
+        .values('business')
+        .annotate(total=Count('id'), rated=Count('evaluation'), evaluation_sum=Sum('evaluation'))
+    )
+    for row in stats:
+        evaluation_sum = row['evaluation_sum'] or 0
+        Business.objects.filter(pk=row['business']).update(
+            review_count=row['total'],
+            evaluation_count=row['rated'],
+            evaluation_sum=evaluation_sum,
+            evaluation_avg=evaluation_sum / row['rated'] if row['rated'] else 0,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('maoniapp', '0010_alter_translation_key'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='business',
+            name='evaluation_avg',
+            field=models.FloatField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='business',
+            name='evaluation_count',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='business',
+            name='evaluation_sum',
+            field=models.FloatField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='business',
+            name='review_count',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(backfill_review_stats, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 5.1.4 on 2026-10-17 20:34
+
+from django.db import migrations, models
+
+
+def backfill_category_paths(apps, schema_editor):
+    Category = apps.get_model('maoniapp', 'Category')
+    children = {}
+    for category in Category.objects.only('id', 'parent_id'):
+        children.setdefault(category.parent_id, []).append(category)
+    # Parcours en largeur depuis les racines : le chemin du parent est toujours connu
+    level, parent_paths = children.get(None, []), {None: '/'}
+    while level:
+        next_level = []
+        for category in level:
+            category.path = f"{parent_paths[category.parent_id]}{category.id.hex}/"
+            category.depth = category.path.count('/') - 2
+            parent_paths[category.id] = category.path
+            next_level.extend(children.get(category.id, []))
+        Category.objects.bulk_update(level, ['path', 'depth'])
+        level = next_level
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('maoniapp', '0011_business_review_stats'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='category',
+            name='depth',
+            field=models.PositiveSmallIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='category',
+            name='path',
+            field=models.CharField(db_index=True, default='', editable=False, max_length=512),
+        ),
+        migrations.RunPython(backfill_category_paths, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.1.4 on 2026-10-17 20:36
+
+import secrets
+from django.db import migrations, models
+
+
+def create_code_sequence(apps, schema_editor):
+    CodeSequence = apps.get_model('maoniapp', 'CodeSequence')
+    CodeSequence.objects.get_or_create(pk=1, defaults={'key': secrets.token_hex()})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('maoniapp', '0012_category_path'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CodeSequence',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('length', models.PositiveSmallIntegerField(default=6)),
+                ('next_value', models.BigIntegerField(default=0)),
+                ('key', models.CharField(default=secrets.token_hex, max_length=64)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Invitation Code Sequence',
+            },
+        ),
+        migrations.RunPython(create_code_sequence, migrations.RunPython.noop),
+    ]
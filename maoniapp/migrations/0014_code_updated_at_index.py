@@ -0,0 +1,17 @@
+# Generated by Django 5.1.4 on 2026-10-17 20:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('maoniapp', '0013_codesequence'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='code',
+            index=models.Index(fields=['updated_at'], name='maoniapp_co_updated_32d7e7_idx'),
+        ),
+    ]
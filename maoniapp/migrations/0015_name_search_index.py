@@ -0,0 +1,48 @@
+# Generated by Django 5.1.4 on 2026-10-17 21:05
+
+from django.db import migrations
+
+# Schéma et contenu figés à la création de la migration (voir maoniapp/search.py)
+INDEXES = [
+    ('maoniapp_business_search', 'Business'),
+    ('maoniapp_category_search', 'Category'),
+]
+
+
+def create_search_indexes(apps, schema_editor):
+    # Tables FTS5 propres à SQLite ; ailleurs la recherche retombe sur name__icontains
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    with schema_editor.connection.cursor() as cursor:
+        for table, model_name in INDEXES:
+            cursor.execute(
+                f"CREATE VIRTUAL TABLE IF NOT EXISTS {table} USING fts5("
+                f"id UNINDEXED, name, tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3 4')"
+            )
+            model = apps.get_model('maoniapp', model_name)
+            rows = [
+                (pk.int >> 65, pk.hex, name)
+                for pk, name in model.objects.filter(active=True).exclude(name=None).exclude(name='').values_list('pk', 'name').iterator()
+            ]
+            cursor.execute(f"DELETE FROM {table}")
+            cursor.executemany(f"INSERT INTO {table} (rowid, id, name) VALUES (%s, %s, %s)", rows)
+            cursor.execute(f"INSERT INTO {table} ({table}) VALUES ('optimize')")
+
+
+def drop_search_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    with schema_editor.connection.cursor() as cursor:
+        for table, _ in INDEXES:
+            cursor.execute(f"DROP TABLE IF EXISTS {table}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('maoniapp', '0014_code_updated_at_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_indexes, drop_search_indexes),
+    ]
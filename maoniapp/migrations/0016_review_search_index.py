@@ -0,0 +1,46 @@
+# Generated by Django 5.1.4 on 2026-10-17 21:40
+
+from django.db import migrations
+from django.db.models import Q
+
+# Schéma et contenu figés à la création de la migration (voir maoniapp/search.py)
+TABLE = 'maoniapp_review_search'
+
+
+def create_review_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    Review = apps.get_model('maoniapp', 'Review')
+    # Avis actifs rattachés à une entreprise, ayant un titre ou un texte
+    reviews = (
+        Review.objects.filter(active=True, business__isnull=False)
+        .exclude((Q(title=None) | Q(title='')) & (Q(text=None) | Q(text='')))
+        .values_list('pk', 'title', 'text')
+    )
+    rows = [(pk.int >> 65, pk.hex, title, text) for pk, title, text in reviews.iterator()]
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {TABLE} USING fts5("
+            f"id UNINDEXED, title, text, tokenize = 'unicode61 remove_diacritics 2', prefix = '3')"
+        )
+        cursor.execute(f"DELETE FROM {TABLE}")
+        cursor.executemany(f"INSERT INTO {TABLE} (rowid, id, title, text) VALUES (%s, %s, %s, %s)", rows)
+        cursor.execute(f"INSERT INTO {TABLE} ({TABLE}) VALUES ('optimize')")
+
+
+def drop_review_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(f"DROP TABLE IF EXISTS {TABLE}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('maoniapp', '0015_name_search_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_review_index, drop_review_index),
+    ]
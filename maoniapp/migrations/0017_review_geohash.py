@@ -0,0 +1,18 @@
+# Generated by Django 5.1.4 on 2026-10-17 20:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('maoniapp', '0016_review_search_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='review',
+            name='geohash',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=12, null=True),
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.1.4 on 2026-10-17 20:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('maoniapp', '0017_review_geohash'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MapCell',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('cell', models.CharField(max_length=12, unique=True)),
+                ('precision', models.PositiveSmallIntegerField()),
+                ('count', models.IntegerField(default=0)),
+                ('latitude_sum', models.FloatField(default=0)),
+                ('longitude_sum', models.FloatField(default=0)),
+                ('evaluation_count', models.IntegerField(default=0)),
+                ('evaluation_sum', models.FloatField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Map Cell',
+                'indexes': [models.Index(fields=['precision', 'cell'], name='maoniapp_ma_precisi_6c1577_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 5.1.4 on 2026-10-17 21:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('maoniapp', '0018_mapcell'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='code',
+            name='maoniapp_co_invitat_6da0c4_idx',
+        ),
+        migrations.AddIndex(
+            model_name='business',
+            index=models.Index(condition=models.Q(('active', True)), fields=['category', 'country', 'city'], name='business_active_place_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='business',
+            index=models.Index(condition=models.Q(('active', True)), fields=['created_at', 'id'], name='business_active_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='code',
+            index=models.Index(fields=['business', 'is_active'], name='maoniapp_co_busines_bff2c5_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='review',
+            index=models.Index(condition=models.Q(('active', True)), fields=['business', 'created_at', 'id'], name='review_active_business_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='review',
+            index=models.Index(condition=models.Q(('active', True)), fields=['created_at', 'id'], name='review_active_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='userbusiness',
+            index=models.Index(fields=['user', 'is_active'], name='maoniapp_us_user_id_c6ab0c_idx'),
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 5.1.4 on 2026-10-17 21:15
+
+from django.db import migrations, models
+from django.utils import timezone
+
+# Modèles suivis par les signaux de DataVersion : une ligne chacun, pour que les lectures
+# (GET conditionnels, clés de cache) n'écrivent jamais
+TRACKED = [
+    'maoniapp.banner', 'maoniapp.business', 'maoniapp.category', 'maoniapp.comment',
+    'maoniapp.language', 'maoniapp.review', 'maoniapp.slide', 'maoniapp.translation',
+]
+
+
+def seed_versions(apps, schema_editor):
+    DataVersion = apps.get_model('maoniapp', 'DataVersion')
+    now = timezone.now()
+    DataVersion.objects.bulk_create(
+        [DataVersion(name=name, updated_at=now) for name in TRACKED], ignore_conflicts=True,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('maoniapp', '0019_composite_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DataVersion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, unique=True)),
+                ('version', models.PositiveBigIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(null=True)),
+            ],
+        ),
+        migrations.RunPython(seed_versions, migrations.RunPython.noop),
+    ]
@@ -3,4 +3,5 @@ from .category import Category
 from .review import Review
 from .comment import Comment
 from .user import User, UserBusiness
-from .slide import Slide
\ No newline at end of file
+from .slide import Slide
+from .version import DataVersion
\ No newline at end of file
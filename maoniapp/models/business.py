@@ -1,10 +1,13 @@
 from decimal import Decimal
-from django.db import models
+from django.conf import settings
+from django.db import models, transaction
 import uuid
-from django.db.models import Avg, Count, Q
-from django.db.models.signals import post_save
+from django.db.models import Case, Count, ExpressionWrapper, F, FloatField, Q, Sum, Value, When
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
 from ..models.code import Code
+from ..search import business_index
+from ..autocomplete import business_autocomplete
 
 class Business(models.Model):
     class BTypeChoices(models.TextChoices):
@@ -31,6 +34,11 @@ class Business(models.Model):
     isverified = models.BooleanField(default=False)
     showeval = models.BooleanField(default=True)
     showreview = models.BooleanField(default=True)
+    # Compteurs des avis actifs, maintenus par Review.save / post_delete
+    review_count = models.IntegerField(default=0, editable=False)
+    evaluation_count = models.IntegerField(default=0, editable=False)
+    evaluation_sum = models.FloatField(default=0, editable=False)
+    evaluation_avg = models.FloatField(default=0, editable=False)
     updated_at = models.DateTimeField(auto_now=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
@@ -39,36 +47,127 @@ class Business(models.Model):
         verbose_name_plural = 'Businesses'
         unique_together = ('name', 'category', 'country', 'city')
         ordering = ['-created_at']
+        # Index partiels sur les entreprises actives (voir Review.Meta)
+        indexes = [
+            # Filtres des listes : catégorie, pays, ville
+            models.Index(fields=['category', 'country', 'city'], condition=Q(active=True), name='business_active_place_idx'),
+            # Ordre de la pagination par clé (created_at, id)
+            models.Index(fields=['created_at', 'id'], condition=Q(active=True), name='business_active_created_idx'),
+        ]
+    # Compteurs maintenus par UPDATE ... F() (update_review_stats) : un save() ordinaire ne les
+    # réécrit pas, sinon il écraserait les incréments faits depuis le chargement de l'instance
+    REVIEW_STAT_FIELDS = ('review_count', 'evaluation_count', 'evaluation_sum', 'evaluation_avg')
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding and not kwargs.get('force_insert') and kwargs.get('update_fields') is None:
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in self.REVIEW_STAT_FIELDS
+            ]
+        super().save(*args, **kwargs)
+
     def get_reviews_info(self):
-        reviews = self.busreview.all()  # Get all reviews related to this business
-        total_reviews = reviews.count()
-        total_evaluation = reviews.aggregate(average_evaluation=Avg('evaluation'))['average_evaluation'] or 0
+        # Read the stored counters instead of aggregating the reviews table
+        total_reviews = self.review_count
         has_reviews = total_reviews > 0
-        
+
         # Round total_evaluation to 2 decimal places
-        total_evaluation = round(Decimal(total_evaluation), 2)
-        
+        total_evaluation = round(Decimal(self.evaluation_avg), 2)
+
         return {
             "total_reviews": total_reviews,
             "total_evaluation": total_evaluation,
             "has_reviews": has_reviews
         }
-        
+
+    @classmethod
+    def update_review_stats(cls, business_id, evaluation, delta):
+        """
+        Ajoute (delta=1) ou retire (delta=-1) un avis actif des compteurs d'une entreprise.
+        Une seule requête UPDATE : les expressions F() lisent les anciennes valeurs de la ligne.
+        """
+        rated = delta if evaluation is not None else 0
+        evaluation_count = F('evaluation_count') + rated
+        evaluation_sum = F('evaluation_sum') + (evaluation * delta if evaluation is not None else 0)
+        cls.objects.filter(pk=business_id).update(
+            review_count=F('review_count') + delta,
+            evaluation_count=evaluation_count,
+            evaluation_sum=evaluation_sum,
+            evaluation_avg=Case(
+                When(evaluation_count__gt=-rated,
+                     then=ExpressionWrapper(evaluation_sum / evaluation_count, output_field=FloatField())),
+                default=Value(0.0),
+                output_field=FloatField(),
+            ),
+        )
+
+    @classmethod
+    def recompute_review_stats(cls, batch_size=500):
+        """
+        Recalcule les compteurs de toutes les entreprises à partir des avis actifs.
+        Une requête groupée pour les agrégats, puis des bulk_update par lots.
+        """
+        review_model = cls.busreview.field.model
+        stats = {
+            row['business']: row
+            for row in review_model.objects.filter(active=True, business__isnull=False)
+            .values('business')
+            .annotate(total=Count('id'), rated=Count('evaluation'), evaluation_sum=Sum('evaluation'))
+        }
+        businesses = []
+        for business in cls.objects.only('id').iterator(chunk_size=batch_size):
+            row = stats.get(business.id)
+            business.review_count = row['total'] if row else 0
+            business.evaluation_count = row['rated'] if row else 0
+            business.evaluation_sum = (row['evaluation_sum'] or 0) if row else 0
+            business.evaluation_avg = business.evaluation_sum / business.evaluation_count if business.evaluation_count else 0
+            businesses.append(business)
+        cls.objects.bulk_update(
+            businesses,
+            ['review_count', 'evaluation_count', 'evaluation_sum', 'evaluation_avg'],
+            batch_size=batch_size,
+        )
+        return len(businesses)
+
     def get_related_businesses(self):
         # Retrieve all businesses from the same category, city, and country, excluding this business
         return (
             Business.objects.filter(
                 Q(category=self.category)
             )
-            .annotate(total_reviews=Count('busreview'))  # Annoter le nombre de reviews
-            .filter(total_reviews__gt=0)  # Inclure uniquement les entreprises ayant des avis
+            .filter(review_count__gt=0)  # Inclure uniquement les entreprises ayant des avis
             .exclude(id=self.id)[:5]  ## Exclude the current business
         )
     @receiver(post_save, sender='maoniapp.Business')
     def generate_codes_for_new_business(sender, instance, created, **kwargs):
         if created:
-            for _ in range(32):
-                Code.generate_code(business=instance)
+            Code.generate_codes(business=instance, count=settings.INVITATION_CODES_PER_BUSINESS)
                 
     def __str__(self):
-        return f"{self.name} | {self.category.name} | {self.country} | {self.city}"
\ No newline at end of file
+        return f"{self.name} | {self.category.name} | {self.country} | {self.city}"
+
+
+@receiver(post_save, sender=Business)
+def index_business_name(sender, instance, **kwargs):
+    business_index.update(instance)
+
+
+@receiver(post_delete, sender=Business)
+def unindex_business_name(sender, instance, **kwargs):
+    business_index.remove(instance)
+
+
+@receiver(post_save, sender=Business)
+def refresh_business_autocomplete(sender, instance, **kwargs):
+    if instance.active and instance.name:
+        entry = business_autocomplete.entry(
+            instance.pk, instance.name, instance.city, instance.country, instance.logo.name, instance.review_count
+        )
+    else:
+        entry = {'id': str(instance.pk), 'name': None}
+    transaction.on_commit(lambda: business_autocomplete.update(entry))
+
+
+@receiver(post_delete, sender=Business)
+def remove_business_autocomplete(sender, instance, **kwargs):
+    transaction.on_commit(lambda: business_autocomplete.remove(instance.pk))
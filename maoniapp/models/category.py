@@ -1,5 +1,12 @@
-from django.db import models
+from django.db import models, transaction
 import uuid
+from django.core.exceptions import ValidationError
+from django.db.models import F, Q, Value
+from django.db.models.functions import Concat, Substr
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from ..categorytree import category_tree
+from ..search import category_index
 
 from django.forms import JSONField
 class Category(models.Model):
@@ -19,6 +26,9 @@ class Category(models.Model):
         null=True, 
         blank=True
     )  # To enable nested categories
+    # Chemin matérialisé "/<id racine>/.../<id>/", maintenu par save() pour filtrer un sous-arbre
+    path = models.CharField(max_length=512, db_index=True, editable=False, default='')
+    depth = models.PositiveSmallIntegerField(default=0, editable=False)
 
     class Meta:
         verbose_name = "Category"
@@ -26,3 +36,47 @@ class Category(models.Model):
 
     def __str__(self):
         return self.name
+
+    @staticmethod
+    def subtree_q(path, prefix=''):
+        """
+        Condition sur le sous-arbre de `path` (la catégorie et ses descendants), à combiner
+        avec un préfixe de relation, ex. Category.subtree_q(path, 'category__') sur Business.
+        Les chemins ne contiennent que [0-9a-f/] et '0' suit '/' : l'intervalle [path, path[:-1] + '0')
+        couvre exactement le sous-arbre et se résout par un parcours de l'index sur path.
+        """
+        return Q(**{f'{prefix}path__gte': path, f'{prefix}path__lt': path[:-1] + '0'})
+
+    def save(self, *args, **kwargs):
+        with transaction.atomic():
+            paths = dict(Category.objects.filter(pk__in=[self.pk, self.parent_id]).values_list('id', 'path'))
+            old_path = paths.get(self.pk, '')
+            parent_path = paths.get(self.parent_id, '/') if self.parent_id else '/'
+            if old_path and parent_path.startswith(old_path):
+                raise ValidationError({"parent": "A category cannot be moved under itself or one of its subcategories."})
+            self.path = f"{parent_path}{self.id.hex}/"
+            self.depth = self.path.count('/') - 2
+            super().save(*args, **kwargs)
+            # Déplacement : réécrire les chemins des descendants en une seule requête
+            if old_path and old_path != self.path:
+                Category.objects.filter(Category.subtree_q(old_path)).exclude(pk=self.pk).update(
+                    path=Concat(Value(self.path), Substr('path', len(old_path) + 1)),
+                    depth=F('depth') + (self.depth - (old_path.count('/') - 2)),
+                )
+
+
+@receiver([post_save, post_delete], sender=Category)
+def invalidate_category_tree(sender, **kwargs):
+    # Invalider tout de suite, puis après le commit pour écarter un arbre reconstruit entre-temps
+    category_tree.invalidate()
+    transaction.on_commit(category_tree.invalidate)
+
+
+@receiver(post_save, sender=Category)
+def index_category_name(sender, instance, **kwargs):
+    category_index.update(instance)
+
+
+@receiver(post_delete, sender=Category)
+def unindex_category_name(sender, instance, **kwargs):
+    category_index.remove(instance)
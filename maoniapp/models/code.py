@@ -1,6 +1,77 @@
-from django.db import models
+import logging
+import secrets
+from django.db import models, transaction
+from django.db.models.signals import post_save
+from django.dispatch import receiver
 import uuid
-from django.utils.crypto import get_random_string
+from django.conf import settings
+from django.db.models import Count, F, Q
+from django.utils import timezone
+from ..codegen import ALPHABET, CodePermutation
+from ..codestatus import code_status_cache
+
+logger = logging.getLogger(__name__)
+
+
+class CodeSequence(models.Model):
+    """
+    Compteur des codes d'invitation (une seule ligne). Chaque valeur du compteur est
+    transformée en code par une permutation à clé (voir codegen.py) : les codes sont
+    uniques par construction. Quand l'espace 36**length est épuisé, length augmente et le
+    compteur repart à zéro ; les codes plus longs ne peuvent pas croiser les anciens.
+    Les anciens codes aléatoires font 5 caractères, la séquence commence donc à 6.
+    """
+    MAX_LENGTH = 10  # Code.invitation_code max_length
+    USAGE_WARNING = 0.8
+
+    length = models.PositiveSmallIntegerField(default=6)
+    next_value = models.BigIntegerField(default=0)
+    key = models.CharField(max_length=64, default=secrets.token_hex)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = 'Invitation Code Sequence'
+
+    def __str__(self):
+        return f"{self.length} chars | {self.next_value}/{self.capacity} used"
+
+    @property
+    def capacity(self):
+        return len(ALPHABET) ** self.length
+
+    @property
+    def usage(self):
+        return self.next_value / self.capacity
+
+    def permutation(self):
+        return CodePermutation(bytes.fromhex(self.key), self.length)
+
+    @classmethod
+    def allocate(cls, count):
+        """
+        Réserve `count` valeurs consécutives du compteur.
+        Retourne (séquence, première valeur réservée).
+        """
+        with transaction.atomic():
+            # L'UPDATE passe en premier : il prend le verrou d'écriture et sérialise les allocations
+            if not cls.objects.filter(pk=1).update(next_value=F('next_value') + count):
+                cls.objects.create(pk=1, next_value=count)
+            sequence = cls.objects.get(pk=1)
+            if sequence.next_value > sequence.capacity:
+                sequence.extend(next_value=count)
+            elif sequence.usage >= cls.USAGE_WARNING:
+                logger.warning("Invitation code space %.0f%% used (%s)", sequence.usage * 100, sequence)
+            return sequence, sequence.next_value - count
+
+    def extend(self, next_value=0):
+        # Passer à la longueur suivante ; le reste de l'espace courant est abandonné
+        if self.length >= self.MAX_LENGTH:
+            raise ValueError("Invitation code space exhausted at the maximum code length.")
+        logger.warning("Extending invitation code space from %s to %s characters", self.length, self.length + 1)
+        self.length += 1
+        self.next_value = next_value
+        self.save(update_fields=['length', 'next_value', 'updated_at'])
+
 
 class Code(models.Model):
     id = models.UUIDField(default=uuid.uuid4, editable=False, unique=True, primary_key=True)
@@ -9,27 +80,87 @@ class Code(models.Model):
     is_active = models.BooleanField(default=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
-    
+
     class Meta:
         verbose_name = 'Invitation Code'
         verbose_name_plural = 'Invitations Codes'
-        indexes = [models.Index(fields=['invitation_code'])]  # Ensure an index for `invitation_code`
-        
+        # invitation_code est déjà indexé par sa contrainte unique
+        indexes = [
+            models.Index(fields=['business', 'is_active']),  # Codes actifs / utilisés d'une entreprise
+            models.Index(fields=['updated_at']),  # Synchronisation de code_status_cache
+        ]
+
     def __str__(self):
         return f"{self.business.name} | {self.invitation_code} |is used {self.is_active}"
-    
-    def save(self, *args, **kwargs):
-        # Supprimer le code précédent si celui-ci est marqué comme utilisé
-        if self.is_active:
-            # Supprimer le code déjà utilisé dans la base de données
-            Code.objects.filter(invitation_code=self.invitation_code, is_active=True).delete()
-        super().save(*args, **kwargs)
+
+    @staticmethod
+    def redeem(invitation_code):
+        """
+        Consomme le code par un seul UPDATE conditionnel (WHERE is_active) et retourne l'id de
+        l'entreprise liée, ou None si le code n'existe pas ou a déjà été utilisé.
+        Entre requêtes concurrentes, une seule obtient la ligne. À appeler dans la transaction
+        qui crée l'avis : si la création échoue, le code n'est pas consommé.
+        """
+        codes = Code.objects.filter(invitation_code=invitation_code)
+        if not codes.filter(is_active=True).update(is_active=False, updated_at=timezone.now()):
+            return None
+        code_status_cache.record({invitation_code: False})
+        return codes.values_list('business_id', flat=True).first()
+
+    @staticmethod
+    def generate_codes(business, count):
+        return Code.generate_batch([(business.pk, count)])
 
     @staticmethod
     def generate_code(business):
-        # Générer un code unique
-        code = get_random_string(length=5).upper()
-        while Code.objects.filter(invitation_code=code).exists():  # Vérifier si le code existe déjà
-            code = get_random_string(length=5).upper()
-        # Crée une nouvelle instance de Code
-        return Code.objects.create(invitation_code=code, business=business)
\ No newline at end of file
+        return Code.generate_codes(business, 1)[0]
+
+    @staticmethod
+    def generate_batch(requests, batch_size=1000):
+        """
+        Crée les codes de plusieurs entreprises : requests = [(business_id, nombre), ...].
+        Codes uniques sans sonde en base : une allocation du compteur pour tout le lot,
+        puis des INSERT groupés.
+        """
+        total = sum(count for _, count in requests)
+        if not total:
+            return []
+        sequence, start = CodeSequence.allocate(total)
+        permutation = sequence.permutation()
+        values = iter(range(start, start + total))
+        codes = [
+            Code(invitation_code=permutation.code(next(values)), business_id=business_id)
+            for business_id, count in requests
+            for _ in range(count)
+        ]
+        codes = Code.objects.bulk_create(codes, batch_size=batch_size)
+        code_status_cache.record({code.invitation_code: code.is_active for code in codes})
+        return codes
+
+    @staticmethod
+    def replenish_pools(low_water=None, target=None, chunk_size=1000):
+        """
+        Complète jusqu'à `target` codes actifs le stock de chaque entreprise active qui en a
+        moins de `low_water`. Une requête groupée pour les stocks, puis une allocation et un
+        INSERT groupé par tranche de `chunk_size` entreprises. Retourne (entreprises, codes).
+        """
+        low_water = settings.INVITATION_CODE_LOW_WATER if low_water is None else low_water
+        target = settings.INVITATION_CODES_PER_BUSINESS if target is None else target
+        business_model = Code._meta.get_field('business').related_model
+        pools = (
+            business_model.objects.filter(active=True)
+            .annotate(active_codes=Count('businesscodes', filter=Q(businesscodes__is_active=True)))
+            .filter(active_codes__lt=low_water)
+            .values_list('id', 'active_codes')
+        )
+        requests = [(business_id, target - active_codes) for business_id, active_codes in pools]
+        created = 0
+        for start in range(0, len(requests), chunk_size):
+            created += len(Code.generate_batch(requests[start:start + chunk_size]))
+        return len(requests), created
+
+
+@receiver(post_save, sender=Code)
+def refresh_code_status(sender, instance, **kwargs):
+    # bulk_create et update() n'envoient pas post_save : generate_batch et redeem s'en chargent
+    code_status_cache.record({instance.invitation_code: instance.is_active})
@@ -1,4 +1,7 @@
-from django.db import models
+from django.db import models, transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from ..translations import translation_cache
 
 class Language(models.Model):
     code = models.CharField(max_length=10, unique=True, help_text="Language code (e.g., 'en', 'fr', 'es')")
@@ -16,4 +19,12 @@ class Translation(models.Model):
         unique_together = ('language', 'key')  # Ensure unique key per language
 
     def __str__(self):
-        return f"{self.key} ({self.language.code})"
\ No newline at end of file
+        return f"{self.key} ({self.language.code})"
+
+
+@receiver([post_save, post_delete], sender=Language)
+@receiver([post_save, post_delete], sender=Translation)
+def invalidate_translation_cache(sender, **kwargs):
+    # Invalider tout de suite, puis après le commit pour écarter des traductions relues entre-temps
+    translation_cache.invalidate()
+    transaction.on_commit(translation_cache.invalidate)
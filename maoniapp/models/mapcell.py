@@ -0,0 +1,83 @@
+from django.db import models, transaction
+from django.db.models import Count, F, Sum
+from django.db.models.functions import Substr
+from .. import geo
+
+
+class MapCell(models.Model):
+    """
+    Agrégat des avis actifs localisés d'une cellule geohash, pour chaque précision de 1 à
+    geo.MAP_PRECISION : la carte d'un zoom donné lit quelques centaines de lignes au lieu des avis.
+    Tenu à jour par Review.save / pre_delete (apply), reconstruit par rebuild_map_cells.
+    """
+    cell = models.CharField(max_length=12, unique=True)
+    precision = models.PositiveSmallIntegerField()
+    count = models.IntegerField(default=0)
+    latitude_sum = models.FloatField(default=0)
+    longitude_sum = models.FloatField(default=0)
+    evaluation_count = models.IntegerField(default=0)
+    evaluation_sum = models.FloatField(default=0)
+
+    class Meta:
+        verbose_name = 'Map Cell'
+        indexes = [models.Index(fields=['precision', 'cell'])]
+
+    def __str__(self):
+        return f"{self.cell} | {self.count} reviews"
+
+    @classmethod
+    def apply(cls, contribution, delta):
+        """
+        Ajoute (delta=1) ou retire (delta=-1) un avis (geohash, latitude, longitude, evaluation)
+        de toutes ses cellules : création des lignes manquantes, puis un seul UPDATE.
+        """
+        geohash, latitude, longitude, evaluation = contribution
+        cells = [geohash[:precision] for precision in range(1, geo.MAP_PRECISION + 1)]
+        cls.objects.bulk_create(
+            [cls(cell=cell, precision=len(cell)) for cell in cells], ignore_conflicts=True
+        )
+        rated = evaluation is not None
+        cls.objects.filter(cell__in=cells).update(
+            count=F('count') + delta,
+            latitude_sum=F('latitude_sum') + delta * latitude,
+            longitude_sum=F('longitude_sum') + delta * longitude,
+            evaluation_count=F('evaluation_count') + (delta if rated else 0),
+            evaluation_sum=F('evaluation_sum') + (delta * evaluation if rated else 0),
+        )
+
+    @classmethod
+    def rebuild(cls, batch_size=1000):
+        """Recalcule toutes les cellules : une requête groupée par précision."""
+        review_model = cls._meta.apps.get_model('maoniapp', 'Review')
+        reviews = review_model.objects.filter(active=True).exclude(geohash=None).order_by()
+        cells = []
+        for precision in range(1, geo.MAP_PRECISION + 1):
+            rows = (
+                reviews.annotate(cell=Substr('geohash', 1, precision))
+                .values('cell')
+                .annotate(
+                    total=Count('id'), latitudes=Sum('latitude'), longitudes=Sum('longitude'),
+                    rated=Count('evaluation'), evaluations=Sum('evaluation'),
+                )
+            )
+            cells.extend(
+                cls(
+                    cell=row['cell'], precision=precision, count=row['total'],
+                    latitude_sum=row['latitudes'], longitude_sum=row['longitudes'],
+                    evaluation_count=row['rated'], evaluation_sum=row['evaluations'] or 0,
+                )
+                for row in rows
+            )
+        with transaction.atomic():
+            cls.objects.all().delete()
+            cls.objects.bulk_create(cells, batch_size=batch_size)
+        return len(cells)
+
+    def cluster(self):
+        return {
+            'cell': self.cell,
+            'count': self.count,
+            'latitude': self.latitude_sum / self.count,
+            'longitude': self.longitude_sum / self.count,
+            'evaluation_avg': round(self.evaluation_sum / self.evaluation_count, 2) if self.evaluation_count else None,
+        }
@@ -1,6 +1,13 @@
-from django.db import models
+from django.db import models, transaction
+from django.db.models import F, Q
 import uuid
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
 from ..services import *
+from .business import Business
+from .mapcell import MapCell
+from ..search import review_index
+from .. import geo
 from django.core.exceptions import ValidationError
 from django.core.validators import EmailValidator, RegexValidator
 
@@ -15,6 +22,8 @@ class Review(models.Model):
     score = models.FloatField(null=True, blank=True)
     latitude = models.FloatField(null=True, blank=True)
     longitude = models.FloatField(null=True, blank=True)
+    # Geohash de (latitude, longitude), calculé au save : index des recherches par zone
+    geohash = models.CharField(max_length=12, null=True, blank=True, db_index=True, editable=False)
     authorcountry = models.CharField(max_length=100, null=True, blank=True)
     expdate = models.CharField(max_length=20, null=True, blank=True)
     authorname = models.CharField(max_length=100, null=True, blank=True)
@@ -62,13 +71,95 @@ class Review(models.Model):
         verbose_name = 'Review'
         verbose_name_plural = 'Reviews'
         ordering = ['-created_at']
+        # Index partiels sur les avis actifs : SQLite n'utilise pas un index dont la première
+        # colonne est un booléen filtré par WHERE "active" (forme générée par Django)
+        indexes = [
+            # Avis d'une entreprise, dans l'ordre de la pagination par clé (created_at, id)
+            models.Index(fields=['business', 'created_at', 'id'], condition=Q(active=True), name='review_active_business_idx'),
+            # Derniers avis toutes entreprises confondues
+            models.Index(fields=['created_at', 'id'], condition=Q(active=True), name='review_active_created_idx'),
+        ]
         
+    # Champs dont dépendent les contributions de l'avis aux compteurs de son entreprise et aux
+    # agrégats de carte
+    _COUNTED_FIELDS = {'active', 'business_id', 'evaluation', 'geohash', 'latitude', 'longitude'}
+
+    def compute_geohash(self):
+        if self.latitude is None or self.longitude is None:
+            return None
+        return geo.encode(self.latitude, self.longitude)
+
+    def stats_contribution(self):
+        if self.active and self.business_id:
+            return (self.business_id, self.evaluation)
+        return None
+
+    def map_contribution(self):
+        if self.active and self.geohash:
+            return (self.geohash, self.latitude, self.longitude, self.evaluation)
+        return None
+
+    def contributions(self):
+        return self.stats_contribution(), self.map_contribution()
+
+    @classmethod
+    def lock_stored_contributions(cls, pk):
+        """
+        Contributions de l'avis `pk` telles qu'elles sont en base, (None, None) s'il n'existe pas.
+        Un UPDATE sans effet verrouille d'abord la ligne (toute la base sous SQLite) jusqu'à la
+        fin de la transaction : deux écritures concurrentes du même avis partent chacune de
+        l'état laissé par l'autre et ne retirent pas deux fois la même contribution.
+        À appeler dans une transaction.
+        """
+        if not cls.objects.filter(pk=pk).update(active=F('active')):
+            return None, None
+        row = cls.objects.filter(pk=pk).values(*cls._COUNTED_FIELDS).get()
+        return cls(**row).contributions()
+
     def save(self, *args, **kwargs):
         # Appeler la méthode de validation avant de sauvegarder
         self.clean()
-        super().save(*args, **kwargs)
+        self.geohash = self.compute_geohash()
+        with transaction.atomic():
+            if self._state.adding:
+                previous_stats, previous_map = None, None
+            else:
+                previous_stats, previous_map = self.lock_stored_contributions(self.pk)
+            super().save(*args, **kwargs)
+            # Mettre à jour les compteurs de l'entreprise et de la carte dans la même transaction
+            current_stats, current_map = self.contributions()
+            if previous_stats != current_stats:
+                if previous_stats:
+                    Business.update_review_stats(previous_stats[0], previous_stats[1], -1)
+                if current_stats:
+                    Business.update_review_stats(current_stats[0], current_stats[1], 1)
+            if previous_map != current_map:
+                if previous_map:
+                    MapCell.apply(previous_map, -1)
+                if current_map:
+                    MapCell.apply(current_map, 1)
 
     def __str__(self):
         return f"{self.business.name} | {self.text[:20]}... | Score: {self.score} | Sentiment: {self.sentiment}"
 
-    
\ No newline at end of file
+
+@receiver(pre_delete, sender=Review)
+def remove_deleted_review_stats(sender, instance, **kwargs):
+    # Appelé dans la transaction du Collector, y compris pour les suppressions en cascade ;
+    # après une suppression concurrente, la ligne n'existe plus et il n'y a rien à retirer
+    counted, mapped = Review.lock_stored_contributions(instance.pk)
+    if counted:
+        Business.update_review_stats(counted[0], counted[1], -1)
+    if mapped:
+        MapCell.apply(mapped, -1)
+
+
+@receiver(post_save, sender=Review)
+def index_review_text(sender, instance, **kwargs):
+    # Un avis désactivé (ReviewUpdateView) sort de l'index dans la même transaction
+    review_index.update(instance)
+
+
+@receiver(post_delete, sender=Review)
+def unindex_review_text(sender, instance, **kwargs):
+    review_index.remove(instance)
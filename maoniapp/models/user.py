@@ -63,4 +63,5 @@ class UserBusiness(models.Model):
     is_active = models.BooleanField(default=True)
 
     class Meta:
-        unique_together = ['user', 'business'] 
\ No newline at end of file
+        unique_together = ['user', 'business'] 
+        indexes = [models.Index(fields=['user', 'is_active'])]  # Entreprises actives d'un utilisateur
\ No newline at end of file
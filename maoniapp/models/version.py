@@ -0,0 +1,111 @@
+import threading
+
+from django.db import models, transaction
+from django.db.models import F
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+from .banner import Banner
+from .business import Business
+from .category import Category
+from .comment import Comment
+from .language import Language, Translation
+from .review import Review
+from .slide import Slide
+
+# bump() différés de ce thread, par modèle : (position dans run_on_commit, appel)
+_deferred_bumps = threading.local()
+
+
+class DataVersion(models.Model):
+    """
+    Version des données d'un modèle ("maoniapp.category"), incrémentée après la validation de
+    chaque écriture par les signaux post_save / post_delete (bump_on_commit()) : validateur des
+    GET conditionnels (ETag, Last-Modified) lu en une requête, sans relire les données. Une ligne
+    par modèle, mise à jour hors de la transaction de l'écrivain : les écritures ne se sérialisent
+    pas sur elle. Les .update() et bulk_create() ne passent pas par les signaux : appeler
+    bump_on_commit() après. Les lignes des modèles suivis sont créées par la migration 0020 (en ajouter une pour
+    tout nouveau modèle suivi) : les lectures n'écrivent jamais.
+    """
+    name = models.CharField(max_length=100, unique=True)
+    version = models.PositiveBigIntegerField(default=0)
+    updated_at = models.DateTimeField(null=True)
+
+    def __str__(self):
+        return f"{self.name} v{self.version}"
+
+    @classmethod
+    def bump(cls, model):
+        name = model._meta.label_lower
+        if not cls.objects.filter(name=name).update(version=F('version') + 1, updated_at=timezone.now()):
+            # Première écriture du modèle : créer la ligne (une seule si deux écritures concourent)
+            cls.objects.bulk_create([cls(name=name)], ignore_conflicts=True)
+            cls.objects.filter(name=name).update(version=F('version') + 1, updated_at=timezone.now())
+
+    @classmethod
+    def bump_on_commit(cls, model):
+        """
+        bump() à la validation de la transaction courante, une fois par modèle, hors de la
+        transaction de l'écrivain. D'ici là, stamp() de ce modèle vaut None dans cette
+        transaction : rien n'est mis en cache sous l'ancienne empreinte à partir de données
+        non validées.
+        """
+        name = model._meta.label_lower
+        connection = transaction.get_connection()
+        if not connection.in_atomic_block:
+            cls.bump(model)
+        elif not cls._deferred(connection, name):
+            def call():
+                _deferred_bumps.calls.pop(name, None)
+                cls.bump(model)
+
+            connection.on_commit(call)
+            if not hasattr(_deferred_bumps, 'calls'):
+                _deferred_bumps.calls = {}
+            _deferred_bumps.calls[name] = (len(connection.run_on_commit) - 1, call)
+
+    @staticmethod
+    def _deferred(connection, name):
+        # Un rollback (même partiel) retire l'appel de run_on_commit, la validation le vide
+        index, call = getattr(_deferred_bumps, 'calls', {}).get(name, (None, None))
+        return call is not None and index < len(connection.run_on_commit) and connection.run_on_commit[index][1] is call
+
+    @classmethod
+    def read(cls, model_classes):
+        """(versions {nom: version}, dernière modification ou None) des modèles ; 0 si jamais écrit."""
+        names = [model._meta.label_lower for model in model_classes]
+        versions, last_modified = dict.fromkeys(names, 0), None
+        for name, version, updated_at in cls.objects.filter(name__in=names).values_list('name', 'version', 'updated_at'):
+            versions[name] = version
+            if updated_at and (last_modified is None or updated_at > last_modified):
+                last_modified = updated_at
+        return versions, last_modified
+
+    @classmethod
+    def stamp(cls, model_classes):
+        """
+        Empreinte de l'état des modèles pour les clés de cache : change à chaque écriture, et
+        l'instant de l'écriture (microsecondes) évite de réutiliser une empreinte après un
+        rollback ou dans une autre base. Lue dans la transaction courante, comme les données.
+        None si un modèle n'a pas de ligne (créées par la migration 0020) ou si la transaction
+        courante l'a écrit (version incrémentée à la validation) : rien à mettre en cache.
+        """
+        names = sorted({model._meta.label_lower for model in model_classes})
+        connection = transaction.get_connection()
+        if connection.in_atomic_block and any(cls._deferred(connection, name) for name in names):
+            return None
+        stamps = list(cls.objects.filter(name__in=names).order_by('name').values_list('version', 'updated_at'))
+        if len(stamps) < len(names) or any(updated_at is None for _, updated_at in stamps):
+            return None
+        return '-'.join(f'{version}.{int(updated_at.timestamp() * 1_000_000)}' for version, updated_at in stamps)
+
+@receiver([post_save, post_delete], sender=Slide)
+@receiver([post_save, post_delete], sender=Banner)
+@receiver([post_save, post_delete], sender=Category)
+@receiver([post_save, post_delete], sender=Business)
+@receiver([post_save, post_delete], sender=Review)
+@receiver([post_save, post_delete], sender=Comment)
+@receiver([post_save, post_delete], sender=Language)
+@receiver([post_save, post_delete], sender=Translation)
+def bump_data_version(sender, **kwargs):
+    DataVersion.bump_on_commit(sender)
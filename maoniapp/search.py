@@ -0,0 +1,174 @@
+import re
+import uuid
+
+from django.apps import apps
+from django.utils.html import escape
+from django.db import connection
+from django.db.models import FloatField, Q
+from django.db.models.expressions import RawSQL
+
+# Nombre maximal de résultats classés par pertinence
+SEARCH_LIMIT = 500
+
+_WORDS = re.compile(r'\w+')
+# Marqueurs posés par FTS5 autour des termes trouvés, remplacés par <mark> après échappement
+_MARK_OPEN, _MARK_CLOSE = '\x02', '\x03'
+
+
+def match_query(text):
+    """
+    Requête FTS5 pour le texte saisi : chaque mot devient un préfixe entre guillemets
+    ("clin"* "dou"*), ce qui neutralise la syntaxe FTS5 (AND, NEAR, ^, ...) dans la saisie.
+    """
+    return ' '.join(f'"{word}"*' for word in _WORDS.findall(text))
+
+
+def highlight_html(text):
+    # Le texte vient des clients : l'échapper avant de poser les balises
+    return escape(text or '').replace(_MARK_OPEN, '<mark>').replace(_MARK_CLOSE, '</mark>')
+
+
+class SearchIndex:
+    """
+    Index plein texte SQLite FTS5 sur des colonnes texte des lignes actives d'un modèle.
+
+    Tokenizer unicode61 avec remove_diacritics : "eglise" trouve "Église". Les index de
+    préfixes servent la recherche à chaque frappe. L'identifiant est une colonne non
+    indexée ; le rowid, dérivé de l'UUID, permet de remplacer une ligne sans parcourir
+    l'index. Tenu à jour par les signaux du modèle, reconstruit par la commande
+    rebuild_search_index. Hors SQLite, la recherche retombe sur <première colonne>__icontains.
+    """
+
+    def __init__(self, table, model_label, columns=('name',), prefix='2 3 4'):
+        self.table = table
+        self.model_label = model_label
+        self.columns = columns
+        self.prefix = prefix
+
+    @staticmethod
+    def available():
+        return connection.vendor == 'sqlite'
+
+    @staticmethod
+    def _rowid(pk):
+        # 63 bits de l'UUID : rowid positif, collisions négligeables
+        return pk.int >> 65
+
+    def create(self, cursor):
+        cursor.execute(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {self.table} USING fts5("
+            f"id UNINDEXED, {', '.join(self.columns)}, "
+            f"tokenize = 'unicode61 remove_diacritics 2', prefix = '{self.prefix}')"
+        )
+
+    def _row(self, pk, values):
+        return [self._rowid(pk), pk.hex, *values]
+
+    def _insert_sql(self):
+        columns = ', '.join(self.columns)
+        placeholders = ', '.join(['%s'] * (len(self.columns) + 2))
+        return f"INSERT INTO {self.table} (rowid, id, {columns}) VALUES ({placeholders})"
+
+    def indexed(self, instance):
+        # Lignes actives ayant du texte ; les sous-classes peuvent restreindre
+        return instance.active and any(getattr(instance, column) for column in self.columns)
+
+    def drop(self, cursor):
+        cursor.execute(f"DROP TABLE IF EXISTS {self.table}")
+
+    def rebuild(self, model=None):
+        # `model` : le modèle historique quand la reconstruction est lancée par une migration
+        model = model or apps.get_model(self.model_label)
+        rows = [
+            self._row(instance.pk, [getattr(instance, column) for column in self.columns])
+            for instance in model.objects.filter(active=True).iterator()
+            if self.indexed(instance)
+        ]
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {self.table}")
+            cursor.executemany(self._insert_sql(), rows)
+            cursor.execute(f"INSERT INTO {self.table} ({self.table}) VALUES ('optimize')")
+        return len(rows)
+
+    def update(self, instance):
+        if not self.available():
+            return
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {self.table} WHERE rowid = %s", [self._rowid(instance.pk)])
+            if self.indexed(instance):
+                cursor.execute(
+                    self._insert_sql(), self._row(instance.pk, [getattr(instance, column) for column in self.columns])
+                )
+
+    def remove(self, instance):
+        if not self.available():
+            return
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {self.table} WHERE rowid = %s", [self._rowid(instance.pk)])
+
+    def filter(self, queryset, text, ranked=True):
+        """
+        Restreint `queryset` aux lignes dont le nom correspond à `text`.
+        ranked=True : jointure avec l'index, triée par pertinence (bm25, annoté search_rank) ;
+        les filtres du queryset s'appliquent dans la même requête, sur tous les résultats.
+        ranked=False : tous les résultats, sans tri, pour servir de sous-requête.
+        """
+        text = text.strip()
+        if not self.available():
+            return queryset.filter(**{f'{self.columns[0]}__icontains': text})
+        query = match_query(text)
+        if not query:
+            return queryset.none()
+        if not ranked:
+            return queryset.filter(pk__in=RawSQL(f"SELECT id FROM {self.table} WHERE {self.table} MATCH %s", [query]))
+        # L'index mène la jointure (MATCH), chaque résultat est lu par sa clé primaire.
+        # Rang annoté (et non seulement trié) : la pagination par clé s'appuie dessus
+        model_table = queryset.model._meta.db_table
+        pk_column = queryset.model._meta.pk.column
+        return queryset.extra(
+            tables=[self.table],
+            where=[f"{self.table} MATCH %s", f'{self.table}.id = "{model_table}"."{pk_column}"'],
+            params=[query],
+        ).annotate(search_rank=RawSQL(f"bm25({self.table})", [], output_field=FloatField())).order_by('search_rank')
+
+
+class ReviewIndex(SearchIndex):
+    """Titre et texte des avis actifs rattachés à une entreprise ; le titre pèse plus dans le classement."""
+    TITLE_WEIGHT = 3.0
+    SNIPPET_TOKENS = 16
+
+    def indexed(self, instance):
+        return bool(instance.business_id) and super().indexed(instance)
+
+    def search(self, queryset, text, limit=SEARCH_LIMIT):
+        """
+        Avis de `queryset` correspondant à `text`, les plus pertinents d'abord, au plus `limit` :
+        [(id, score bm25, titre surligné, extrait surligné du texte)]. Les filtres du queryset
+        (entreprises, note, dates...) sont appliqués dans la même requête que la recherche.
+        """
+        text = text.strip()
+        if not self.available():
+            matches = queryset.filter(Q(title__icontains=text) | Q(text__icontains=text))[:limit]
+            return [(id_, None, escape(title or ''), escape(body or '')) for id_, title, body in matches.values_list('pk', 'title', 'text')]
+        query = match_query(text)
+        if not query:
+            return []
+        subquery, params = queryset.order_by().values('pk').query.sql_with_params()
+        table = self.table
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"SELECT id, bm25({table}, 0, %s, 1.0) AS score, highlight({table}, 1, %s, %s), "
+                f"snippet({table}, 2, %s, %s, '…', %s) FROM {table} "
+                f"WHERE {table} MATCH %s AND id IN ({subquery}) ORDER BY score LIMIT %s",
+                [self.TITLE_WEIGHT, _MARK_OPEN, _MARK_CLOSE, _MARK_OPEN, _MARK_CLOSE, self.SNIPPET_TOKENS,
+                 query, *params, limit],
+            )
+            return [
+                (uuid.UUID(id_), score, highlight_html(title), highlight_html(snippet))
+                for id_, score, title, snippet in cursor.fetchall()
+            ]
+
+
+business_index = SearchIndex('maoniapp_business_search', 'maoniapp.Business')
+category_index = SearchIndex('maoniapp_category_search', 'maoniapp.Category')
+review_index = ReviewIndex('maoniapp_review_search', 'maoniapp.Review', columns=('title', 'text'), prefix='3')
@@ -1,3 +1,1324 @@
-from django.test import TestCase
+import base64
+import csv
+import io
+import json
+import re
+import threading
+import time
+import uuid
+from decimal import Decimal
+from unittest import mock
 
-# Create your tests here.
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from django.utils.http import urlencode
+from rest_framework.test import APIClient
+
+from .autocomplete import Autocomplete
+from .cache import TwoTierCache, shared_cache
+from .categorytree import category_tree
+from .codegen import CodePermutation
+from .codestatus import CodeStatusCache
+from .controllers.businesscontroller import BusinessBrandListView
+from .controllers.rowmappers import RowMapperListMixin
+from .controllers.serializers import BusinessSerializer, ReviewSerializer
+
+from .models.business import Business
+from .models.category import Category
+from .models.code import Code, CodeSequence
+from .models.comment import Comment
+from .models.language import Language, Translation
+from .models.mapcell import MapCell
+from .models.banner import Banner
+from .models.report import Report
+from .models.review import Review
+from .models.slide import Slide
+from .models.version import DataVersion
+from .models.user import User, UserBusiness
+from .search import business_index
+
+
+def content(response):
+    # Streamed responses run their queries while the body is read
+    return b''.join(response.streaming_content) if response.streaming else response.content
+
+
+class CodeRedemptionTests(TestCase):
+    def setUp(self):
+        category = Category.objects.create(name='Healthcare')
+        self.business = Business.objects.create(name='Clinique', category=category, country='CM', city='Douala')
+        self.other = Business.objects.create(name='Pharmacie', category=category, country='CM', city='Douala')
+        self.code = self.business.businesscodes.first()
+        self.client = APIClient()
+
+    def post_review(self, **data):
+        payload = {'invitation_code': self.code.invitation_code, 'title': 'Bien', 'text': 'Bon accueil', 'evaluation': 4}
+        payload.update(data)
+        return self.client.post('/reviews/', payload, format='json')
+
+    def test_review_is_bound_to_the_code_business(self):
+        response = self.post_review()
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(Review.objects.get().business, self.business)
+        self.code.refresh_from_db()
+        self.assertFalse(self.code.is_active)
+
+    def test_code_cannot_be_used_twice(self):
+        self.assertEqual(self.post_review().status_code, 201)
+        self.assertEqual(self.post_review().status_code, 400)
+        self.assertEqual(Review.objects.count(), 1)
+
+    def test_mismatched_business_does_not_burn_the_code(self):
+        response = self.post_review(business_id=str(self.other.id))
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Review.objects.exists())
+        self.code.refresh_from_db()
+        self.assertTrue(self.code.is_active)
+
+
+class CodePoolTests(TestCase):
+    """Pools are topped up to their target once, and requested codes come back as CSV."""
+
+    def setUp(self):
+        category = Category.objects.create(name='Healthcare')
+        self.low = Business.objects.create(name='Clinique', category=category)
+        self.enough = Business.objects.create(name='Pharmacie', category=category)
+        self.inactive = Business.objects.create(name='Fermée', category=category, active=False)
+        for business, used in [(self.low, 30), (self.enough, 10), (self.inactive, 30)]:
+            codes = business.businesscodes.values_list('pk', flat=True)[:used]
+            Code.objects.filter(pk__in=list(codes)).update(is_active=False)
+
+    def active_codes(self, business):
+        return business.businesscodes.filter(is_active=True).count()
+
+    def test_replenish_tops_up_low_pools_once(self):
+        target = settings.INVITATION_CODES_PER_BUSINESS
+        out = io.StringIO()
+        call_command('replenish_codes', stdout=out)
+        self.assertIn(f"Replenished 1 businesses with {target - 2} codes", out.getvalue())
+        self.assertEqual(
+            [self.active_codes(business) for business in (self.low, self.enough, self.inactive)], [target, target - 10, 2],
+        )
+        self.assertEqual(Code.replenish_pools(), (0, 0))
+        self.assertEqual(self.active_codes(self.low), target)
+        codes = Code.objects.values_list('invitation_code', flat=True)
+        self.assertEqual(len(set(codes)), len(codes))
+
+    def test_requested_codes_csv(self):
+        user = User.objects.create_user(email='manager@maoni.cm', password='secret', role='manager')
+        UserBusiness.objects.create(user=user, business=self.low)
+        client = APIClient()
+        client.force_authenticate(user)
+        before = set(Code.objects.values_list('invitation_code', flat=True))
+        response = client.post(f'/business/{self.low.pk}/codes/', {'count': 5}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        rows = list(csv.reader(io.StringIO(content(response).decode())))
+        self.assertEqual(rows[0], ['invitation_code', 'created_at'])
+        new = set(Code.objects.filter(business=self.low).values_list('invitation_code', flat=True)) - before
+        self.assertEqual(len(rows), 6)
+        self.assertEqual({row[0] for row in rows[1:]}, new)
+        self.assertEqual(client.post(f'/business/{self.enough.pk}/codes/', {'count': 5}, format='json').status_code, 404)
+
+
+class CodeStatusCacheTests(TestCase):
+    """The Bloom filter is built outside the lock: lookups meanwhile go to the database."""
+
+    def setUp(self):
+        category = Category.objects.create(name='Healthcare')
+        self.business = Business.objects.create(name='Clinique', category=category)
+        self.codes = list(self.business.businesscodes.values_list('invitation_code', flat=True))
+        self.cache = CodeStatusCache()
+
+    def test_lookups_do_not_wait_for_the_build(self):
+        loaded = self.cache._load_filter()
+        release = threading.Event()
+
+        def slow_load():
+            release.wait(5)
+            return loaded
+
+        with mock.patch.object(self.cache, '_load_filter', side_effect=slow_load), \
+                mock.patch('maoniapp.models.code.code_status_cache', self.cache):
+            builder = threading.Thread(target=self.cache.status, args=(self.codes[0],))
+            builder.start()
+            while not self.cache._loading:
+                time.sleep(0.01)
+            # Answered from the database while the build is blocked
+            self.assertTrue(self.cache.status(self.codes[1]))
+            self.assertIsNone(self.cache.status('NOTACODE'))
+            # A write committed during the build is not lost when the filter is installed
+            with self.captureOnCommitCallbacks(execute=True):
+                self.assertEqual(Code.redeem(self.codes[2]), self.business.pk)
+            release.set()
+            builder.join()
+        self.assertIsNotNone(self.cache._filter)
+        with CaptureQueriesContext(connection) as queries:
+            self.assertFalse(self.cache.status(self.codes[2]))
+        self.assertEqual(len(queries), 0)
+        self.assertTrue(self.cache.status(self.codes[3]))
+        self.assertIsNone(self.cache.status('NOTACODE'))
+
+
+class CodeSequenceTests(TestCase):
+    """Counter values map to invitation codes one to one, across code space extensions too."""
+
+    def test_permutation_is_a_bijection(self):
+        for length in (1, 2, 3):
+            permutation = CodePermutation(bytes.fromhex('00' * 31 + '2a'), length)
+            with self.subTest(length=length):
+                values = [permutation.permute(value) for value in range(permutation.capacity)]
+                self.assertEqual(sorted(values), list(range(permutation.capacity)))
+                codes = {permutation.code(value) for value in range(permutation.capacity)}
+                self.assertEqual(len(codes), permutation.capacity)
+                self.assertTrue(all(len(code) == length for code in codes))
+        with self.assertRaises(ValueError):
+            permutation.permute(permutation.capacity)
+
+    def test_extension_never_reissues_a_code(self):
+        category = Category.objects.create(name='Healthcare')
+        business = Business.objects.create(name='Clinique', category=category)
+        # A two-character space (1296 codes) nearly used up
+        CodeSequence.objects.filter(pk=1).update(length=2, next_value=1000)
+        issued = set(Code.objects.values_list('invitation_code', flat=True))
+        for count in (200, 90, 10, 500):
+            codes = [code.invitation_code for code in Code.generate_batch([(business.pk, count)])]
+            self.assertEqual(len(codes), count)
+            self.assertFalse(issued & set(codes))
+            issued.update(codes)
+        sequence = CodeSequence.objects.get(pk=1)
+        # 1000 + 200 + 90 fit; the next 10 start the three-character space, then 500 more
+        self.assertEqual((sequence.length, sequence.next_value), (3, 510))
+        self.assertEqual(Code.objects.filter(business=business).count(), len(issued))
+        sequence.length = CodeSequence.MAX_LENGTH
+        with self.assertRaises(ValueError):
+            sequence.extend()
+
+
+class ReviewStatsTests(TestCase):
+    def test_saving_a_loaded_business_keeps_newer_counters(self):
+        category = Category.objects.create(name='Healthcare')
+        business = Business.objects.create(name='Clinique', category=category)
+        stale = Business.objects.get(pk=business.pk)
+        Review.objects.create(business=business, title='Bien', text='Bon accueil', evaluation=4)
+        stale.description = 'Clinique du centre'
+        stale.save()
+        business.refresh_from_db()
+        self.assertEqual(business.description, 'Clinique du centre')
+        self.assertEqual((business.review_count, business.evaluation_count, business.evaluation_avg), (1, 1, 4))
+
+
+class ReviewStatsLoaderTests(TestCase):
+    """Businesses loaded without their counters get their stats from one grouped query."""
+
+    def setUp(self):
+        # Committed: the data versions are bumped and the category tree can be cached
+        with self.captureOnCommitCallbacks(execute=True):
+            category = Category.objects.create(name='Healthcare')
+            for index, evaluations in enumerate([(4, 5), (3,), ()]):
+                business = Business.objects.create(name=f'Clinique {index}', category=category)
+                for evaluation in evaluations:
+                    Review.objects.create(business=business, title='Avis', text='Bon accueil', evaluation=evaluation)
+            Review.objects.create(business=business, title='Retiré', text='Attente', evaluation=1, active=False)
+        category_tree.nodes()
+
+    def stats(self, data):
+        return [(business['total_reviews'], business['total_evaluation'], business['has_reviews']) for business in data]
+
+    def test_deferred_counters(self):
+        businesses = Business.objects.select_related('category').order_by('name')
+        expected = self.stats(BusinessSerializer(businesses, many=True, context={}).data)
+        self.assertEqual(expected, [(2, Decimal('4.50'), True), (1, Decimal('3.00'), True), (0, Decimal('0.00'), False)])
+        deferred = businesses.defer(*Business.REVIEW_STAT_FIELDS)
+        with CaptureQueriesContext(connection) as queries:
+            data = BusinessSerializer(deferred, many=True, context={}).data
+        self.assertEqual(self.stats(data), expected)
+        # The businesses, then the stats of the whole page
+        self.assertEqual(len(queries), 2)
+
+    def test_deferred_counters_of_nested_businesses(self):
+        reviews = (
+            Review.objects.filter(active=True).select_related('business__category')
+            .defer(*(f'business__{field}' for field in Business.REVIEW_STAT_FIELDS)).prefetch_related('comments')
+        )
+        with CaptureQueriesContext(connection) as queries:
+            data = ReviewSerializer(reviews, many=True, context={}).data
+        self.assertEqual(
+            sorted(review['business']['total_reviews'] for review in data), [1, 2, 2],
+        )
+        self.assertEqual(len(queries), 3)
+
+
+class ConcurrentCodeRedemptionTests(TransactionTestCase):
+    """Many clients submit a review with the same code at once: exactly one must win."""
+    THREADS = 16
+
+    def test_exactly_one_review_wins(self):
+        category = Category.objects.create(name='Healthcare')
+        business = Business.objects.create(name='Clinique', category=category, country='CM', city='Douala')
+        invitation_code = business.businesscodes.first().invitation_code
+        barrier = threading.Barrier(self.THREADS)
+        statuses = []
+
+        def submit():
+            try:
+                barrier.wait()
+                response = APIClient().post('/reviews/', {
+                    'invitation_code': invitation_code, 'title': 'Bien', 'text': 'Bon accueil', 'evaluation': 4,
+                }, format='json')
+                statuses.append(response.status_code)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=submit) for _ in range(self.THREADS)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(statuses), self.THREADS)
+        self.assertEqual(sorted(statuses), [201] + [400] * (self.THREADS - 1), statuses)
+        self.assertEqual(Review.objects.filter(business=business).count(), 1)
+        self.assertFalse(Code.objects.get(invitation_code=invitation_code).is_active)
+        business.refresh_from_db()
+        self.assertEqual(business.review_count, 1)
+
+
+class ConcurrentReviewWriteTests(TransactionTestCase):
+    """Concurrent deactivations or deletions of one review remove its contribution once."""
+    THREADS = 8
+
+    def setUp(self):
+        category = Category.objects.create(name='Healthcare')
+        self.business = Business.objects.create(name='Clinique', category=category, country='CM', city='Douala')
+        Review.objects.create(business=self.business, title='Moyen', text='Attente', evaluation=3)
+        self.review = Review.objects.create(
+            business=self.business, title='Bien', text='Bon accueil', evaluation=4, latitude=4.0511, longitude=9.7679,
+        )
+        self.manager = User.objects.create_user(email='manager@maoni.cm', password='secret', role='manager')
+
+    def race(self, write):
+        barrier = threading.Barrier(self.THREADS)
+        errors = []
+
+        def run():
+            try:
+                barrier.wait()
+                write()
+            except Exception as error:
+                errors.append(error)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=run) for _ in range(self.THREADS)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return errors
+
+    def assertCountsOnlyTheOtherReview(self):
+        self.business.refresh_from_db()
+        self.assertEqual(
+            (self.business.review_count, self.business.evaluation_count, self.business.evaluation_sum), (1, 1, 3),
+        )
+        self.assertEqual(MapCell.objects.filter(count__gt=0).count(), 0)
+        self.assertEqual(MapCell.objects.filter(count__lt=0).count(), 0)
+
+    def test_concurrent_deactivations(self):
+        def deactivate():
+            client = APIClient()
+            client.force_authenticate(self.manager)
+            client.put(f'/deletereview/{self.review.pk}/', {'active': 'false'}, format='json')
+
+        self.assertEqual(self.race(deactivate), [])
+        self.assertFalse(Review.objects.get(pk=self.review.pk).active)
+        self.assertCountsOnlyTheOtherReview()
+
+    def test_concurrent_deletions(self):
+        # Each thread holds its own copy of the review, loaded before any deletion
+        copies = iter([Review.objects.get(pk=self.review.pk) for _ in range(self.THREADS)])
+        lock = threading.Lock()
+
+        def delete():
+            with lock:
+                review = next(copies)
+            review.delete()
+
+        self.assertEqual(self.race(delete), [])
+        self.assertFalse(Review.objects.filter(pk=self.review.pk).exists())
+        self.assertCountsOnlyTheOtherReview()
+
+
+class SearchIndexTests(TestCase):
+    def test_queryset_filters_apply_to_every_match(self):
+        category = Category.objects.create(name='Healthcare')
+        # Many better-ranked matches elsewhere must not crowd out the filtered one
+        Business.objects.bulk_create(
+            Business(name=f'Clinique Clinique {index}', category=category, city='Douala') for index in range(600)
+        )
+        Business.objects.bulk_create([Business(name='Clinique du lac', category=category, city='Yaounde')])
+        business_index.rebuild()
+        found = business_index.filter(Business.objects.filter(city='Yaounde', active=True), 'clin')
+        self.assertEqual([business.name for business in found], ['Clinique du lac'])
+        ranked = list(business_index.filter(Business.objects.all(), 'clin'))
+        self.assertEqual(len(ranked), 601)
+        self.assertEqual(ranked[-1].name, 'Clinique du lac')
+        self.assertEqual([business.search_rank for business in ranked], sorted(business.search_rank for business in ranked))
+
+
+class MapClusterTests(TestCase):
+    """The MapCell rollups follow review writes exactly, and reviews/map/ reads them within bounds."""
+    DOUALA = [(4.0511, 9.7679, 4), (4.0520, 9.7690, 2), (4.0483, 9.7042, None)]
+
+    def setUp(self):
+        category = Category.objects.create(name='Healthcare')
+        self.business = Business.objects.create(name='Clinique', category=category, country='CM', city='Douala')
+        self.reviews = [
+            Review.objects.create(
+                business=self.business, title='Bien', text='Bon accueil', evaluation=evaluation,
+                latitude=latitude, longitude=longitude,
+            )
+            for latitude, longitude, evaluation in self.DOUALA
+        ]
+        Review.objects.create(business=self.business, title='Sans lieu', text='Bon accueil', evaluation=5)
+
+    def rollups(self):
+        return {
+            cell: (count, round(latitudes, 6), round(longitudes, 6), rated, evaluations)
+            for cell, count, latitudes, longitudes, rated, evaluations in MapCell.objects.filter(count__gt=0).values_list(
+                'cell', 'count', 'latitude_sum', 'longitude_sum', 'evaluation_count', 'evaluation_sum',
+            )
+        }
+
+    def assertMatchesRebuild(self):
+        maintained = self.rollups()
+        MapCell.rebuild()
+        self.assertEqual(maintained, self.rollups())
+
+    def test_rollups_follow_create_deactivate_and_delete(self):
+        self.assertMatchesRebuild()
+        self.assertEqual(MapCell.objects.get(precision=1).count, 3)
+        self.reviews[0].active = False
+        self.reviews[0].save()
+        self.assertMatchesRebuild()
+        self.reviews[1].evaluation = 5
+        self.reviews[1].save()
+        self.assertMatchesRebuild()
+        self.reviews[2].delete()
+        self.assertMatchesRebuild()
+        self.assertEqual(MapCell.objects.get(precision=1).count, 1)
+
+    def test_clusters(self):
+        bbox = '9.6,3.9,9.9,4.2'
+        response = self.client.get('/reviews/map/', {'bbox': bbox, 'zoom': 3})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['precision'], 2)
+        [cluster] = response.json()['clusters']
+        self.assertEqual((cluster['count'], cluster['evaluation_avg']), (3, 3.0))
+        # Close up, the reviews ~7 km apart fall in different cells
+        clusters = self.client.get('/reviews/map/', {'bbox': bbox, 'zoom': 12}).json()['clusters']
+        self.assertEqual(sorted(cluster['count'] for cluster in clusters), [1, 2])
+
+    def test_bbox_too_large_for_the_zoom(self):
+        self.assertEqual(self.client.get('/reviews/map/', {'bbox': '-180,-90,180,90', 'zoom': 3}).status_code, 200)
+        for zoom in (6, 22):
+            with self.subTest(zoom=zoom):
+                response = self.client.get('/reviews/map/', {'bbox': '-180,-90,180,90', 'zoom': zoom})
+                self.assertEqual(response.status_code, 400)
+
+
+class ReviewSearchTests(TestCase):
+    """reviews/search/ matches without accents, leaves out deactivated reviews and takes any input."""
+
+    def setUp(self):
+        category = Category.objects.create(name='Healthcare')
+        business = Business.objects.create(name='Clinique', category=category)
+        self.review = Review.objects.create(
+            business=business, title='Très bon accueil', text="L'équipe de l'hôpital est <b>attentive</b>", evaluation=5,
+        )
+        Review.objects.create(business=business, title='Attente', text='Personnel désagréable', evaluation=2)
+        self.manager = User.objects.create_user(email='manager@maoni.cm', password='secret', role='manager')
+        UserBusiness.objects.create(user=self.manager, business=business)
+        self.client = APIClient()
+        self.client.force_authenticate(self.manager)
+
+    def search(self, text):
+        response = self.client.get('/reviews/search/', {'q': text})
+        self.assertEqual(response.status_code, 200, text)
+        return response.json()['results']
+
+    def test_diacritics_are_ignored(self):
+        for text in ('hopital', 'HÔPITAL', 'tres bon', 'equi'):
+            with self.subTest(text=text):
+                [result] = self.search(text)
+                self.assertEqual(result['id'], str(self.review.pk))
+        [result] = self.search('hopital')
+        self.assertEqual(result['search']['title'], 'Très bon accueil')
+        self.assertIn("<mark>hôpital</mark>", result['search']['snippet'])
+        # Review text is escaped before the marks are added
+        self.assertIn('&lt;b&gt;attentive&lt;/b&gt;', result['search']['snippet'])
+        self.assertEqual([result['search']['title'] for result in self.search('desagreable')], ['Attente'])
+
+    def test_deactivated_reviews_are_not_found(self):
+        self.assertEqual(len(self.search('accueil')), 1)
+        response = self.client.put(f'/deletereview/{self.review.pk}/', {'active': 'false'}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.search('accueil'), [])
+
+    def test_fts_syntax_in_the_input(self):
+        for text in ('"', '"bon', 'bon"accueil', 'bon*', '*', 'NEAR(bon accueil)', 'bon AND', 'OR', '^bon', ')(', 'title:bon'):
+            with self.subTest(text=text):
+                self.search(text)
+        # Operators are plain words: quotes around words still find them
+        self.assertEqual(len(self.search('"bon accueil"')), 1)
+
+
+class AutocompleteTests(SimpleTestCase):
+    def setUp(self):
+        self.autocomplete = Autocomplete()
+        self.ids = {}
+        entries = [
+            self.entry('Pharmacie du Centre', 12),
+            self.entry('Pharmacie Saint-Jean', 30),
+            self.entry('Église Évangélique', 3),
+            self.entry('Clinique de la Cathédrale', 8),
+            self.entry('Banque Atlantique', 50),
+        ]
+        # Enough keys under "hotel" to use the precomputed top lists
+        entries += [self.entry(f'Hotel {index:03d}', index) for index in range(Autocomplete.HEAVY + 20)]
+        self.autocomplete.load(entries)
+
+    def entry(self, name, review_count):
+        business_id = self.ids.setdefault(name, uuid.uuid4())
+        return Autocomplete.entry(business_id, name, 'Douala', 'CM', None, review_count)
+
+    def names(self, text, limit=None):
+        return [entry['name'] for entry in self.autocomplete.suggest(text, limit)]
+
+    def test_prefixes_of_every_word_most_reviewed_first(self):
+        self.assertEqual(self.names('pharm'), ['Pharmacie Saint-Jean', 'Pharmacie du Centre'])
+        self.assertEqual(self.names('centre'), ['Pharmacie du Centre'])
+        self.assertEqual(self.names('  EGLISE evang'), ['Église Évangélique'])
+        self.assertEqual(self.names('hotel', 3), ['Hotel 275', 'Hotel 274', 'Hotel 273'])
+        self.assertEqual(self.names('hotel 00'), [f'Hotel 00{index}' for index in range(9, -1, -1)])
+        self.assertEqual(self.names(''), [])
+
+    def test_fuzzy_matches_come_after_exact_ones(self):
+        self.assertEqual(self.names('phramacie'), ['Pharmacie Saint-Jean', 'Pharmacie du Centre'])
+        self.assertEqual(self.names('banqe'), ['Banque Atlantique'])
+        self.assertEqual(self.names('cathedrle'), ['Clinique de la Cathédrale'])
+        # One edit allowed below FUZZY_TWO_EDITS characters
+        self.assertEqual(self.names('bnqe'), [])
+
+    def test_incremental_updates_match_a_rebuild(self):
+        self.autocomplete.update(self.entry('Pharmacie du Centre', 100))
+        self.autocomplete.update(self.entry('Hotel Mont Fébé', 1000))
+        self.autocomplete.update(self.entry('Hotel 275', 0))
+        self.autocomplete.remove(self.ids['Hotel 274'])
+        self.autocomplete.remove(self.ids['Banque Atlantique'])
+        self.assertEqual(self.names('pharm'), ['Pharmacie du Centre', 'Pharmacie Saint-Jean'])
+        self.assertEqual(self.names('hotel', 3), ['Hotel Mont Fébé', 'Hotel 273', 'Hotel 272'])
+        self.assertEqual(self.names('febe'), ['Hotel Mont Fébé'])
+        self.assertEqual(self.names('banque'), [])
+        state = self.autocomplete._state
+        rebuilt = self.autocomplete.build(state['by_id'].values())
+        self.assertEqual(state['keys'], rebuilt['keys'])
+        self.assertEqual(state['top'], rebuilt['top'])
+
+    def test_a_batch_of_updates_copies_the_index_once(self):
+        state = self.autocomplete._state
+        for index in range(0, Autocomplete.HEAVY + 20, 2):
+            self.autocomplete.update(self.entry(f'Hotel {index:03d}', 500 + index))
+        self.autocomplete.update(self.entry('Hotel 001', 2000))
+        self.autocomplete.remove(self.ids['Hotel 001'])
+        self.autocomplete.update(self.entry('Pharmacie Saint-Jean', 30))
+        # Queued, not applied: the next search applies them in one copy
+        self.assertIs(self.autocomplete._state, state)
+        self.assertEqual(self.names('hotel', 3), ['Hotel 274', 'Hotel 272', 'Hotel 270'])
+        self.assertEqual(self.names('hotel 00', 3), ['Hotel 008', 'Hotel 006', 'Hotel 004'])
+        self.assertEqual(self.names('pharm'), ['Pharmacie Saint-Jean', 'Pharmacie du Centre'])
+        state = self.autocomplete._state
+        self.assertEqual(self.autocomplete._pending, {})
+        rebuilt = self.autocomplete.build(state['by_id'].values())
+        self.assertEqual(state['keys'], rebuilt['keys'])
+        self.assertEqual(state['top'], rebuilt['top'])
+
+    def test_one_thread_refreshes_while_the_others_use_the_old_index(self):
+        release = threading.Event()
+
+        def slow_entries():
+            release.wait(5)
+            return [self.entry('Pharmacie Nouvelle', 1)]
+
+        self.autocomplete._loaded_at -= Autocomplete.REFRESH_INTERVAL
+        with mock.patch.object(self.autocomplete, '_load_entries', side_effect=slow_entries) as load:
+            refresher = threading.Thread(target=self.autocomplete.suggest, args=('pharm',))
+            refresher.start()
+            while not self.autocomplete._build_lock.locked():
+                time.sleep(0.01)
+            for _ in range(5):
+                self.assertEqual(self.names('pharm'), ['Pharmacie Saint-Jean', 'Pharmacie du Centre'])
+            release.set()
+            refresher.join()
+        self.assertEqual(load.call_count, 1)
+        self.assertEqual(self.names('pharm'), ['Pharmacie Nouvelle'])
+
+
+class CategoryPathTests(TestCase):
+    """Materialized paths follow moves, and subtree filters take exactly the descendants."""
+
+    def category(self, name, hex_id, parent=None):
+        return Category.objects.create(id=uuid.UUID(hex_id), name=name, parent=parent)
+
+    def setUp(self):
+        # Siblings whose ids sort right before and right after the filtered category
+        self.root = self.category('Health', '1' * 32)
+        self.target = self.category('Clinics', 'a' * 32, self.root)
+        self.child = self.category('Dental', '2' * 32, self.target)
+        self.grandchild = self.category('Orthodontics', '3' * 32, self.child)
+        self.before = self.category('Pharmacies', 'a' * 31 + '9', self.root)
+        self.after = self.category('Hospitals', 'a' * 31 + 'b', self.root)
+        self.after_child = self.category('Maternity', '4' * 32, self.after)
+        categories = [self.target, self.child, self.grandchild, self.grandchild, self.before, self.after, self.after_child]
+        for index, category in enumerate(categories):
+            business = Business.objects.create(name=f'{category.name} {index}', category=category)
+            Review.objects.create(business=business, title='Bien', text='Bon accueil', evaluation=4)
+        self.client = APIClient()
+
+    def path(self, *categories):
+        return '/' + ''.join(f'{category.id.hex}/' for category in categories)
+
+    def test_move_rewrites_the_descendants(self):
+        other = self.category('Care', '5' * 32)
+        self.target.parent = other
+        self.target.save()
+        for category, ancestors in [
+            (self.target, (other, self.target)),
+            (self.child, (other, self.target, self.child)),
+            (self.grandchild, (other, self.target, self.child, self.grandchild)),
+            (self.after_child, (self.root, self.after, self.after_child)),
+        ]:
+            category.refresh_from_db()
+            with self.subTest(category=category.name):
+                self.assertEqual(category.path, self.path(*ancestors))
+                self.assertEqual(category.depth, len(ancestors) - 1)
+        self.grandchild.refresh_from_db()
+        self.target.parent = self.grandchild
+        with self.assertRaises(ValidationError):
+            self.target.save()
+
+    def test_subtree_filter(self):
+        subtree = {self.target.pk, self.child.pk, self.grandchild.pk}
+        found = Category.objects.filter(Category.subtree_q(self.target.path)).values_list('pk', flat=True)
+        self.assertEqual(set(found), subtree)
+        businesses = self.client.get('/filter-businesses/', {'category': 'Clinics', 'subtree': 'true'}).json()
+        self.assertEqual(
+            sorted(business['category_name'] for business in businesses), ['Clinics', 'Dental', 'Orthodontics', 'Orthodontics'],
+        )
+        counts = self.client.get('/category-business-count/', {'category': 'Clinics'}).json()
+        self.assertEqual(sorted(category['name'] for category in counts), ['Clinics', 'Dental', 'Orthodontics'])
+
+    def test_rollup_counts(self):
+        counts = {
+            category['name']: category['business_count']
+            for category in self.client.get('/category-business-count/', {'rollup': 'true'}).json()
+        }
+        self.assertEqual(counts, {
+            'Health': 7, 'Clinics': 4, 'Dental': 3, 'Orthodontics': 2,
+            'Pharmacies': 1, 'Hospitals': 2, 'Maternity': 1,
+        })
+
+
+class QueryPlanTests(TestCase):
+    """
+    Runs EXPLAIN QUERY PLAN on every query issued by the list endpoints and fails when one of
+    them reads a whole table: a plain SCAN, or an index walk without LIMIT (a LIMITed walk in
+    index order stops after one page). Full reads are only allowed on the small reference
+    tables loaded in memory, and on the tables an endpoint lists in full by design.
+    """
+    REFERENCE_TABLES = {'maoniapp_category', 'maoniapp_language', 'maoniapp_translation'}
+    # (url, tables the endpoint may read in full)
+    ENDPOINTS = [
+        ('/reviews/', set()),
+        ('/business-reviews-list/?businesscategory=Healthcare&country=CM&city=Douala', set()),
+        ('/business-reviews-list/?businessname=clin', set()),
+        # No filter: the review counters of every active business give the total
+        ('/business-reviews-list/', {'maoniapp_business'}),
+        ('/filter-business-reviews-by-name/', set()),
+        ('/filter-business-reviews-by-name/?businessname=clin', set()),
+        ('/businessnames/', set()),
+        ('/businessnames/?name=clin', set()),
+        ('/business-with-reviews/?name=clin', set()),
+        # Unpaginated lists of every active business
+        ('/businesses/', {'maoniapp_business'}),
+        ('/businessesbrand/', {'maoniapp_business'}),
+        ('/filter-businesses/?category=Healthcare&country=CM&city=Douala', set()),
+        ('/filter-businesses/?category=Healthcare&subtree=true', set()),
+        ('/user-businesses/', set()),
+        ('/users/same-business/', set()),
+        ('/user/reviews/', set()),
+        ('/reports/', set()),
+        ('/categories/', set()),
+        ('/category-business-count/', set()),
+        ('/filtercategoryname/?name=health', set()),
+        ('/reviews/{review}/comments/', set()),
+        ('/reviews/search/?q=bien', set()),
+        ('/reviews/nearby/?lat=4.05&lon=9.7', set()),
+        ('/reviews/nearby/?bbox=9.6,4,9.8,4.1', set()),
+        ('/reviews/map/?bbox=9,4,10,5&zoom=10', set()),
+        ('/business/{business}/related/', set()),
+        ('/translations/?lang=fr', set()),
+    ]
+    SCAN = re.compile(r'^SCAN (\w+)(?: AS \w+)?(?: USING (?:COVERING )?INDEX \w+)?$')
+
+    def setUp(self):
+        category = Category.objects.create(name='Healthcare')
+        self.business = Business.objects.create(name='Clinique', category=category, country='CM', city='Douala')
+        other = Business.objects.create(name='Pharmacie', category=category, country='CM', city='Douala')
+        user = User.objects.create_user(email='manager@maoni.cm', password='secret', role='manager')
+        colleague = User.objects.create_user(email='colleague@maoni.cm', password='secret', role='manager')
+        UserBusiness.objects.create(user=user, business=self.business)
+        UserBusiness.objects.create(user=colleague, business=self.business)
+        self.review = Review.objects.create(
+            business=self.business, title='Bien', text='Bon accueil', evaluation=4, latitude=4.05, longitude=9.7
+        )
+        Review.objects.create(business=other, title='Bien', text='Attente longue', evaluation=3)
+        Comment.objects.create(review=self.review, user=user, text='Merci')
+        Translation.objects.create(language=Language.objects.create(code='fr', name='Français'), key='Cameroon', value='Cameroun')
+        Report.objects.create(business=self.business, title='Mars')
+        self.client = APIClient()
+        self.client.force_authenticate(user)
+
+    def full_scans(self, sql):
+        # Alias des sous-requêtes Django ("maoniapp_business" U0) -> table
+        aliases = dict((alias, table) for table, alias in re.findall(r'"(\w+)" (U\d+)\b', sql))
+        with connection.cursor() as cursor:
+            cursor.execute('EXPLAIN QUERY PLAN ' + sql)
+            details = [row[3] for row in cursor.fetchall()]
+        limited = re.search(r'\bLIMIT\b', sql) is not None
+        tables = set()
+        for detail in details:
+            match = self.SCAN.match(detail)
+            if match and not (limited and 'INDEX' in detail):
+                tables.add(aliases.get(match.group(1), match.group(1)))
+        return tables
+
+    def test_list_endpoints_do_not_scan_tables(self):
+        for url, allowed in self.ENDPOINTS:
+            url = url.format(review=self.review.pk, business=self.business.pk)
+            with self.subTest(url=url):
+                with CaptureQueriesContext(connection) as queries:
+                    response = self.client.get(url)
+                    content(response)
+                self.assertEqual(response.status_code, 200)
+                for query in queries.captured_queries:
+                    if not query['sql'].startswith('SELECT'):
+                        continue
+                    scanned = self.full_scans(query['sql']) - self.REFERENCE_TABLES - allowed
+                    self.assertFalse(scanned, f"{url} scans {sorted(scanned)}: {query['sql']}")
+
+
+class QueryBudgetTests(TestCase):
+    """
+    Every list endpoint runs a fixed number of queries, whatever the number of rows on the
+    page: the budget must hold with one business and still hold, unchanged, with five.
+    """
+    # Each includes one version check of the in-memory category tree (maoniapp/cache.py)
+    BUDGETS = [
+        ('/reviews/', 3),
+        ('/business-reviews-list/?page_size=50', 4),
+        ('/user/reviews/?page_size=50', 4),
+        ('/users/same-business/', 4),
+        ('/user-businesses/', 3),
+        ('/filter-businesses/?category=Healthcare', 2),
+        # Conditional GET: the data versions, then the list
+        ('/businessesbrand/', 2),
+    ]
+
+    def setUp(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.category = Category.objects.create(name='Healthcare')
+            self.user = User.objects.create_user(email='manager@maoni.cm', password='secret', role='manager')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.added = 0
+
+    def add_businesses(self, count):
+        # Each business: a subcategory or not, a colleague, two reviews with one comment each
+        with self.captureOnCommitCallbacks(execute=True):
+            for _ in range(count):
+                self.added += 1
+                subcategory = Category.objects.create(name=f'Clinics {self.added}', parent=self.category)
+                business = Business.objects.create(
+                    name=f'Clinique {self.added}', category=self.category if self.added % 2 else subcategory,
+                    country='CM', city='Douala',
+                )
+                colleague = User.objects.create_user(email=f'colleague{self.added}@maoni.cm', password='secret', role='manager')
+                UserBusiness.objects.create(user=self.user, business=business)
+                UserBusiness.objects.create(user=colleague, business=business)
+                for _ in range(2):
+                    review = Review.objects.create(business=business, title='Bien', text='Bon accueil', evaluation=4)
+                    Comment.objects.create(review=review, user=colleague, text='Merci')
+
+    def count_queries(self, url):
+        # First call fills the in-memory caches (category tree): only the steady state counts
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        content(response)
+        with CaptureQueriesContext(connection) as queries:
+            content(self.client.get(url))
+        return len(queries.captured_queries)
+
+    def test_query_count_does_not_grow_with_the_page(self):
+        self.add_businesses(1)
+        small = {url: self.count_queries(url) for url, _ in self.BUDGETS}
+        self.add_businesses(4)
+        for url, budget in self.BUDGETS:
+            with self.subTest(url=url):
+                self.assertLessEqual(small[url], budget)
+                self.assertEqual(self.count_queries(url), small[url])
+
+
+class SparseFieldsTests(TestCase):
+    """?fields= and ?expand= shape the response and narrow what is read from the database."""
+
+    def setUp(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            category = Category.objects.create(name='Healthcare')
+            user = User.objects.create_user(email='manager@maoni.cm', password='secret', role='manager')
+            for index in range(3):
+                business = Business.objects.create(name=f'Clinique {index}', category=category, country='CM', city='Douala')
+                review = Review.objects.create(business=business, title='Bien', text='Bon accueil', evaluation=4)
+                Comment.objects.create(review=review, user=user, text='Merci')
+        self.client = APIClient()
+
+    def get(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200, response.content)
+        return json.loads(content(response))
+
+    def test_response_shape(self):
+        review = self.get('/reviews/')[0]
+        self.assertIn('comments', review)
+        self.assertIn('total_reviews', review['business'])
+        self.assertEqual(set(self.get('/reviews/?fields=id,title')[0]), {'id', 'title'})
+        review = self.get('/reviews/?fields=id,business.name,business.total_reviews')[0]
+        self.assertEqual(set(review), {'id', 'business'})
+        self.assertEqual(set(review['business']), {'name', 'total_reviews'})
+        # ?expand= alone: every plain field, and only the requested nested objects
+        review = self.get('/reviews/?expand=business')[0]
+        self.assertIn('text', review)
+        self.assertIn('business', review)
+        self.assertNotIn('comments', review)
+        self.assertNotIn('business', self.get('/reviews/?expand=comments')[0])
+        self.assertEqual(set(self.get('/filter-businesses/?category=Healthcare&fields=id,name')[0]), {'id', 'name'})
+
+    def test_unknown_names_are_rejected(self):
+        for url, message in [
+            ('/reviews/?fields=id,nope', {'fields': ['Unknown field: nope']}),
+            ('/reviews/?fields=business.nope', {'fields': ['Unknown field: business.nope']}),
+            ('/reviews/?expand=nope', {'expand': ['Unknown field: nope']}),
+            ('/reviews/?fields=business_id', {'fields': ['Unknown field: business_id']}),
+            ('/filter-businesses/?category=Healthcare&fields=name,nope', {'fields': ['Unknown field: nope']}),
+        ]:
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertEqual(response.status_code, 400)
+                self.assertEqual(response.json(), message)
+
+    def test_preload_reads_only_the_requested_columns(self):
+        queryset = ReviewSerializer.preload(Review.objects.all(), {'fields': 'id,title'})
+        self.assertEqual(queryset.query.deferred_loading, ({'id', 'title'}, False))
+        self.assertFalse(queryset.query.select_related)
+        self.assertEqual(queryset._prefetch_related_lookups, ())
+
+        queryset = ReviewSerializer.preload(Review.objects.all(), {'fields': 'id,business.name'})
+        self.assertEqual(queryset.query.deferred_loading, ({'id', 'business', 'business__id', 'business__name'}, False))
+        self.assertEqual(queryset.query.select_related, {'business': {}})
+
+        # Without the parameters every column is loaded, with the comments
+        queryset = ReviewSerializer.preload(Review.objects.all(), {})
+        self.assertEqual(queryset.query.deferred_loading, (frozenset(), True))
+        self.assertIn('comments', queryset._prefetch_related_lookups)
+
+    def test_query_count_and_columns(self):
+        self.get('/reviews/')  # In-memory caches (category tree), then one version check per request
+        for url, budget in [('/reviews/', 3), ('/reviews/?fields=id,title', 1), ('/reviews/?expand=business', 2)]:
+            with self.subTest(url=url):
+                with CaptureQueriesContext(connection) as queries:
+                    self.get(url)
+                self.assertEqual(len(queries), budget)
+        with CaptureQueriesContext(connection) as queries:
+            self.get('/reviews/?fields=id,title')
+        select = queries.captured_queries[0]['sql']
+        self.assertTrue(select.startswith('SELECT "maoniapp_review"."id", "maoniapp_review"."title" FROM'), select)
+
+
+class KeysetPaginationTests(TestCase):
+    """Walking the next cursors visits every row once, ties on the sort key included."""
+
+    def setUp(self):
+        category = Category.objects.create(name='Healthcare')
+        Business.objects.bulk_create(
+            [Business(name=f'Clinique {index}', category=category) for index in range(11)]
+            + [Business(name=f'Pharmacie {index}', category=category) for index in range(4)]
+        )
+        # Three groups of rows sharing their created_at
+        now = timezone.now().replace(microsecond=0)
+        for index, business in enumerate(Business.objects.all()):
+            Business.objects.filter(pk=business.pk).update(created_at=now - timezone.timedelta(seconds=index % 3))
+        business_index.rebuild()
+        self.client = APIClient()
+
+    def walk(self, url, key='next'):
+        rows, pages = [], 0
+        while url:
+            data = self.client.get(url).json()
+            rows.extend(row['id'] for row in data['results'])
+            url, pages = data[key], pages + 1
+        return rows, pages
+
+    def test_every_row_once(self):
+        rows, pages = self.walk('/businessnames/?page_size=4')
+        self.assertEqual(len(rows), 15)
+        self.assertEqual(set(rows), {str(pk) for pk in Business.objects.values_list('pk', flat=True)})
+        self.assertEqual(pages, 4)
+        expected = Business.objects.order_by('-created_at', '-id').values_list('pk', flat=True)
+        self.assertEqual(rows, [str(pk) for pk in expected])
+
+    def test_previous_cursors_walk_back(self):
+        url = '/businessnames/?page_size=4'
+        for _ in range(3):
+            last = self.client.get(url).json()
+            url = last['next']
+        last = self.client.get(url).json()
+        back, _ = self.walk(last['previous'], key='previous')
+        forward, _ = self.walk('/businessnames/?page_size=4')
+        # The previous pages, nearest first, each in its forward order
+        self.assertEqual(back, forward[8:12] + forward[4:8] + forward[:4])
+
+    def test_ranked_search_cursor(self):
+        rows, _ = self.walk('/filter-business-reviews-by-name/?businessname=clin&page_size=3')
+        self.assertEqual(len(rows), 11)
+        self.assertEqual(len(set(rows)), 11)
+        ranked = business_index.filter(Business.objects.filter(active=True), 'clin')
+        self.assertEqual(rows, [str(business.pk) for business in ranked.order_by('search_rank', 'id')])
+
+    def test_bad_cursors(self):
+        def cursor(data):
+            return base64.urlsafe_b64encode(data.encode()).decode().rstrip('=')
+
+        cursors = [
+            'garbage', '!!!', cursor('not json'), cursor('null'), cursor('[]'), cursor('{"p":[],"r":0}'),
+            cursor('{"p":"ab","r":0}'), cursor('{"p":["yesterday","x"],"r":0}'), cursor('{"p":[[1],{"a":1}],"r":0}'),
+            cursor('{"p":[1.5,null],"r":0}'),
+        ]
+        for url in ('/businessnames/?', '/filter-business-reviews-by-name/?businessname=clin&'):
+            for value in cursors:
+                with self.subTest(url=url, cursor=value):
+                    response = self.client.get(url + urlencode({'cursor': value}))
+                    self.assertEqual(response.status_code, 400)
+                    self.assertIn('cursor', response.json())
+
+
+class RowMapperTests(TestCase):
+    """The fast read path renders the same bytes as the serializers it replaces."""
+    URLS = [
+        '/businessesbrand/',
+        '/category-business-count/',
+        '/category-business-count/?category=Healthcare&limit=1&offset=1',
+        '/filter-businesses/?category=Healthcare',
+        '/filter-businesses/?category=Healthcare&subtree=true&lang=fr',
+        '/filter-businesses/?category=Healthcare&fields=id,name,countrynamecode,total_evaluation',
+        '/reviews/',
+        '/reviews/?lang=fr',
+        '/reviews/?fields=id,title,business.name,business.logo,comments',
+        '/reviews/?expand=business',
+    ]
+
+    def setUp(self):
+        category = Category.objects.create(name='Healthcare')
+        subcategory = Category.objects.create(name='Clinics', parent=category)
+        Category.objects.create(name='Banks')
+        user = User.objects.create_user(email='manager@maoni.cm', password='secret', role='manager')
+        clinic = Business.objects.create(
+            name='Clinique', category=subcategory, country='CM', city='Douala', logo='businesslogo/clinique.png',
+            website='https://clinique.cm', isverified=True,
+        )
+        pharmacy = Business.objects.create(name='Pharmacie', category=category, country='XX', description=None)
+        Business.objects.create(name='Fermée', category=category, active=False)
+        for business, evaluation, record in [(clinic, 4, 'records/a.mp3'), (clinic, 3, None), (clinic, 3, ''), (pharmacy, None, None)]:
+            review = Review.objects.create(
+                business=business, title='Bien', text='Bon accueil', evaluation=evaluation, record=record,
+                latitude=4.05 if record else None, longitude=9.7 if record else None, contact='+237600000000',
+            )
+            Comment.objects.create(review=review, user=user if record else None, text='Merci')
+        Translation.objects.create(language=Language.objects.create(code='fr', name='Français'), key='Cameroon', value='Cameroun')
+
+    def test_fast_path_matches_the_serializers(self):
+        client = APIClient()
+        for url in self.URLS:
+            with self.subTest(url=url):
+                fast = client.get(url)
+                with mock.patch.object(RowMapperListMixin, 'use_row_mapper', False), \
+                        mock.patch.object(BusinessBrandListView, 'use_row_mapper', False):
+                    slow = client.get(url)
+                    slow_content = content(slow)
+                self.assertEqual(fast.status_code, 200)
+                self.assertEqual(content(fast), slow_content)
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'two-tier-tests'}})
+class TwoTierCacheTests(TestCase):
+    """Entries are keyed by the version stamp of their models: a write is never followed by a stale read."""
+    MODELS = (Business, Review, Category, Translation, Slide, Banner)
+
+    def setUp(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.category = Category.objects.create(name='Healthcare')
+            self.business = Business.objects.create(name='Clinique', category=self.category)
+            self.language = Language.objects.create(code='fr', name='Français')
+        self.cache = TwoTierCache()
+        # A second process: its own LRU, the same shared backend
+        self.other = TwoTierCache()
+        self.addCleanup(self.cache.shared.clear)
+
+    def snapshot(self, cache):
+        return cache.get_or_set('snapshot', self.MODELS, lambda: {
+            'businesses': sorted(Business.objects.values_list('name', flat=True)),
+            'reviews': sorted(Review.objects.values_list('title', flat=True)),
+            'categories': sorted(Category.objects.values_list('name', flat=True)),
+            'translations': sorted(Translation.objects.values_list('value', flat=True)),
+            'slides': sorted(Slide.objects.values_list('title', flat=True)),
+            'banners': sorted(Banner.objects.values_list('title', flat=True)),
+        })
+
+    def test_computed_once_then_served_from_either_tier(self):
+        compute = mock.Mock(return_value=['Clinique'])
+        self.assertEqual(self.cache.get_or_set('names', (Business,), compute), ['Clinique'])
+        self.assertEqual(self.cache.get_or_set('names', (Business,), compute), ['Clinique'])
+        self.assertEqual(self.other.get_or_set('names', (Business,), compute), ['Clinique'])
+        self.assertEqual(compute.call_count, 1)
+        # Local hit: only the version stamp is read
+        with CaptureQueriesContext(connection) as queries:
+            self.cache.get_or_set('names', (Business,), compute)
+        self.assertEqual(len(queries), 1)
+
+    def test_models_never_written_are_cached_without_writing(self):
+        # Their versions come from the migration, not from the first read
+        compute = mock.Mock(return_value=[])
+        with CaptureQueriesContext(connection) as queries:
+            self.cache.get_or_set('slides', (Slide, Banner), compute)
+            self.cache.get_or_set('slides', (Slide, Banner), compute)
+        self.assertEqual(compute.call_count, 1)
+        self.assertTrue(all(query['sql'].startswith('SELECT') for query in queries))
+
+    def test_no_stale_read_after_a_write(self):
+        review = Review.objects.create(business=self.business, title='Bien', text='Bon accueil', evaluation=4)
+        translation = Translation.objects.create(language=self.language, key='Cameroon', value='Cameroun')
+        slide = Slide.objects.create(title='Accueil')
+        banner = Banner.objects.create(title='Promo')
+        writes = [
+            ('businesses', lambda: Business.objects.create(name='Pharmacie', category=self.category), 'Pharmacie'),
+            ('reviews', lambda: Review.objects.create(business=self.business, title='Moyen', text='Attente'), 'Moyen'),
+            ('categories', lambda: Category.objects.create(name='Banks'), 'Banks'),
+            ('translations', lambda: Translation.objects.create(language=self.language, key='Chad', value='Tchad'), 'Tchad'),
+            ('slides', lambda: Slide.objects.create(title='Nouveau'), 'Nouveau'),
+            ('banners', lambda: Banner.objects.create(title='Soldes'), 'Soldes'),
+        ]
+        updates = [
+            ('reviews', review, 'title', 'Excellent'),
+            ('translations', translation, 'value', 'Le Cameroun'),
+            ('slides', slide, 'title', 'Bienvenue'),
+            ('banners', banner, 'title', 'Offre'),
+            ('businesses', self.business, 'name', 'Clinique du Centre'),
+            ('categories', self.category, 'name', 'Santé'),
+        ]
+        for key, write, expected in writes:
+            with self.subTest(create=key):
+                self.snapshot(self.cache), self.snapshot(self.other)
+                write()
+                self.assertIn(expected, self.snapshot(self.cache)[key])
+                self.assertIn(expected, self.snapshot(self.other)[key])
+        for key, instance, field, value in updates:
+            with self.subTest(update=key):
+                self.snapshot(self.cache), self.snapshot(self.other)
+                setattr(instance, field, value)
+                instance.save()
+                self.assertIn(value, self.snapshot(self.cache)[key])
+                self.assertIn(value, self.snapshot(self.other)[key])
+        for key, instance, field, value in reversed(updates):
+            with self.subTest(delete=key):
+                self.snapshot(self.cache), self.snapshot(self.other)
+                instance.delete()
+                self.assertNotIn(value, self.snapshot(self.cache)[key])
+                self.assertNotIn(value, self.snapshot(self.other)[key])
+
+    def test_rolled_back_writes_do_not_leak(self):
+        self.snapshot(self.cache)
+        with transaction.atomic():
+            Category.objects.create(name='Banks')
+            self.assertIn('Banks', self.snapshot(self.cache)['categories'])
+            transaction.set_rollback(True)
+        self.assertNotIn('Banks', self.snapshot(self.cache)['categories'])
+        self.assertNotIn('Banks', self.snapshot(self.other)['categories'])
+        # The next write gets the rolled back version number again, with another stamp
+        Category.objects.create(name='Insurance')
+        self.assertEqual(self.snapshot(self.other)['categories'], ['Healthcare', 'Insurance'])
+
+    def test_endpoints_follow_writes(self):
+        client = APIClient()
+        Translation.objects.create(language=self.language, key='Cameroon', value='Cameroun')
+        self.assertEqual([node['name'] for node in client.get('/categories/').json()], ['Healthcare'])
+        self.assertEqual(client.get('/translations/?lang=fr').json()['translations'], {'Cameroon': 'Cameroun'})
+        Category.objects.create(name='Banks', parent=self.category)
+        Translation.objects.filter(key='Cameroon').get().delete()
+        self.assertEqual([node['name'] for node in client.get('/categories/').json()], ['Healthcare', 'Banks'])
+        self.assertEqual(client.get('/translations/?lang=fr').json()['translations'], {})
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'single-flight-tests'}})
+class TranslationViewTests(TestCase):
+    """translations/ serves exact language codes, ETags clients can revalidate and deltas."""
+
+    def setUp(self):
+        self.language = Language.objects.create(code='fr-FR', name='Français')
+        Translation.objects.create(language=self.language, key='Cameroon', value='Cameroun')
+        Translation.objects.create(language=self.language, key='Chad', value='Tchad')
+        self.client = APIClient()
+
+    def test_exact_language_code(self):
+        data = self.client.get('/translations/?lang=fr-FR').json()
+        self.assertEqual(data['language'], 'fr-FR')
+        self.assertEqual(data['translations'], {'Cameroon': 'Cameroun', 'Chad': 'Tchad'})
+        for code in ('fr-fr', 'FR-FR', 'fr'):
+            with self.subTest(code=code):
+                self.assertEqual(self.client.get('/translations/', {'lang': code}).status_code, 404)
+
+    def test_etag_round_trip(self):
+        response = self.client.get('/translations/?lang=fr-FR')
+        etag = response['ETag']
+        self.assertEqual(etag, f'"{response.json()["version"]}"')
+        self.assertEqual(self.client.get('/translations/?lang=fr-FR', HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        Translation.objects.create(language=self.language, key='Gabon', value='Gabon')
+        response = self.client.get('/translations/?lang=fr-FR', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_delta_since_a_version(self):
+        since = self.client.get('/translations/?lang=fr-FR').json()['version']
+        Translation.objects.filter(key='Cameroon').get().delete()
+        chad = Translation.objects.get(key='Chad')
+        chad.value = 'le Tchad'
+        chad.save()
+        Translation.objects.create(language=self.language, key='Gabon', value='Gabon')
+        current = self.client.get('/translations/?lang=fr-FR').json()['version']
+        delta = self.client.get('/translations/', {'lang': 'fr-FR', 'since': since}).json()
+        self.assertEqual(delta, {
+            'language': 'fr-FR', 'version': current, 'since': since,
+            'changed': {'Chad': 'le Tchad', 'Gabon': 'Gabon'}, 'removed': ['Cameroon'],
+        })
+        # Unknown version: the full bundle
+        full = self.client.get('/translations/', {'lang': 'fr-FR', 'since': 'unknown'}).json()
+        self.assertEqual(full['translations'], {'Chad': 'le Tchad', 'Gabon': 'Gabon'})
+
+
+class ProcessStateTests(TestCase):
+    """The in-memory category tree and translations follow writes that fire no signal in this process."""
+
+    def setUp(self):
+        self.category = Category.objects.create(name='Healthcare')
+        self.translation = Translation.objects.create(
+            language=Language.objects.create(code='fr', name='Français'), key='Cameroon', value='Cameroun',
+        )
+        self.client = APIClient()
+
+    def test_raw_updates_are_read_on_the_next_request(self):
+        self.assertEqual([node['name'] for node in self.client.get('/categories/').json()], ['Healthcare'])
+        self.assertEqual(self.client.get('/translations/?lang=fr').json()['translations'], {'Cameroon': 'Cameroun'})
+        # As another worker would write: no post_save here, only the version
+        Category.objects.filter(pk=self.category.pk).update(name='Santé')
+        DataVersion.bump(Category)
+        Translation.objects.filter(pk=self.translation.pk).update(value='Le Cameroun')
+        DataVersion.bump(Translation)
+        self.assertEqual([node['name'] for node in self.client.get('/categories/').json()], ['Santé'])
+        self.assertEqual(self.client.get('/translations/?lang=fr').json()['translations'], {'Cameroon': 'Le Cameroun'})
+
+
+class DataVersionTests(TestCase):
+    """Writes bump the version of their own model once per transaction, after it commits."""
+    MODELS = (Category, Business, Review)
+
+    def versions(self):
+        return DataVersion.read(self.MODELS)[0]
+
+    def test_bumped_once_per_model_after_commit(self):
+        before = self.versions()
+        with self.captureOnCommitCallbacks(execute=True):
+            with CaptureQueriesContext(connection) as queries:
+                category = Category.objects.create(name='Healthcare')
+                for index in range(3):
+                    business = Business.objects.create(name=f'Clinique {index}', category=category)
+                    Review.objects.create(business=business, title='Bien', text='Bon accueil', evaluation=4)
+                # Not cached from uncommitted data under the previous stamp
+                self.assertIsNone(DataVersion.stamp((Business,)))
+                self.assertIsNotNone(DataVersion.stamp((Slide,)))
+            self.assertEqual(self.versions(), before)
+        self.assertEqual([query['sql'] for query in queries if 'dataversion' in query['sql'] and 'UPDATE' in query['sql']], [])
+        after = self.versions()
+        self.assertEqual({name: after[name] - before[name] for name in after}, dict.fromkeys(after, 1))
+        self.assertIsNotNone(DataVersion.stamp((Business,)))
+
+    def test_rolled_back_savepoint(self):
+        before = self.versions()
+        with self.captureOnCommitCallbacks(execute=True):
+            with transaction.atomic():
+                Category.objects.create(name='Banks')
+                transaction.set_rollback(True)
+            self.assertIsNotNone(DataVersion.stamp((Category,)))
+            Category.objects.create(name='Healthcare')
+            self.assertIsNone(DataVersion.stamp((Category,)))
+        self.assertEqual(self.versions()['maoniapp.category'], before['maoniapp.category'] + 1)
+
+
+class SingleFlightTests(TestCase):
+    """Concurrent misses and early refreshes of one key run its computation once."""
+
+    def setUp(self):
+        self.cache = TwoTierCache()
+        self.addCleanup(self.cache.shared.clear)
+
+    def burst(self, count, call):
+        barrier = threading.Barrier(count)
+        results = []
+
+        def run():
+            barrier.wait()
+            results.append(call())
+
+        threads = [threading.Thread(target=run) for _ in range(count)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return results
+
+    def slow(self, value):
+        def compute():
+            time.sleep(0.2)
+            return value
+        return mock.Mock(side_effect=compute)
+
+    def test_concurrent_misses_compute_once(self):
+        compute = self.slow('fresh')
+        results = self.burst(20, lambda: self.cache.get_or_set('hot', (), compute))
+        self.assertEqual(results, ['fresh'] * 20)
+        self.assertEqual(compute.call_count, 1)
+
+    def test_early_refresh_keeps_serving_the_current_value(self):
+        self.cache.get_or_set('hot', (), lambda: 'old', timeout=60)
+        compute = self.slow('new')
+        # Refresh always due: one caller recomputes, the others get the current value meanwhile
+        with mock.patch.object(TwoTierCache, 'BETA', 10 ** 9):
+            results = self.burst(20, lambda: self.cache.get_or_set('hot', (), compute, timeout=60))
+        self.assertEqual(compute.call_count, 1)
+        self.assertEqual(sorted(results), ['new'] + ['old'] * 19)
+        self.assertEqual(self.cache.get_or_set('hot', (), compute), 'new')
+
+
+class BusinessPageTests(TestCase):
+    """The business page endpoints show the counters of the latest reviews."""
+
+    def setUp(self):
+        self.category = Category.objects.create(name='Healthcare')
+        self.business = Business.objects.create(name='Clinique', category=self.category, country='CM', city='Douala')
+        self.peer = Business.objects.create(name='Hôpital', category=self.category, country='CM', city='Douala')
+        self.review(self.peer)
+        self.urls = [
+            '/businessdetails/?businesscategory=Healthcare&country=CM&city=Douala&businessname=Clinique',
+            f'/business/{self.business.pk}/related/',
+        ]
+        self.client = APIClient()
+
+    def review(self, business):
+        Review.objects.create(business=business, title='Bien', text='Bon accueil', evaluation=4)
+
+    def test_reviews_of_the_businesses_shown_are_counted(self):
+        detail, related = self.urls
+        self.assertEqual(self.client.get(detail).json()['total_reviews'], 0)
+        self.assertEqual(self.client.get(related).json()[0]['total_reviews'], 1)
+        self.review(self.business)
+        self.review(self.peer)
+        self.assertEqual(self.client.get(detail).json()['total_reviews'], 1)
+        self.assertEqual(self.client.get(related).json()[0]['total_reviews'], 2)
+
+
+class HomeViewTests(TestCase):
+    """home/ returns what the five landing page endpoints return, and follows writes."""
+    ENDPOINTS = {
+        'slides': '/slides/',
+        'banners': '/banners/',
+        'categories': '/category-business-count/',
+        'reviews': '/reviews/',
+        'brands': '/businessesbrand/',
+    }
+
+    def setUp(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            category = Category.objects.create(name='Healthcare')
+            business = Business.objects.create(
+                name='Clinique', category=category, country='CM', city='Douala', logo='businesslogo/clinique.png',
+            )
+            for index in range(6):
+                review = Review.objects.create(
+                    business=business, title=f'Avis {index}', text='Bon accueil', evaluation=4,
+                    record='records/a.mp3' if index % 2 else None,
+                )
+                Comment.objects.create(review=review, text='Merci')
+            Slide.objects.create(title='Accueil', bgImg='slideimg/accueil.png')
+            Banner.objects.create(title='Promo')
+            Translation.objects.create(language=Language.objects.create(code='fr', name='Français'), key='Cameroon', value='Cameroun')
+        self.client = APIClient()
+
+    def assertMatchesEndpoints(self, lang):
+        home = self.client.get(f'/home/?lang={lang}').json()
+        for key, url in self.ENDPOINTS.items():
+            with self.subTest(fragment=key, lang=lang):
+                self.assertEqual(home[key], json.loads(content(self.client.get(f'{url}?lang={lang}'))))
+
+    def test_fragments_match_the_endpoints(self):
+        for lang in ('fr', 'en'):
+            self.assertMatchesEndpoints(lang)
+        # Served from cache: only the model versions are read
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.client.get('/home/?lang=fr').status_code, 200)
+        self.assertEqual(len(queries), 1 + len(self.ENDPOINTS))
+
+    def test_reads_do_not_write(self):
+        # Versions seeded by the migration: neither the ETag nor the cache keys write
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.client.get('/home/?lang=fr').status_code, 200)
+        self.assertEqual([query['sql'] for query in queries if not query['sql'].startswith('SELECT')], [])
+
+    def test_no_api_root(self):
+        self.assertEqual(self.client.get('/').status_code, 404)
+
+    def test_fragments_follow_writes(self):
+        self.assertMatchesEndpoints('fr')
+        Comment.objects.create(review=Review.objects.order_by('-created_at').first(), text='Nouveau')
+        Slide.objects.create(title='Nouveau')
+        Business.objects.create(name='Pharmacie', category=Category.objects.get(), active=True)
+        self.assertMatchesEndpoints('fr')
+
+    def test_conditional_get(self):
+        etag = self.client.get('/home/')['ETag']
+        self.assertEqual(self.client.get('/home/', HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        with self.captureOnCommitCallbacks(execute=True):
+            Banner.objects.create(title='Soldes')
+        self.assertEqual(self.client.get('/home/', HTTP_IF_NONE_MATCH=etag).status_code, 200)
@@ -0,0 +1,131 @@
+import hashlib
+import json
+from collections import OrderedDict, namedtuple
+
+from django.utils import timezone
+
+from .cache import ProcessState
+from .countries import COUNTRIES
+
+# Bundle compilé d'une langue : `content` est le JSON servi tel quel, `version` le hash de son contenu
+TranslationBundle = namedtuple('TranslationBundle', 'language version last_updated translations content')
+
+
+class TranslationCache(ProcessState):
+    """
+    Toutes les traductions, par code de langue tel qu'il est enregistré ({'fr': {clé: valeur}}),
+    chargées en une seule requête au premier usage et gardées en mémoire par processus. Les
+    dictionnaires sont partagés, ne pas les modifier. Suit les écritures de Language et
+    Translation comme décrit dans ProcessState (maoniapp/cache.py).
+    """
+    # Nom distinct des anciennes entrées du cache partagé, dont les codes étaient en minuscules
+    name = 'translations-by-code'
+
+    # Versions précédentes gardées pour les deltas (?since=), toutes langues confondues
+    HISTORY_SIZE = 64
+
+    def __init__(self):
+        super().__init__()
+        self._bundles = (None, {})
+        self._lowered = (None, {})
+        self._history = OrderedDict()
+
+    def models(self):
+        from .models.language import Language, Translation
+
+        return (Language, Translation)
+
+    @staticmethod
+    def _query():
+        from .models.language import Language, Translation
+
+        # Les langues sans traduction existent aussi (bundle vide)
+        languages = {code: {} for code in Language.objects.values_list('code', flat=True)}
+        for code, key, value in Translation.objects.values_list('language__code', 'key', 'value'):
+            languages.setdefault(code, {})[key] = value
+        return languages
+
+    def language(self, code):
+        """Traductions d'une langue ('fr', 'fr-FR' ou 'FR'), {} si elle n'existe pas."""
+        state = self._load()
+        owner, languages = self._lowered
+        if owner is not state:
+            languages = {language.lower(): translations for language, translations in state.items()}
+            self._lowered = (state, languages)
+        code = (code or '').lower()
+        return languages.get(code) or languages.get(code.split('-')[0], {})
+
+    def bundle(self, code):
+        """
+        Bundle compilé de la langue `code` (code exact, casse comprise, sans repli sur la langue
+        de base), None si elle n'existe pas. Compilé au premier usage après chaque invalidation.
+        """
+        state = self._load()
+        if code not in state:
+            return None
+        owner, bundles = self._bundles
+        if owner is not state:
+            owner, bundles = state, {}
+            self._bundles = (owner, bundles)
+        bundle = bundles.get(code)
+        if bundle is None:
+            bundle = bundles[code] = self._compile(code, state[code])
+            with self._lock:
+                self._history[bundle.version] = (code, bundle.translations)
+                self._history.move_to_end(bundle.version)
+                while len(self._history) > self.HISTORY_SIZE:
+                    self._history.popitem(last=False)
+        return bundle
+
+    @staticmethod
+    def _compile(code, translations):
+        from .models.language import Language, Translation
+        from .models.version import DataVersion
+
+        canonical = json.dumps(translations, ensure_ascii=False, sort_keys=True, separators=(',', ':'))
+        version = hashlib.blake2b(f'{code}:{canonical}'.encode(), digest_size=8).hexdigest()
+        # Dernière écriture ; à défaut (données antérieures aux versions), l'instant de la compilation
+        _, last_updated = DataVersion.read((Language, Translation))
+        last_updated = last_updated or timezone.now()
+        # Même format de date que le DateTimeField de DRF (UTC, suffixe Z)
+        updated = last_updated.isoformat().replace('+00:00', 'Z')
+        content = (
+            f'{{"language":{json.dumps(code)},"version":"{version}","last_updated":{json.dumps(updated)},'
+            f'"translations":{canonical}}}'
+        ).encode()
+        return TranslationBundle(code, version, last_updated, translations, content)
+
+    def delta(self, bundle, since):
+        """
+        Clés modifiées ou ajoutées et clés supprimées entre la version `since` et `bundle`,
+        None si cette version n'est plus connue (le client recharge alors le bundle complet).
+        """
+        with self._lock:
+            code, previous = self._history.get(since, (None, None))
+        if code != bundle.language:
+            return None
+        current = bundle.translations
+        return {
+            'language': bundle.language,
+            'version': bundle.version,
+            'since': since,
+            'changed': {key: value for key, value in current.items() if previous.get(key) != value},
+            'removed': sorted(key for key in previous if key not in current),
+        }
+
+
+translation_cache = TranslationCache()
+
+
+def country_name(code, language=None):
+    """
+    Nom du pays de code alpha-2 `code`, traduit dans `language` quand la table Translation
+    le connaît, sinon le nom anglais de pycountry. None pour un code inconnu.
+    """
+    country = COUNTRIES.get((code or '').upper())
+    if country is None:
+        return None
+    name, key = country
+    if language:
+        return translation_cache.language(language).get(key, name)
+    return name
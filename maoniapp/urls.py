@@ -1,33 +1,34 @@
 # Imports des modules Django et de l'API REST
-from django.urls import path
+from django.urls import include, path
 from rest_framework_simplejwt.views import TokenRefreshView
-from rest_framework.routers import DefaultRouter
+from rest_framework.routers import SimpleRouter
 
 # Contrôleurs
 from .controllers.translationcontroller import TranslationView
 from .controllers.reportcontroller import UserBusinessReportListView
 from .controllers.bannercontroller import BannerViewSet
 from .controllers.slidecontroller import SlideViewSet
-from .controllers.codecontroller import CheckCodeStatusView
+from .controllers.homecontroller import HomeView
+from .controllers.codecontroller import CheckCodeStatusView, RequestCodesView
 from .controllers.commentcontroller import CreateCommentView
 from .controllers.businesscontroller import (
     BusinessListCreateView, BusinessListNameView, BusinessListView, BusinessRetrieveUpdateView,
     BusinessDetailView, ChangeUserBusinessView, DeleteUserBusinessView, FilterBusinessReviewsByNameView,
-    RelatedBusinessesView, BusinessWithReviewsListView, UserBusinessReviews,
+    RelatedBusinessesView, BusinessWithReviewsListView, UserBusinessReviews, BusinessAutocompleteView,
     UserBusinessesView, UsersInSameBusinessView, BusinessBrandListView
 )
 from .controllers.categorycontroller import (
     CategoryBusinessCountView, CategoryListCreateView, CategoryRetrieveUpdateDeleteView, FilterCategoryWithNameView
 )
 from .controllers.reviewcontroller import (
-    ReviewCommentsView, ReviewListCreateView, ReviewListByBusinessView, ReviewUpdateView
+    ReviewCommentsView, ReviewListCreateView, ReviewListByBusinessView, ReviewMapClustersView, ReviewNearbyView, ReviewSearchView, ReviewUpdateView
 )
 from .controllers.authcontroller import (
     CheckSessionView, SignupView, LoginView, LogoutView, CreateCollaboratorView, ChangePasswordView
 )
 
 # Configuration des routes pour les vues avec le routeur Django Rest Framework
-router = DefaultRouter()
+router = SimpleRouter()
 router.register(r'slides', SlideViewSet, basename='slide')
 router.register(r'banners', BannerViewSet, basename='banner')
 
@@ -40,10 +41,14 @@ urlpatterns = [
     path('change-password/', ChangePasswordView.as_view(), name='change-password'),
     path('check-session/', CheckSessionView.as_view(), name='check-session'),
 
+    # --------------------- Page d'accueil --------------------- #
+    path('home/', HomeView.as_view(), name='home'),
+
     # --------------------- Gestion des entreprises --------------------- #
     path('businesses/', BusinessListCreateView.as_view(), name='business-list-create'),
     path('business/<uuid:pk>/', BusinessRetrieveUpdateView.as_view(), name='business-retrieve-update'),
     path('businessnames/', BusinessListNameView.as_view(), name='business-list-name'),
+    path('autocomplete/', BusinessAutocompleteView.as_view(), name='business-autocomplete'),
     path('business-with-reviews/', BusinessWithReviewsListView.as_view(), name='business-with-reviews'),
     path('businessdetails/', BusinessDetailView.as_view(), name='business-detail'),
     path('business-reviews-list/', ReviewListByBusinessView.as_view(), name='business-reviews'),
@@ -59,6 +64,9 @@ urlpatterns = [
     
     # --------------------- Gestion des avis --------------------- #
     path('reviews/', ReviewListCreateView.as_view(), name='review-list-create'),
+    path('reviews/search/', ReviewSearchView.as_view(), name='review-search'),
+    path('reviews/nearby/', ReviewNearbyView.as_view(), name='review-nearby'),
+    path('reviews/map/', ReviewMapClustersView.as_view(), name='review-map-clusters'),
     path('deletereview/<uuid:reviewId>/', ReviewUpdateView.as_view(), name='update-review'),
     path('create-comment/<uuid:review_id>/review/', CreateCommentView.as_view(), name='create-comment'),
     path('reviews/<uuid:review_id>/comments/', ReviewCommentsView.as_view(), name='review-comments'),
@@ -73,9 +81,11 @@ urlpatterns = [
 
     # --------------------- Autres fonctionnalités --------------------- #
     path('check-code-status/<str:invitation_code>/', CheckCodeStatusView.as_view(), name='check-code-status'),
+    path('business/<uuid:business_id>/codes/', RequestCodesView.as_view(), name='business-request-codes'),
     path('reports/', UserBusinessReportListView.as_view(), name='user-reports-list'),
     path('filter-businesses/', BusinessListView.as_view(), name='business-by-filter-list'),
     path('translations/', TranslationView.as_view(), name='translations'),
 
     # --------------------- Route pour les vues de l'API --------------------- #
+    path('', include(router.urls)),
 ]
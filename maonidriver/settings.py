@@ -13,6 +13,7 @@ https://docs.djangoproject.com/en/5.1/ref/settings/
 from datetime import timedelta
 from pathlib import Path
 import os
+import tempfile
 os.environ["GOOGLE_APPLICATION_CREDENTIALS"] = "E:/djangoProject/maonidriver/service_account.json"
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -58,15 +59,26 @@ INSTALLED_APPS = [
     'django_filters',
 ]
 
-# CACHES = {
-#     'default': {
-#         'BACKEND': 'django_redis.cache.RedisCache',
-#         'LOCATION': 'redis://127.0.0.1:6379/1',
-#         'OPTIONS': {
-#             'CLIENT_CLASS': 'django_redis.client.DefaultClient'
-#         }
-#     }
-# }
+# Cache partagé entre les processus (second niveau de maoniapp/cache.py, limites de débit de DRF) :
+# Redis quand REDIS_URL est défini (ex. redis://127.0.0.1:6379/1), sinon des fichiers locaux (un seul serveur).
+# Le recalcul unique entre processus demande Redis : add() n'est pas atomique avec FileBasedCache
+if os.environ.get('REDIS_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django_redis.cache.RedisCache',
+            'LOCATION': os.environ['REDIS_URL'],
+            'OPTIONS': {
+                'CLIENT_CLASS': 'django_redis.client.DefaultClient'
+            }
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': os.environ.get('CACHE_DIR', os.path.join(tempfile.gettempdir(), 'maoni-cache')),
+        }
+    }
 
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(minutes=15),
@@ -90,6 +102,9 @@ REST_FRAMEWORK = {
         'rest_framework_simplejwt.authentication.JWTAuthentication',
     ],
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.LimitOffsetPagination',
+    'DEFAULT_THROTTLE_RATES': {
+        'check-code': '60/minute',
+    },
     
 }
 
@@ -104,6 +119,13 @@ MIDDLEWARE = [
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
+
+# Invitation codes: pool size given to a new business, level below which the
+# replenish_codes command tops a pool back up, and max codes per manual request
+INVITATION_CODES_PER_BUSINESS = 32
+INVITATION_CODE_LOW_WATER = 8
+INVITATION_CODE_MAX_REQUEST = 500
+
 SESSION_ENGINE = 'django.contrib.sessions.backends.db'
 SESSION_COOKIE_AGE = 3600  # Durée de la session (en secondes)(1h)
 #SESSION_COOKIE_AGE = 5184000 # Durée de la session (en secondes)(60 jours)
@@ -143,6 +165,9 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        # File-backed test database: concurrency tests need SQLite's real locking,
+        # the shared in-memory database fails concurrent writers instead of waiting.
+        'TEST': {'NAME': BASE_DIR / 'test_db.sqlite3'},
     }
 }
 